@@ -50,15 +50,19 @@ setup(
     #     'dev': ['check-manifest'],
     #     'test': ['coverage'],
     # },
-    # package_data={  # Optional
-    #     'sample': ['package_data.dat'],
-    # },
+    package_data={  # Optional
+        'stockdaq.data': ['samples/*.h5'],
+    },
     entry_points={
         'console_scripts': [
                 'stockdaq-make-symbol-list='
                 'stockdaq.clitools.make_symbol_list:main',
                 'stockdaq-update-database='
                 'stockdaq.clitools.update_database:main',
+                'stockdaq-mock-server='
+                'stockdaq.clitools.mock_server:main',
+                'stockdaq-rebuild-catalog='
+                'stockdaq.clitools.rebuild_catalog:main',
                 ],
         }
     # List additional URLs that are relevant to your project as a dict.
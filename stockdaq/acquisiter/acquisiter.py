@@ -3,9 +3,20 @@
 import datetime
 import os
 import sys
+import threading
 import time
 
+import stockdaq.acquisiter.health
+import stockdaq.acquisiter.journal
+import stockdaq.acquisiter.lanes
+import stockdaq.acquisiter.pipeline
+import stockdaq.acquisiter.rate_limiter
+import stockdaq.acquisiter.scheduler
+import stockdaq.data.catalog
+import stockdaq.data.data
 import stockdaq.data.downloader_dict
+import stockdaq.data.manager
+import stockdaq.data.response_cache
 from stockdaq.logger import logger
 
 
@@ -47,12 +58,61 @@ class Acquisiter:
     file_structure: list of str, optional
         How to set up parent/child folders.
         Defaults to ["symbol", "frequency", "data"].
+    rate_limiters: dict of stockdaq.acquisiter.rate_limiter.RateLimiter
+        {"api": RateLimiter} pairs, derived from the API configuration file.
+    parallel: boolean
+        Run one worker lane per API.
+    pipeline: boolean
+        Run download, format/segment and write as pipelined stages.
+    pipeline_kwargs: dict
+        Keyword arguments passed to stockdaq.acquisiter.pipeline.Pipeline.
+    incremental: boolean
+        Only request data newer than the data stored.
+    batch_size: int
+        Number of symbols requested with a single call from APIs
+        supporting batch downloads.
+    session_kwargs: dict
+        Keyword arguments passed to the make_session() method of the
+        downloaders.
+    sessions: dict
+        {"api": session} pairs of the pooled HTTP sessions.
+    journal_enabled: boolean
+        Record the status of each symbol in a journal.
+    journal_dir: str
+        Directory of the journals.
+    journal_keep: int
+        Number of journals kept.
+    resume: boolean
+        Continue the pending symbols of the latest journal.
+    retry_failed: boolean
+        Retry the failed symbols of the latest journal.
+    journal: stockdaq.acquisiter.journal.Journal or None
+        The journal of the current database update.
+    update_intervals: dict
+        {"symbol": interval (seconds)} pairs of rolling updates.
+    schedule_state_path: str
+        Path to the file where the due time of each symbol is kept.
+    health: stockdaq.acquisiter.health.HealthMonitor
+        Health of the APIs.
+    response_cache: stockdaq.data.response_cache.ResponseCache or None
+        The cache of raw API responses.
+    timezone: str or None
+        Timezone the timestamps are converted to.
+    catalog: stockdaq.data.catalog.Catalog or None
+        The catalog of the data files.
     """
     def __init__(self, stocklist, api_config_path, apikey_dict,
             api_list=["Alpha Vantage",],frequency="intraday", root_dir="./",
             file_structure=["symbol", "frequency", "data"],
             rolling=False, api_call_interval=12,
-            database_update_interval=86400):
+            database_update_interval=86400, quota_state_path=None,
+            parallel=False, pipeline=False, pipeline_kwargs={},
+            incremental=False, batch_size=1, session_kwargs={},
+            journal=True, journal_dir=None, journal_keep=10, resume=False,
+            retry_failed=False, update_intervals={},
+            schedule_state_path=None, health_kwargs={},
+            response_cache_dir=None, response_cache_kwargs={},
+            timezone=None, catalog=False, catalog_path=None):
         """Constructor
 
         Parameters
@@ -80,11 +140,96 @@ class Acquisiter:
             Defaults to be False.
         api_call_interval: int, optional
             Minimal delay (seconds) between API calls.
-            Use your API's limitation to derive this value.
+            Only used for APIs without "API requests per minute" and
+            "API requests per day" in the API configuration file.
             Defaults to 12.
         database_update_interval: int, optional
             Interval (seconds) between each database update.
             Defaults to 86400 (1 day).
+        quota_state_path: str, optional
+            Path to the file where the API quota state is kept.
+            Defaults to None, i.e. ".quota.json" in root_dir.
+        parallel: boolean, optional
+            Run one worker lane per API, each pulling symbols from a shared
+            queue at its own rate, instead of one symbol at a time.
+            Defaults to False.
+        pipeline: boolean, optional
+            Run download, format/segment and write as pipelined stages
+            connected by bounded queues.
+            Defaults to False.
+        pipeline_kwargs: dict, optional
+            Keyword arguments passed to
+            stockdaq.acquisiter.pipeline.Pipeline.
+            Defaults to {}.
+        incremental: boolean, optional
+            Look up the newest data stored for each symbol. Skip symbols
+            that are up to date and only request data since then for
+            the others.
+            Defaults to False.
+        batch_size: int, optional
+            Number of symbols requested with a single call from APIs
+            supporting batch downloads, e.g. yfinance.
+            Only used when parallel and pipeline are False.
+            Defaults to 1, i.e. no batch downloads.
+        session_kwargs: dict, optional
+            Keyword arguments passed to the make_session() method of the
+            downloaders, e.g. "pool_size", "timeout" and "retries".
+            One session is kept for each API for the whole run.
+            Defaults to {}.
+        journal: boolean, optional
+            Record the status of each symbol in a journal during
+            database updates.
+            Defaults to True.
+        journal_dir: str, optional
+            Directory of the journals.
+            Defaults to None, i.e. ".journal" in root_dir.
+        journal_keep: int, optional
+            Number of journals kept. Older journals are removed when a
+            new one is started, e.g. in each cycle of rolling updates.
+            Defaults to 10.
+        resume: boolean, optional
+            Continue the pending symbols of the latest journal in the
+            first database update, instead of starting a new run.
+            Defaults to False.
+        retry_failed: boolean, optional
+            Retry the failed symbols of the latest journal in the
+            first database update, instead of starting a new run.
+            Defaults to False.
+        update_intervals: dict, optional
+            {"symbol": interval (seconds)} pairs overriding
+            database_update_interval in rolling updates, e.g. to refresh
+            some symbols more often.
+            Defaults to {}.
+        schedule_state_path: str, optional
+            Path to the file where the due time of each symbol is kept
+            in rolling updates.
+            Defaults to None, i.e. ".schedule.json" in root_dir.
+        health_kwargs: dict, optional
+            Keyword arguments passed to
+            stockdaq.acquisiter.health.HealthMonitor, e.g. "cooldown",
+            "failure_threshold" and "max_retries".
+            Defaults to {}.
+        response_cache_dir: str, optional
+            Directory of the cache of raw API responses.
+            Cached responses are used instead of calling the APIs.
+            Their TTL is capped at the shortest update interval.
+            Defaults to None, i.e. no cache.
+        response_cache_kwargs: dict, optional
+            Keyword arguments passed to
+            stockdaq.data.response_cache.ResponseCache, e.g. "ttl",
+            "max_size" and "offline".
+            Defaults to {}.
+        timezone: str, optional
+            Timezone the timestamps are converted to, e.g. the exchange
+            timezone "America/New_York".
+            Defaults to None, i.e. the wall time of the APIs.
+        catalog: boolean, optional
+            Record the written files in a catalog and look up the stored
+            data there instead of opening the files.
+            Defaults to False.
+        catalog_path: str, optional
+            Path of the catalog.
+            Defaults to None, i.e. ".catalog.sqlite" in root_dir.
         """
         self.stocklist = stocklist
         self.root_dir = root_dir
@@ -94,13 +239,65 @@ class Acquisiter:
         self.frequency = frequency
         self.file_structure = file_structure
         self.rolling = rolling
+        self.parallel = parallel
+        self.pipeline = pipeline
+        self.pipeline_kwargs = pipeline_kwargs
+        self.incremental = incremental
+        self.batch_size = batch_size
+        self.session_kwargs = session_kwargs
+        self.sessions = {}
+        self._sessions_lock = threading.Lock()
+        self._local = threading.local()
+        self.journal_enabled = journal
+        if journal_dir is None:
+            journal_dir = os.path.join(root_dir, ".journal")
+        self.journal_dir = journal_dir
+        self.journal_keep = journal_keep
+        self.resume = resume
+        self.retry_failed = retry_failed
+        self.journal = None
+        self.update_intervals = update_intervals
+        if schedule_state_path is None:
+            schedule_state_path = os.path.join(root_dir, ".schedule.json")
+        self.schedule_state_path = schedule_state_path
         self.api_call_interval = datetime.timedelta(seconds=api_call_interval)
         self.database_update_interval = datetime.timedelta(
             seconds=database_update_interval)
+        if quota_state_path is None:
+            quota_state_path = os.path.join(root_dir, ".quota.json")
+        self.rate_limiters = (
+            stockdaq.acquisiter.rate_limiter.get_rate_limiters(
+                api_config_path=api_config_path, api_list=api_list,
+                state_path=quota_state_path,
+                api_call_interval=api_call_interval
+                )
+            )
+        self.health = stockdaq.acquisiter.health.HealthMonitor(
+            api_list=api_list, **health_kwargs)
+        self.timezone = timezone
+        self.response_cache = None
+        if response_cache_dir is not None:
+            self.response_cache = stockdaq.data.response_cache.ResponseCache(
+                cache_dir=response_cache_dir, **response_cache_kwargs)
+            # A response older than the update interval would be served
+            # again instead of the new data.
+            self.response_cache.ttl = min(
+                [self.response_cache.ttl, database_update_interval]
+                + list(self.update_intervals.values()))
+        self.catalog = None
+        if catalog:
+            if catalog_path is None:
+                catalog_path = os.path.join(root_dir, ".catalog.sqlite")
+            self.catalog = stockdaq.data.catalog.Catalog(
+                path=catalog_path, root_dir=root_dir,
+                file_structure=file_structure)
 
     def update_database(self, download_kwargs={}, export_kwargs={}):
         """Get stock data from API and update datebase.
 
+        With rolling updates, symbols are updated again when they are due,
+        see update_rolling().
+
         Parameters
         ----------
         downloader_kwargs: dict
@@ -115,67 +312,639 @@ class Acquisiter:
         # downloader = stockdaq.data.downloader_dict.downloader_dict[api](
         #     apikey=apikey
         #     )
-        last_update_datetime = datetime.datetime.now()
+        if self.rolling:
+            self.update_rolling(
+                download_kwargs=download_kwargs, export_kwargs=export_kwargs
+                )
+            return
 
-        for symbol in self.stocklist:
-            for api in self.api_list:
-                try:
-                    apikey = self.apikey_dict[api]
-                    downloader = (
-                        stockdaq.data.downloader_dict.downloader_dict[api](
-                            apikey=apikey
-                            )
-                        )
-                    downloader.download(
-                        symbol=symbol, frequency=self.frequency,
-                        **download_kwargs
-                        )
-                    last_api_call_datetime = datetime.datetime.now()
+        symbols = self.start_journal()
+        try:
+            self.update_stocklist(
+                download_kwargs=download_kwargs, export_kwargs=export_kwargs,
+                symbols=symbols
+                )
+        finally:
+            self.flush_quota()
 
-                    # Now prefix is the dir.
-                    prefix = self.get_prefix(symbol=symbol)
-                    if not os.path.isdir(prefix):
-                        os.makedirs(prefix)
+        logger.info("Database update finished.")
+        self.health.log_stats()
 
-                    # Now add the customized prefix
-                    try:
-                        export_kwargs["prefix"]
-                    except KeyError:
-                        export_kwargs["prefix"] = None
+    def update_rolling(self, download_kwargs={}, export_kwargs={},
+                       cycles=None):
+        """Update symbols whenever they are due.
+
+        Each symbol is updated again after its interval in
+        self.update_intervals, or self.database_update_interval.
+        The due times are kept in self.schedule_state_path, so a restart
+        only updates the symbols that are due.
+
+        Parameters
+        ----------
+        downloader_kwargs: dict
+            Keyword arguments passed to
+            stockdaq.data.downloader.YourDownloader.download() method.
+        export_kwargs: dict
+            Keyword arguments passed to
+            stockdaq.data.downloader.Downloader.export() method.
+        cycles: int, optional
+            Number of updates before returning.
+            Defaults to None, i.e. run forever.
+        """
+        scheduler = stockdaq.acquisiter.scheduler.Scheduler(
+            symbols=self.stocklist, frequency=self.frequency,
+            interval=self.database_update_interval.total_seconds(),
+            update_intervals=self.update_intervals,
+            state_path=self.schedule_state_path)
+        logger.info("Rolling update enabled.")
+        cycle = 0
+        while cycles is None or cycle < cycles:
+            scheduler.wait()
+            due = scheduler.pop_due()
+            symbols = self.start_journal(symbols=due)
+            try:
+                self.update_stocklist(
+                    download_kwargs=download_kwargs,
+                    export_kwargs=export_kwargs, symbols=symbols
+                    )
+            finally:
+                self.flush_quota()
+            scheduler.reschedule(symbols=symbols)
+            # Due symbols left out by a resumed journal are still due.
+            now = time.time()
+            for symbol in due:
+                if symbol not in symbols:
+                    scheduler.schedule(symbol=symbol, due=now)
+            logger.info("Database update finished, {} symbols updated."
+                        "".format(len(symbols)))
+            self.health.log_stats()
+            cycle += 1
+
+    def flush_quota(self):
+        """Save the quota taken since the last save of the rate limiters."""
+        for rate_limiter in self.rate_limiters.values():
+            rate_limiter.flush()
+
+    def start_journal(self, symbols=None):
+        """Start the journal of a database update.
+
+        If self.resume or self.retry_failed, the latest journal is
+        continued, otherwise a new journal is started.
+
+        Parameters
+        ----------
+        symbols: list of str, optional
+            The symbols of a new journal.
+            Defaults to None, i.e. self.stocklist.
+
+        Returns
+        -------
+        symbols: list of str
+            The symbols to be acquired.
+        """
+        if symbols is None:
+            symbols = self.stocklist
+        self.journal = None
+        if not self.journal_enabled:
+            return symbols
 
-                    if export_kwargs["prefix"] is not None:
-                        prefix += export_kwargs["prefix"]
+        if self.resume or self.retry_failed:
+            journal = stockdaq.acquisiter.journal.Journal.latest(
+                journal_dir=self.journal_dir, frequency=self.frequency)
+            statuses = []
+            if self.resume:
+                statuses.append("pending")
+            if self.retry_failed:
+                statuses.append("failed")
+            # Only the first update of a rolling run is resumed.
+            self.resume = False
+            self.retry_failed = False
+            if journal is None:
+                logger.info("No journal found in {}, starting a new run."
+                            "".format(self.journal_dir))
+            else:
+                symbols = [
+                    symbol for symbol, status in journal.status.items()
+                    if status in statuses
+                    ]
+                if "failed" in statuses:
+                    journal.mark_many(
+                        symbols=journal.get_symbols("failed"),
+                        status="pending")
+                logger.info("Continuing journal {}, {} symbols left."
+                            "".format(journal.path, len(symbols)))
+                self.journal = journal
+                return symbols
+
+        self.journal = stockdaq.acquisiter.journal.Journal.new(
+            journal_dir=self.journal_dir, frequency=self.frequency,
+            symbols=symbols, keep=self.journal_keep)
+        return symbols
+
+    def record(self, symbol, status, reason=None):
+        """Record the status of a symbol in the journal.
+
+        Parameters
+        ----------
+        symbol: str
+            The stock symbol.
+        status: str
+            "pending", "done" or "failed".
+        reason: str, optional
+            The reason of a failure.
+        """
+        if self.journal is not None:
+            self.journal.mark(symbol=symbol, status=status, reason=reason)
 
-                    new_export_kwargs = dict(export_kwargs)
-                    new_export_kwargs["prefix"] = prefix
-                    downloader.export(**new_export_kwargs)
+    def update_stocklist(self, download_kwargs={}, export_kwargs={},
+                         symbols=None):
+        """Get data of all symbols and export them.
 
-                    while (datetime.datetime.now() - last_api_call_datetime <
-                           self.api_call_interval):
-                        time.sleep(1)
+        Parameters
+        ----------
+        downloader_kwargs: dict
+            Keyword arguments passed to
+            stockdaq.data.downloader.YourDownloader.download() method.
+        export_kwargs: dict
+            Keyword arguments passed to
+            stockdaq.data.downloader.Downloader.export() method.
+        symbols: list of str, optional
+            The symbols to be acquired.
+            Defaults to None, i.e. self.stocklist.
+        """
+        if symbols is None:
+            symbols = self.stocklist
+        if self.pipeline:
+            stockdaq.acquisiter.pipeline.Pipeline(
+                acquisiter=self, **self.pipeline_kwargs
+                ).run(
+                    download_kwargs=download_kwargs,
+                    export_kwargs=export_kwargs, symbols=symbols
+                    )
+            return
+        if self.parallel:
+            self.update_parallel(
+                download_kwargs=download_kwargs, export_kwargs=export_kwargs,
+                symbols=symbols
+                )
+            return
+        if self.batch_size > 1:
+            for i in range(0, len(symbols), self.batch_size):
+                self.update_batch(
+                    symbols=symbols[i:i+self.batch_size],
+                    download_kwargs=download_kwargs,
+                    export_kwargs=export_kwargs
+                    )
+            return
+
+        for symbol in symbols:
+            reason = None
+            for api in self.rank_apis():
+                try:
+                    self.update_symbol(
+                        symbol=symbol, api=api,
+                        download_kwargs=download_kwargs,
+                        export_kwargs=export_kwargs
+                        )
+                    self.record(symbol=symbol, status="done")
                     break  # Break out of the api loop when success
-                except ValueError as err:
+                except stockdaq.acquisiter.health.ExportError as err:
+                    # Local errors, trying the next API would not help.
+                    self.record(
+                        symbol=symbol, status="failed",
+                        reason="export: {}".format(err))
+                    raise
+                except stockdaq.acquisiter.health.provider_errors as err:
                     logger.error("Error encountered when trying to acquisite "
                                  "symbol: {} data from API: {}\nError message:"
                                  "\n{}"
                                  "".format(symbol, api, err))
+                    reason = "{}: {}".format(api, err)
                 except:
                     print("Unexpected error:", sys.exc_info()[0])
+                    self.record(
+                        symbol=symbol, status="failed",
+                        reason="{}: {!r}".format(api, sys.exc_info()[1]))
                     raise
+            else:
+                self.record(symbol=symbol, status="failed", reason=reason)
 
-        logger.info("Database update finished.")
+    def update_symbol(self, symbol, api, download_kwargs={},
+                      export_kwargs={}):
+        """Get data of a symbol from an API and export it to the database.
 
-        if self.rolling:
-            next_update_datetime = (last_update_datetime
-                                    + self.database_update_interval)
-            logger.info("Rolling update enabled, "
-                        "next update is scheduled at "
-                        "{}.".format(str(next_update_datetime)))
-            while datetime.datetime.now() < next_update_datetime:
-                time.sleep(1)
-            self.update_database(
+        Parameters
+        ----------
+        symbol: str
+            The stock symbol.
+        api: str
+            The API to use.
+        downloader_kwargs: dict
+            Keyword arguments passed to
+            stockdaq.data.downloader.YourDownloader.download() method.
+        export_kwargs: dict
+            Keyword arguments passed to
+            stockdaq.data.downloader.Downloader.export() method.
+        """
+        current, since = self.check_stored(
+            symbol=symbol, export_kwargs=export_kwargs)
+        if current:
+            logger.info("{} {} data is up to date, skipping."
+                        "".format(symbol, self.frequency))
+            return
+        if since is not None:
+            download_kwargs = dict(download_kwargs, since=since)
+        downloader = self.get_downloader(api=api)
+        self.call_api(
+            api, downloader.download,
+            cached=downloader.is_cached(
+                symbol=symbol, frequency=self.frequency, **download_kwargs),
+            symbol=symbol, frequency=self.frequency, **download_kwargs
+            )
+        self.export_symbol(
+            downloader=downloader, symbol=symbol, export_kwargs=export_kwargs)
+
+    def call_api(self, api, function, cached=False, **kwargs):
+        """Call an API within its rate limit, recording its health.
+
+        Network errors and throttling responses are retried with
+        exponential backoff and jitter, see
+        stockdaq.acquisiter.health.HealthMonitor.should_retry().
+
+        Parameters
+        ----------
+        api: str
+            The API.
+        function: callable
+            The downloader method calling the API.
+        cached: boolean, optional
+            The response is in the response cache, so function is called
+            without taking API quota.
+            Defaults to False.
+        **kwargs:
+            Keyword arguments passed to function.
+
+        Returns
+        -------
+        object
+            The return value of function.
+        """
+        if cached:
+            return function(**kwargs)
+        attempt = 0
+        while True:
+            self.rate_limiters[api].acquire()
+            try:
+                with self.health.track(api):
+                    return function(**kwargs)
+            except stockdaq.acquisiter.health.provider_errors as err:
+                if not self.health.should_retry(api, err, attempt):
+                    raise
+                delay = self.health.get_backoff(attempt)
+                logger.warning("{} API call failed, retrying in {:.1f} "
+                               "seconds.\nError message:\n{}"
+                               "".format(api, delay, err))
+                time.sleep(delay)
+                attempt += 1
+
+    def rank_apis(self):
+        """Available APIs, healthiest first.
+
+        Blocks while all APIs are tripped out.
+
+        Returns
+        -------
+        list of str
+            The APIs.
+        """
+        api_list = self.health.rank(self.api_list)
+        while not api_list and self.api_list:
+            delay = self.health.time_to_available(self.api_list)
+            logger.warning("All APIs are tripped out, waiting {:.0f} "
+                           "seconds.".format(delay))
+            time.sleep(delay)
+            api_list = self.health.rank(self.api_list)
+        return api_list
+
+    def update_batch(self, symbols, download_kwargs={}, export_kwargs={}):
+        """Get data of a batch of symbols and export them to the database.
+
+        APIs in self.api_list are tried in order. APIs supporting batch
+        downloads are called once for all remaining symbols, the others
+        are called for each symbol.
+
+        Parameters
+        ----------
+        symbols: list of str
+            The stock symbols.
+        downloader_kwargs: dict
+            Keyword arguments passed to
+            stockdaq.data.downloader.YourDownloader.download() method.
+        export_kwargs: dict
+            Keyword arguments passed to
+            stockdaq.data.downloader.Downloader.export() method.
+        """
+        remaining = []
+        since_list = []
+        for symbol in symbols:
+            current, since = self.check_stored(
+                symbol=symbol, export_kwargs=export_kwargs)
+            if current:
+                logger.info("{} {} data is up to date, skipping."
+                            "".format(symbol, self.frequency))
+                self.record(symbol=symbol, status="done")
+                continue
+            remaining.append(symbol)
+            since_list.append(since)
+        batch_download_kwargs = dict(download_kwargs)
+        if since_list and None not in since_list:
+            batch_download_kwargs["since"] = min(since_list)
+
+        reasons = {}
+        for api in self.rank_apis():
+            if not remaining:
+                break
+            downloader = self.get_downloader(api=api)
+            if not hasattr(downloader, "download_batch"):
+                for symbol in list(remaining):
+                    if not self.health.available(api):
+                        break  # Tripped out, leave the rest to other APIs
+                    try:
+                        self.update_symbol(
+                            symbol=symbol, api=api,
+                            download_kwargs=download_kwargs,
+                            export_kwargs=export_kwargs
+                            )
+                        remaining.remove(symbol)
+                        self.record(symbol=symbol, status="done")
+                    except stockdaq.acquisiter.health.ExportError as err:
+                        self.record(
+                            symbol=symbol, status="failed",
+                            reason="export: {}".format(err))
+                        raise
+                    except stockdaq.acquisiter.health.provider_errors as err:
+                        logger.error("Error encountered when trying to "
+                                     "acquisite symbol: {} data from API: {}"
+                                     "\nError message:\n{}"
+                                     "".format(symbol, api, err))
+                        reasons[symbol] = "{}: {}".format(api, err)
+                continue
+            try:
+                dataframes = self.call_api(
+                    api, downloader.download_batch, symbols=remaining,
+                    frequency=self.frequency, **batch_download_kwargs
+                    )
+            except stockdaq.acquisiter.health.provider_errors as err:
+                logger.error("Error encountered when trying to acquisite "
+                             "{} symbols data from API: {}\nError message:"
+                             "\n{}"
+                             "".format(len(remaining), api, err))
+                for symbol in remaining:
+                    reasons[symbol] = "{}: {}".format(api, err)
+                continue
+            for symbol, dataframe in dataframes.items():
+                downloader.dataframe = dataframe
+                try:
+                    self.export_symbol(
+                        downloader=downloader, symbol=symbol,
+                        export_kwargs=export_kwargs)
+                except stockdaq.acquisiter.health.ExportError as err:
+                    self.record(
+                        symbol=symbol, status="failed",
+                        reason="export: {}".format(err))
+                    raise
+                self.record(symbol=symbol, status="done")
+            missing = [
+                symbol for symbol in remaining if symbol not in dataframes]
+            if missing:
+                logger.error("No data for symbols: {} from API: {}"
+                             "".format(", ".join(missing), api))
+            for symbol in missing:
+                reasons[symbol] = "{}: no data".format(api)
+            remaining = missing
+        for symbol in remaining:
+            self.record(
+                symbol=symbol, status="failed", reason=reasons.get(symbol))
+
+    def check_stored(self, symbol, export_kwargs={}):
+        """Check the data of a symbol stored in the database.
+
+        Only effective if self.incremental is True.
+
+        Parameters
+        ----------
+        symbol: str
+            The stock symbol.
+        export_kwargs: dict
+            Keyword arguments passed to
+            stockdaq.data.downloader.Downloader.export() method.
+
+        Returns
+        -------
+        current: boolean
+            True if the stored data are up to date.
+        since: datetime.datetime or None
+            The newest timestamp stored.
+            None if there is no data or self.incremental is False.
+        """
+        if not self.incremental:
+            return False, None
+        if self.catalog is not None:
+            since = self.catalog.get_latest_timestamp(
+                symbol=symbol, frequency=self.frequency)
+            current = stockdaq.data.manager.is_current(
+                timestamp=since, frequency=self.frequency)
+            return current, since
+        since = stockdaq.data.manager.get_latest_timestamp(
+            directory=self.get_prefix(symbol=symbol),
+            prefix=export_kwargs.get("prefix") or "",
+            suffix=export_kwargs.get("suffix", ""),
+            extension=(
+                export_kwargs.get("extension")
+                or stockdaq.data.data.extensions[
+                    export_kwargs.get("format", "hdf5")])
+            )
+        current = stockdaq.data.manager.is_current(
+            timestamp=since, frequency=self.frequency)
+        return current, since
+
+    def get_downloader(self, api):
+        """Get the downloader of an API for the current thread.
+
+        Downloaders are made once per thread and reused for the whole run.
+
+        Parameters
+        ----------
+        api: str
+            The API to use.
+
+        Returns
+        -------
+        stockdaq.data.downloader.Downloader
+            The downloader.
+        """
+        downloaders = self._local.__dict__.setdefault("downloaders", {})
+        if api not in downloaders:
+            downloaders[api] = self.make_downloader(api=api)
+        return downloaders[api]
+
+    def make_downloader(self, api):
+        """Make a downloader of an API, using the pooled session of the API.
+
+        Parameters
+        ----------
+        api: str
+            The API to use.
+
+        Returns
+        -------
+        stockdaq.data.downloader.Downloader
+            The downloader.
+        """
+        apikey = self.apikey_dict[api]
+        downloader = stockdaq.data.downloader_dict.downloader_dict[api](
+            apikey=apikey
+            )
+        downloader.set_session(self.get_session(api=api))
+        downloader.set_cache(self.response_cache)
+        downloader.set_timezone(self.timezone)
+        return downloader
+
+    def get_session(self, api):
+        """Get the pooled HTTP session of an API.
+
+        Parameters
+        ----------
+        api: str
+            The API to use.
+
+        Returns
+        -------
+        object
+            The session, shared by all downloaders of the API.
+        """
+        with self._sessions_lock:
+            if api not in self.sessions:
+                downloader_class = (
+                    stockdaq.data.downloader_dict.downloader_dict[api])
+                self.sessions[api] = downloader_class.make_session(
+                    **self.session_kwargs)
+            return self.sessions[api]
+
+    def export_symbol(self, downloader, symbol, export_kwargs={}):
+        """Export downloaded data of a symbol to the database.
+
+        Parameters
+        ----------
+        downloader: stockdaq.data.downloader.Downloader
+            The downloader holding the downloaded data.
+        symbol: str
+            The stock symbol.
+        export_kwargs: dict
+            Keyword arguments passed to
+            stockdaq.data.downloader.Downloader.export() method.
+
+        Raises
+        ------
+        stockdaq.acquisiter.health.ExportError
+            If the data cannot be written, e.g. the disk is full.
+        """
+        try:
+            downloader.export(
+                **self.get_export_kwargs(
+                    symbol=symbol, export_kwargs=export_kwargs)
+                )
+        except stockdaq.acquisiter.health.provider_errors as err:
+            raise stockdaq.acquisiter.health.ExportError(
+                "{}: {!r}".format(symbol, err)) from err
+
+    def get_export_kwargs(self, symbol, export_kwargs={}):
+        """Get export keyword arguments with the database path prefix.
+
+        The directory of the prefix is created if it doesn't exist.
+
+        Parameters
+        ----------
+        symbol: str
+            The stock symbol.
+        export_kwargs: dict
+            Keyword arguments passed to
+            stockdaq.data.downloader.Downloader.export() method.
+
+        Returns
+        -------
+        new_export_kwargs: dict
+            export_kwargs with the "prefix" prepended by the path prefix
+            of the symbol, and the "catalog" if self.catalog is set.
+        """
+        # Now prefix is the dir.
+        prefix = self.get_prefix(symbol=symbol)
+        if not os.path.isdir(prefix):
+            os.makedirs(prefix, exist_ok=True)
+
+        # Now add the customized prefix
+        if export_kwargs.get("prefix") is not None:
+            prefix += export_kwargs["prefix"]
+
+        new_export_kwargs = dict(export_kwargs)
+        new_export_kwargs["prefix"] = prefix
+        if self.catalog is not None:
+            new_export_kwargs.setdefault("catalog", self.catalog)
+        return new_export_kwargs
+
+    def update_parallel(self, download_kwargs={}, export_kwargs={},
+                        symbols=None):
+        """Update database with one worker lane per API.
+
+        Lanes pull symbols from a shared queue at their own rate.
+        A symbol that fails in one lane is put back to the queue for the
+        other lanes.
+
+        Parameters
+        ----------
+        downloader_kwargs: dict
+            Keyword arguments passed to
+            stockdaq.data.downloader.YourDownloader.download() method.
+        export_kwargs: dict
+            Keyword arguments passed to
+            stockdaq.data.downloader.Downloader.export() method.
+        symbols: list of str, optional
+            The symbols to be acquired.
+            Defaults to None, i.e. self.stocklist.
+        """
+        if symbols is None:
+            symbols = self.stocklist
+        api_list = [
+            api for api in self.api_list
+            if api in stockdaq.data.downloader_dict.downloader_dict
+            and api in self.apikey_dict
+            ]
+        symbol_queue = stockdaq.acquisiter.lanes.SymbolQueue(
+            symbols=symbols, apis=api_list)
+        lanes = [
+            stockdaq.acquisiter.lanes.Lane(
+                acquisiter=self, api=api, symbol_queue=symbol_queue,
                 download_kwargs=download_kwargs, export_kwargs=export_kwargs
                 )
+            for api in api_list
+            ]
+        for lane in lanes:
+            lane.start()
+        for lane in lanes:
+            lane.join()
+
+        remaining = symbol_queue.remaining()
+        if remaining and self.journal is not None:
+            # Left by stopped lanes, so they are retried with retry_failed.
+            self.journal.mark_many(
+                symbols=remaining, status="failed", reason="lanes stopped")
+        failed = symbol_queue.failed + remaining
+        if failed:
+            logger.error("{} symbols failed in all lanes: {}"
+                         "".format(len(failed), ", ".join(failed)))
+        for lane in lanes:
+            if lane.exception is not None:
+                raise lane.exception
 
     def get_prefix(self, symbol):
         """Get path prefix for a specific data.
@@ -190,14 +959,6 @@ class Acquisiter:
         prefix: str
             The prefix of the file path.
         """
-        prefix = self.root_dir+""
-        for folder in self.file_structure:
-            if folder == "data":
-                break
-            elif folder == "frequency":
-                prefix += self.frequency+"/"
-            elif folder == "symbol":
-                prefix += symbol+"/"
-            else:
-                raise ValueError("{} structure not available.".format(folder))
-        return prefix
+        return stockdaq.data.manager.get_prefix(
+            root_dir=self.root_dir, file_structure=self.file_structure,
+            symbol=symbol, frequency=self.frequency)
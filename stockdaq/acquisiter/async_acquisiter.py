@@ -0,0 +1,256 @@
+"""Asynchronous data acquisition system.
+"""
+import asyncio
+import concurrent.futures
+import functools
+
+import stockdaq.acquisiter.acquisiter
+import stockdaq.acquisiter.health
+from stockdaq.logger import logger
+
+
+class AsyncAcquisiter(stockdaq.acquisiter.acquisiter.Acquisiter):
+    """Data Acquisiter keeping many API requests in flight with asyncio.
+
+    Requests are bounded by max_concurrency and by the rate limiters of
+    the APIs. The parallel, pipeline and batch modes of
+    stockdaq.acquisiter.acquisiter.Acquisiter are not supported.
+    See stockdaq.acquisiter.acquisiter.Acquisiter for other parameters.
+
+    Parameters
+    ----------
+    max_concurrency: int, optional
+        Maximum number of symbols being acquired at the same time.
+        Defaults to 100.
+
+    Attributes
+    ----------
+    max_concurrency: int
+        Maximum number of symbols being acquired at the same time.
+    """
+    def __init__(self, *args, max_concurrency=100, **kwargs):
+        """Constructor
+
+        Parameters
+        ----------
+        *args:
+            Arguments passed to
+            stockdaq.acquisiter.acquisiter.Acquisiter.
+        max_concurrency: int, optional
+            Maximum number of symbols being acquired at the same time.
+            Defaults to 100.
+        **kwargs:
+            Keyword arguments passed to
+            stockdaq.acquisiter.acquisiter.Acquisiter.
+        """
+        super().__init__(*args, **kwargs)
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1.")
+        if self.parallel or self.pipeline or self.batch_size > 1:
+            raise ValueError("parallel, pipeline and batch_size are not "
+                             "available with the async engine.")
+        self.max_concurrency = max_concurrency
+        self.session_kwargs = dict(
+            {"pool_size": max_concurrency}, **self.session_kwargs)
+
+    def update_stocklist(self, download_kwargs={}, export_kwargs={},
+                         symbols=None):
+        """Get data of all symbols and export them.
+
+        Parameters
+        ----------
+        downloader_kwargs: dict
+            Keyword arguments passed to
+            stockdaq.data.downloader.YourDownloader.download() method.
+        export_kwargs: dict
+            Keyword arguments passed to
+            stockdaq.data.downloader.Downloader.export() method.
+        symbols: list of str, optional
+            The symbols to be acquired.
+            Defaults to None, i.e. self.stocklist.
+        """
+        asyncio.run(
+            self.update_stocklist_async(
+                download_kwargs=download_kwargs, export_kwargs=export_kwargs,
+                symbols=symbols
+                )
+            )
+
+    async def update_stocklist_async(self, download_kwargs={},
+                                     export_kwargs={}, symbols=None):
+        """Get data of all symbols and export them.
+
+        Parameters
+        ----------
+        downloader_kwargs: dict
+            Keyword arguments passed to
+            stockdaq.data.downloader.YourDownloader.download() method.
+        export_kwargs: dict
+            Keyword arguments passed to
+            stockdaq.data.downloader.Downloader.export() method.
+        symbols: list of str, optional
+            The symbols to be acquired.
+            Defaults to None, i.e. self.stocklist.
+        """
+        if symbols is None:
+            symbols = self.stocklist
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.max_concurrency) as executor:
+            await asyncio.gather(*[
+                self.update_symbol_async(
+                    symbol=symbol, semaphore=semaphore, executor=executor,
+                    download_kwargs=download_kwargs,
+                    export_kwargs=export_kwargs
+                    )
+                for symbol in symbols
+                ])
+
+    async def update_symbol_async(self, symbol, semaphore, executor,
+                                  download_kwargs={}, export_kwargs={}):
+        """Get data of a symbol, trying APIs in self.api_list, and export it.
+
+        Parameters
+        ----------
+        symbol: str
+            The stock symbol.
+        semaphore: asyncio.Semaphore
+            Semaphore bounding the number of symbols in flight.
+        executor: concurrent.futures.Executor
+            Executor running the blocking downloads and exports.
+        downloader_kwargs: dict
+            Keyword arguments passed to
+            stockdaq.data.downloader.YourDownloader.download() method.
+        export_kwargs: dict
+            Keyword arguments passed to
+            stockdaq.data.downloader.Downloader.export() method.
+        """
+        loop = asyncio.get_running_loop()
+        async with semaphore:
+            current, since = await loop.run_in_executor(
+                executor,
+                functools.partial(
+                    self.check_stored, symbol=symbol,
+                    export_kwargs=export_kwargs
+                    )
+                )
+            if current:
+                logger.info("{} {} data is up to date, skipping."
+                            "".format(symbol, self.frequency))
+                await self.record_async(
+                    executor=executor, symbol=symbol, status="done")
+                return
+            if since is not None:
+                download_kwargs = dict(download_kwargs, since=since)
+            reason = None
+            for api in await self.rank_apis_async():
+                try:
+                    # Downloaders hold the data of their last call, so
+                    # concurrent tasks share the session, not the downloader.
+                    downloader = self.make_downloader(api=api)
+                    await self.call_api_async(
+                        api, downloader.download_async,
+                        cached=downloader.is_cached(
+                            symbol=symbol, frequency=self.frequency,
+                            **download_kwargs),
+                        symbol=symbol, frequency=self.frequency,
+                        executor=executor, **download_kwargs
+                        )
+                    await loop.run_in_executor(
+                        executor,
+                        functools.partial(
+                            self.export_symbol, downloader=downloader,
+                            symbol=symbol, export_kwargs=export_kwargs
+                            )
+                        )
+                    await self.record_async(
+                        executor=executor, symbol=symbol, status="done")
+                    break  # Break out of the api loop when success
+                except stockdaq.acquisiter.health.ExportError as err:
+                    # Local errors, trying the next API would not help.
+                    await self.record_async(
+                        executor=executor, symbol=symbol, status="failed",
+                        reason="export: {}".format(err))
+                    raise
+                except stockdaq.acquisiter.health.provider_errors as err:
+                    logger.error("Error encountered when trying to acquisite "
+                                 "symbol: {} data from API: {}\nError message:"
+                                 "\n{}"
+                                 "".format(symbol, api, err))
+                    reason = "{}: {}".format(api, err)
+            else:
+                await self.record_async(
+                    executor=executor, symbol=symbol, status="failed",
+                    reason=reason)
+
+    async def record_async(self, executor, **kwargs):
+        """Record a symbol in the journal without blocking the event loop.
+
+        The journal is synced to disk, so record() is run in an executor.
+
+        Parameters
+        ----------
+        executor: concurrent.futures.Executor
+            The executor to run record() in.
+        **kwargs:
+            Keyword arguments passed to the record() method.
+        """
+        await asyncio.get_running_loop().run_in_executor(
+            executor, functools.partial(self.record, **kwargs))
+
+    async def call_api_async(self, api, function, cached=False, **kwargs):
+        """Call an API within its rate limit, recording its health.
+
+        See stockdaq.acquisiter.acquisiter.Acquisiter.call_api().
+
+        Parameters
+        ----------
+        api: str
+            The API.
+        function: coroutine function
+            The downloader method calling the API.
+        cached: boolean, optional
+            The response is in the response cache, so function is called
+            without taking API quota.
+            Defaults to False.
+        **kwargs:
+            Keyword arguments passed to function.
+
+        Returns
+        -------
+        object
+            The return value of function.
+        """
+        if cached:
+            return await function(**kwargs)
+        attempt = 0
+        while True:
+            await self.rate_limiters[api].acquire_async()
+            try:
+                with self.health.track(api):
+                    return await function(**kwargs)
+            except stockdaq.acquisiter.health.provider_errors as err:
+                if not self.health.should_retry(api, err, attempt):
+                    raise
+                delay = self.health.get_backoff(attempt)
+                logger.warning("{} API call failed, retrying in {:.1f} "
+                               "seconds.\nError message:\n{}"
+                               "".format(api, delay, err))
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    async def rank_apis_async(self):
+        """Available APIs, healthiest first.
+
+        Waits asynchronously while all APIs are tripped out.
+
+        Returns
+        -------
+        list of str
+            The APIs.
+        """
+        api_list = self.health.rank(self.api_list)
+        while not api_list and self.api_list:
+            await asyncio.sleep(self.health.time_to_available(self.api_list))
+            api_list = self.health.rank(self.api_list)
+        return api_list
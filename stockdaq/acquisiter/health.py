@@ -0,0 +1,546 @@
+"""API health tracking, circuit breakers and retry backoff.
+"""
+import collections
+import contextlib
+import random
+import threading
+import time
+
+from stockdaq.logger import logger
+
+
+# Errors that make the acquisiter try the next API.
+# Network errors of requests and curl_cffi are OSError.
+provider_errors = (ValueError, OSError)
+
+
+class ExportError(Exception):
+    """Error writing downloaded data to the database.
+
+    Not a provider error, so the APIs are not blamed and the data are not
+    downloaded again from the next API.
+    """
+
+
+class TrippedError(OSError):
+    """The breaker of an API is not closed and the call is refused.
+
+    A provider error, so the acquisiter tries the next API.
+    """
+
+
+# Time (seconds) to wait for the result of a trial call.
+probe_wait = 1.
+
+# Messages of API errors due to exceeding the API quota.
+throttle_messages = [
+    "429", "too many requests", "rate limit", "call frequency",
+    ]
+
+
+def is_throttle(error):
+    """Check if an error is an API throttling response.
+
+    Parameters
+    ----------
+    error: Exception
+        The error.
+
+    Returns
+    -------
+    boolean
+        True if the error is due to exceeding the API quota.
+    """
+    message = str(error).lower()
+    return any(throttle in message for throttle in throttle_messages)
+
+
+def backoff_delay(attempt, base=1., cap=60.):
+    """Exponential backoff delay with full jitter.
+
+    Parameters
+    ----------
+    attempt: int
+        Number of failed attempts so far, starting from 0.
+    base: float, optional
+        Delay (seconds) of the first retry before jitter.
+        Defaults to 1.
+    cap: float, optional
+        Maximum delay (seconds).
+        Defaults to 60.
+
+    Returns
+    -------
+    float
+        Delay (seconds), uniformly distributed between 0 and
+        min(cap, base*2**attempt).
+    """
+    return random.uniform(0, min(cap, base*2**attempt))
+
+
+class ProviderHealth:
+    """Rolling health statistics and circuit breaker of an API.
+
+    The breaker is "closed" while the API is healthy. It opens after
+    failure_threshold consecutive failures, or when the error rate of a
+    full window exceeds error_rate_threshold, and the API is skipped for
+    cooldown seconds. Then it is "half-open": the next call is a trial,
+    which closes the breaker on success and opens it again on failure.
+    Other calls are refused while the trial is in flight.
+
+    Parameters
+    ----------
+    api: str
+        The name of the API.
+    window: int, optional
+        Number of recent calls in the statistics.
+        Defaults to 50.
+    failure_threshold: int, optional
+        Number of consecutive failures that open the breaker.
+        Defaults to 5.
+    error_rate_threshold: float, optional
+        Error rate of a full window that opens the breaker.
+        Defaults to 0.5.
+    cooldown: float, optional
+        Time (seconds) the API is skipped after the breaker opens.
+        Defaults to 300.
+
+    Attributes
+    ----------
+    api: str
+        The name of the API.
+    state: str
+        "closed", "open" or "half-open".
+    calls: int
+        Total number of calls.
+    failures: int
+        Total number of failed calls.
+    throttles: int
+        Total number of throttled calls.
+    opened_at: float or None
+        Time (seconds since the epoch) the breaker last opened.
+    probing: boolean
+        A trial call is in flight.
+    """
+    def __init__(self, api, window=50, failure_threshold=5,
+                 error_rate_threshold=0.5, cooldown=300):
+        """Constructor
+
+        Parameters
+        ----------
+        api: str
+            The name of the API.
+        window: int, optional
+            Number of recent calls in the statistics.
+            Defaults to 50.
+        failure_threshold: int, optional
+            Number of consecutive failures that open the breaker.
+            Defaults to 5.
+        error_rate_threshold: float, optional
+            Error rate of a full window that opens the breaker.
+            Defaults to 0.5.
+        cooldown: float, optional
+            Time (seconds) the API is skipped after the breaker opens.
+            Defaults to 300.
+        """
+        self.api = api
+        self.window = window
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.calls = 0
+        self.failures = 0
+        self.throttles = 0
+        self.opened_at = None
+        self.probing = False
+        self._latencies = collections.deque(maxlen=window)
+        self._errors = collections.deque(maxlen=window)
+        self._consecutive_failures = 0
+
+    @property
+    def error_rate(self):
+        """Fraction of failed calls in the window"""
+        if not self._errors:
+            return 0.
+        return sum(self._errors) / len(self._errors)
+
+    @property
+    def latency(self):
+        """Mean latency (seconds) of calls in the window"""
+        if not self._latencies:
+            return 0.
+        return sum(self._latencies) / len(self._latencies)
+
+    def record(self, latency, failed=False, throttled=False, now=None):
+        """Record the outcome of a call.
+
+        Parameters
+        ----------
+        latency: float
+            Duration (seconds) of the call.
+        failed: boolean, optional
+            The call failed.
+            Defaults to False.
+        throttled: boolean, optional
+            The call was throttled by the API. Counted as a failure.
+            Defaults to False.
+        now: float, optional
+            Current time (seconds since the epoch).
+            Defaults to time.time().
+        """
+        if now is None:
+            now = time.time()
+        failed = failed or throttled
+        self.probing = False
+        self.calls += 1
+        self._latencies.append(latency)
+        self._errors.append(int(failed))
+        if throttled:
+            self.throttles += 1
+        if not failed:
+            self._consecutive_failures = 0
+            if self.state != "closed":
+                logger.info("{} API recovered.".format(self.api))
+            self.state = "closed"
+            return
+        self.failures += 1
+        self._consecutive_failures += 1
+        if (self.state == "half-open"
+                or self._consecutive_failures >= self.failure_threshold
+                or (len(self._errors) == self.window
+                    and self.error_rate > self.error_rate_threshold)):
+            if self.state != "open":
+                logger.warning("{} API tripped out for {} seconds, error "
+                               "rate: {:.0%}, mean latency: {:.1f} seconds."
+                               "".format(self.api, self.cooldown,
+                                         self.error_rate, self.latency))
+            self.state = "open"
+            self.opened_at = now
+
+    def available(self, now=None):
+        """Check if the API can be called.
+
+        Parameters
+        ----------
+        now: float, optional
+            Current time (seconds since the epoch).
+            Defaults to time.time().
+
+        Returns
+        -------
+        boolean
+            False while the breaker is open, or a trial call is in flight.
+        """
+        if self.state == "closed":
+            return True
+        if self.state == "half-open":
+            return not self.probing
+        if now is None:
+            now = time.time()
+        if now - self.opened_at >= self.cooldown:
+            self.state = "half-open"
+            return True
+        return False
+
+    def start_call(self, now=None):
+        """Start a call, the trial call if the breaker is half-open.
+
+        Parameters
+        ----------
+        now: float, optional
+            Current time (seconds since the epoch).
+            Defaults to time.time().
+
+        Returns
+        -------
+        boolean
+            False if the call is refused, see available().
+        """
+        if not self.available(now=now):
+            return False
+        if self.state == "half-open":
+            self.probing = True
+        return True
+
+    def time_to_available(self, now=None):
+        """Time until the API can be called.
+
+        Parameters
+        ----------
+        now: float, optional
+            Current time (seconds since the epoch).
+            Defaults to time.time().
+
+        Returns
+        -------
+        float
+            Time (seconds). 0 if the API is available.
+        """
+        if self.state == "closed":
+            return 0.
+        if self.state == "half-open":
+            return probe_wait if self.probing else 0.
+        if now is None:
+            now = time.time()
+        return max(self.opened_at+self.cooldown-now, 0.)
+
+    def stats(self):
+        """Get the health statistics.
+
+        Returns
+        -------
+        dict
+            "api", "state", "calls", "failures", "throttles",
+            "error_rate" and "latency".
+        """
+        return {
+            "api": self.api,
+            "state": self.state,
+            "calls": self.calls,
+            "failures": self.failures,
+            "throttles": self.throttles,
+            "error_rate": self.error_rate,
+            "latency": self.latency,
+        }
+
+
+class HealthMonitor:
+    """Health of all APIs, ranking them and retrying calls.
+
+    Parameters
+    ----------
+    api_list: list of str
+        List of APIs, in preferred order.
+    max_retries: int, optional
+        Number of retries of a call to the same API after a network error
+        or throttling response.
+        Defaults to 2.
+    backoff_base: float, optional
+        Delay (seconds) of the first retry before jitter.
+        Defaults to 1.
+    backoff_cap: float, optional
+        Maximum delay (seconds) between retries.
+        Defaults to 60.
+    **kwargs:
+        Keyword arguments passed to ProviderHealth.
+
+    Attributes
+    ----------
+    api_list: list of str
+        List of APIs, in preferred order.
+    providers: dict of ProviderHealth
+        {"api": ProviderHealth} pairs.
+    max_retries: int
+        Number of retries of a call to the same API.
+    backoff_base: float
+        Delay (seconds) of the first retry before jitter.
+    backoff_cap: float
+        Maximum delay (seconds) between retries.
+    """
+    def __init__(self, api_list, max_retries=2, backoff_base=1.,
+                 backoff_cap=60., **kwargs):
+        """Constructor
+
+        Parameters
+        ----------
+        api_list: list of str
+            List of APIs, in preferred order.
+        max_retries: int, optional
+            Number of retries of a call to the same API after a network
+            error or throttling response.
+            Defaults to 2.
+        backoff_base: float, optional
+            Delay (seconds) of the first retry before jitter.
+            Defaults to 1.
+        backoff_cap: float, optional
+            Maximum delay (seconds) between retries.
+            Defaults to 60.
+        **kwargs:
+            Keyword arguments passed to ProviderHealth.
+        """
+        self.api_list = list(api_list)
+        self.providers = {
+            api: ProviderHealth(api=api, **kwargs) for api in api_list
+        }
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._lock = threading.Lock()
+
+    def record(self, api, latency, error=None):
+        """Record the outcome of an API call.
+
+        A ValueError that is not a throttling response means the API
+        answered, e.g. that a symbol is not available, and is not counted
+        as a failure of the API.
+
+        Parameters
+        ----------
+        api: str
+            The API.
+        latency: float
+            Duration (seconds) of the call.
+        error: Exception, optional
+            The error raised by the call.
+            Defaults to None, i.e. success.
+        """
+        throttled = error is not None and is_throttle(error)
+        failed = (error is not None and not throttled
+                  and not isinstance(error, ValueError))
+        with self._lock:
+            self.providers[api].record(
+                latency=latency, failed=failed, throttled=throttled)
+
+    @contextlib.contextmanager
+    def track(self, api):
+        """Context manager recording the latency and outcome of a call.
+
+        Raises TrippedError if the breaker of the API refuses the call.
+
+        Parameters
+        ----------
+        api: str
+            The API.
+        """
+        with self._lock:
+            started = self.providers[api].start_call()
+        if not started:
+            raise TrippedError("{} API is tripped out.".format(api))
+        t0 = time.time()
+        try:
+            yield
+        except Exception as err:
+            self.record(api=api, latency=time.time()-t0, error=err)
+            raise
+        except BaseException:
+            # E.g. asyncio.CancelledError, the call is not counted.
+            with self._lock:
+                self.providers[api].probing = False
+            raise
+        self.record(api=api, latency=time.time()-t0)
+
+    def available(self, api):
+        """Check if an API can be called.
+
+        Parameters
+        ----------
+        api: str
+            The API.
+
+        Returns
+        -------
+        boolean
+            False while the breaker of the API is open.
+        """
+        with self._lock:
+            return self.providers[api].available()
+
+    def time_to_available(self, api_list=None):
+        """Time until any of the APIs can be called.
+
+        Parameters
+        ----------
+        api_list: list of str, optional
+            List of APIs.
+            Defaults to None, i.e. self.api_list.
+
+        Returns
+        -------
+        float
+            Time (seconds).
+        """
+        if api_list is None:
+            api_list = self.api_list
+        with self._lock:
+            return min(
+                self.providers[api].time_to_available() for api in api_list)
+
+    def rank(self, api_list=None):
+        """Available APIs, healthiest first.
+
+        APIs are sorted by error rate, then mean latency, rounded so that
+        APIs of similar health keep their preferred order.
+
+        Parameters
+        ----------
+        api_list: list of str, optional
+            List of APIs, in preferred order.
+            Defaults to None, i.e. self.api_list.
+
+        Returns
+        -------
+        list of str
+            The available APIs. Empty if all breakers are open.
+        """
+        if api_list is None:
+            api_list = self.api_list
+        with self._lock:
+            scores = {}
+            for i, api in enumerate(api_list):
+                provider = self.providers[api]
+                if provider.available():
+                    scores[api] = (
+                        round(provider.error_rate, 1),
+                        round(provider.latency), i)
+        return sorted(scores, key=scores.get)
+
+    def should_retry(self, api, error, attempt):
+        """Check if a failed call should be retried with the same API.
+
+        Parameters
+        ----------
+        api: str
+            The API.
+        error: Exception
+            The error raised by the call.
+        attempt: int
+            Number of failed attempts so far, starting from 0.
+
+        Returns
+        -------
+        boolean
+            True for network errors and throttling responses, until
+            max_retries or the breaker of the API opens.
+        """
+        if attempt >= self.max_retries:
+            return False
+        if isinstance(error, ValueError) and not is_throttle(error):
+            return False
+        return self.available(api)
+
+    def get_backoff(self, attempt):
+        """Delay before a retry.
+
+        Parameters
+        ----------
+        attempt: int
+            Number of failed attempts so far, starting from 0.
+
+        Returns
+        -------
+        float
+            Delay (seconds).
+        """
+        return backoff_delay(
+            attempt=attempt, base=self.backoff_base, cap=self.backoff_cap)
+
+    def stats(self):
+        """Get the health statistics of all APIs.
+
+        Returns
+        -------
+        list of dict
+            See ProviderHealth.stats().
+        """
+        with self._lock:
+            return [
+                self.providers[api].stats() for api in self.api_list]
+
+    def log_stats(self):
+        """Log the health statistics of all APIs."""
+        for stats in self.stats():
+            logger.info("{api} API: {state}, {calls} calls, {failures} "
+                        "failures, {throttles} throttled, {error_rate:.0%} "
+                        "recent error rate, {latency:.2f} seconds mean "
+                        "latency.".format(**stats))
@@ -0,0 +1,223 @@
+"""Acquisition journal for resuming interrupted database updates.
+"""
+import datetime
+import json
+import os
+import threading
+
+
+class Journal:
+    """Journal of the status of each symbol in a database update.
+
+    The journal is an append-only file of json lines, flushed to disk on
+    every status change, so it survives crashes.
+    Statuses are "pending", "done" and "failed".
+
+    Parameters
+    ----------
+    path: str
+        Path to the journal file. Existing entries are loaded.
+
+    Attributes
+    ----------
+    path: str
+        Path to the journal file.
+    status: dict
+        {"symbol": status} pairs.
+    reasons: dict
+        {"symbol": reason} pairs of failed symbols.
+    """
+    def __init__(self, path):
+        """Constructor
+
+        Parameters
+        ----------
+        path: str
+            Path to the journal file. Existing entries are loaded.
+        """
+        self.path = path
+        self.status = {}
+        self.reasons = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            self.load()
+
+    @classmethod
+    def new(cls, journal_dir, frequency, symbols, keep=None):
+        """Start a new journal with all symbols pending.
+
+        Parameters
+        ----------
+        journal_dir: str
+            Directory of the journals.
+        frequency: str
+            "intraday", "daily", "weekly", "monthly".
+        symbols: list of str
+            The symbols of the run.
+        keep: int, optional
+            Number of journals of the frequency kept, including the new
+            one. Older journals are removed.
+            Defaults to None, i.e. all journals are kept.
+
+        Returns
+        -------
+        Journal
+            The journal.
+        """
+        if not os.path.isdir(journal_dir):
+            os.makedirs(journal_dir, exist_ok=True)
+        filename = "{}-{}.jsonl".format(
+            datetime.datetime.now().strftime("%Y%m%dT%H%M%S%f"), frequency)
+        journal = cls(path=os.path.join(journal_dir, filename))
+        journal.mark_many(symbols=symbols, status="pending")
+        if keep is not None:
+            cls.prune(journal_dir=journal_dir, frequency=frequency, keep=keep)
+        return journal
+
+    @classmethod
+    def prune(cls, journal_dir, frequency, keep):
+        """Remove all but the latest journals of a frequency.
+
+        Parameters
+        ----------
+        journal_dir: str
+            Directory of the journals.
+        frequency: str
+            "intraday", "daily", "weekly", "monthly".
+        keep: int
+            Number of journals kept.
+        """
+        filenames = cls.list(journal_dir=journal_dir, frequency=frequency)
+        for filename in filenames[:max(len(filenames)-keep, 0)]:
+            try:
+                os.remove(os.path.join(journal_dir, filename))
+            except FileNotFoundError:
+                pass
+
+    @classmethod
+    def list(cls, journal_dir, frequency):
+        """List the journals of a frequency.
+
+        Parameters
+        ----------
+        journal_dir: str
+            Directory of the journals.
+        frequency: str
+            "intraday", "daily", "weekly", "monthly".
+
+        Returns
+        -------
+        list of str
+            Filenames of the journals, oldest first.
+        """
+        if not os.path.isdir(journal_dir):
+            return []
+        suffix = "-{}.jsonl".format(frequency)
+        return sorted(
+            filename for filename in os.listdir(journal_dir)
+            if filename.endswith(suffix))
+
+    @classmethod
+    def latest(cls, journal_dir, frequency):
+        """Open the latest journal of a frequency.
+
+        Parameters
+        ----------
+        journal_dir: str
+            Directory of the journals.
+        frequency: str
+            "intraday", "daily", "weekly", "monthly".
+
+        Returns
+        -------
+        Journal or None
+            The journal. None if there is no journal.
+        """
+        filenames = cls.list(journal_dir=journal_dir, frequency=frequency)
+        if not filenames:
+            return None
+        return cls(path=os.path.join(journal_dir, filenames[-1]))
+
+    def load(self):
+        """Read the journal file.
+
+        A truncated last line, e.g. from a crash while writing,
+        is ignored.
+        """
+        with open(self.path, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                self.status[entry["symbol"]] = entry["status"]
+                if entry["status"] == "failed":
+                    self.reasons[entry["symbol"]] = entry.get("reason")
+                else:
+                    self.reasons.pop(entry["symbol"], None)
+
+    def mark(self, symbol, status, reason=None):
+        """Record the status of a symbol.
+
+        Parameters
+        ----------
+        symbol: str
+            The stock symbol.
+        status: str
+            "pending", "done" or "failed".
+        reason: str, optional
+            The reason of a failure.
+        """
+        self.mark_many(symbols=[symbol], status=status, reason=reason)
+
+    def mark_many(self, symbols, status, reason=None):
+        """Record the status of symbols.
+
+        Parameters
+        ----------
+        symbols: list of str
+            The stock symbols.
+        status: str
+            "pending", "done" or "failed".
+        reason: str, optional
+            The reason of a failure.
+        """
+        if status not in ["pending", "done", "failed"]:
+            raise ValueError("status: {} not available.".format(status))
+        time = datetime.datetime.now().isoformat()
+        lines = []
+        for symbol in symbols:
+            entry = {"symbol": symbol, "status": status, "time": time}
+            if reason is not None:
+                entry["reason"] = reason
+            lines.append(json.dumps(entry)+"\n")
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.writelines(lines)
+                f.flush()
+                os.fsync(f.fileno())
+            for symbol in symbols:
+                self.status[symbol] = status
+                if status == "failed":
+                    self.reasons[symbol] = reason
+                else:
+                    self.reasons.pop(symbol, None)
+
+    def get_symbols(self, status):
+        """Get the symbols with a status.
+
+        Parameters
+        ----------
+        status: str
+            "pending", "done" or "failed".
+
+        Returns
+        -------
+        list of str
+            The symbols, in the order of the run.
+        """
+        with self._lock:
+            return [
+                symbol for symbol, status_ in self.status.items()
+                if status_ == status
+                ]
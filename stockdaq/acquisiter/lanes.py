@@ -0,0 +1,231 @@
+"""Worker lanes for parallel multi-API acquisition.
+"""
+import collections
+import threading
+import time
+
+import stockdaq.acquisiter.health
+from stockdaq.logger import logger
+
+
+class SymbolQueue:
+    """Shared queue of symbols for the worker lanes.
+
+    Parameters
+    ----------
+    symbols: list of str
+        List of symbols to be acquired.
+    apis: list of str
+        List of APIs with a worker lane.
+
+    Attributes
+    ----------
+    apis: list of str
+        List of APIs with a worker lane.
+    failed: list of str
+        Symbols that failed in all lanes.
+    """
+    def __init__(self, symbols, apis):
+        """Constructor
+
+        Parameters
+        ----------
+        symbols: list of str
+            List of symbols to be acquired.
+        apis: list of str
+            List of APIs with a worker lane.
+        """
+        self.apis = list(apis)
+        self.failed = []
+        self._items = collections.deque(
+            (symbol, set()) for symbol in symbols)
+        self._in_progress = 0
+        self._condition = threading.Condition()
+
+    def get(self, api):
+        """Get the next symbol not yet tried by an API.
+
+        Blocks while symbols in progress in other lanes may still be put
+        back to the queue.
+
+        Parameters
+        ----------
+        api: str
+            The API of the lane.
+
+        Returns
+        -------
+        item: tuple or None
+            (symbol, tried_apis) pair.
+            None if there is nothing left for this API.
+        """
+        with self._condition:
+            while True:
+                for i, (symbol, tried) in enumerate(self._items):
+                    if api not in tried:
+                        del self._items[i]
+                        self._in_progress += 1
+                        return symbol, tried
+                if self._in_progress == 0:
+                    return None
+                self._condition.wait()
+
+    def done(self, symbol):
+        """Mark a symbol as acquired.
+
+        Parameters
+        ----------
+        symbol: str
+            The stock symbol.
+        """
+        with self._condition:
+            self._in_progress -= 1
+            self._condition.notify_all()
+
+    def fail(self, symbol, tried, api):
+        """Mark a symbol as failed in a lane and put it back to the queue.
+
+        Parameters
+        ----------
+        symbol: str
+            The stock symbol.
+        tried: set of str
+            APIs that have been tried for this symbol.
+        api: str
+            The API of the lane.
+
+        Returns
+        -------
+        boolean
+            True if the symbol failed in all lanes.
+        """
+        with self._condition:
+            tried.add(api)
+            self._in_progress -= 1
+            failed = all(api_ in tried for api_ in self.apis)
+            if failed:
+                self.failed.append(symbol)
+            else:
+                self._items.appendleft((symbol, tried))
+            self._condition.notify_all()
+            return failed
+
+    def remaining(self):
+        """Symbols left in the queue.
+
+        Returns
+        -------
+        list of str
+            The symbols.
+        """
+        with self._condition:
+            return [symbol for symbol, _ in self._items]
+
+
+class Lane(threading.Thread):
+    """Worker lane of an API.
+
+    Parameters
+    ----------
+    acquisiter: stockdaq.acquisiter.acquisiter.Acquisiter
+        The acquisiter.
+    api: str
+        The API of this lane.
+    symbol_queue: SymbolQueue
+        The shared queue of symbols.
+    download_kwargs: dict, optional
+        Keyword arguments passed to
+        stockdaq.data.downloader.YourDownloader.download() method.
+    export_kwargs: dict, optional
+        Keyword arguments passed to
+        stockdaq.data.downloader.Downloader.export() method.
+
+    Attributes
+    ----------
+    api: str
+        The API of this lane.
+    exception: Exception or None
+        Unexpected exception that stopped this lane.
+    """
+    def __init__(self, acquisiter, api, symbol_queue, download_kwargs={},
+                 export_kwargs={}):
+        """Constructor
+
+        Parameters
+        ----------
+        acquisiter: stockdaq.acquisiter.acquisiter.Acquisiter
+            The acquisiter.
+        api: str
+            The API of this lane.
+        symbol_queue: SymbolQueue
+            The shared queue of symbols.
+        download_kwargs: dict, optional
+            Keyword arguments passed to
+            stockdaq.data.downloader.YourDownloader.download() method.
+        export_kwargs: dict, optional
+            Keyword arguments passed to
+            stockdaq.data.downloader.Downloader.export() method.
+        """
+        super().__init__(name="stockdaq-lane-{}".format(api), daemon=True)
+        self.acquisiter = acquisiter
+        self.api = api
+        self.symbol_queue = symbol_queue
+        self.download_kwargs = download_kwargs
+        self.export_kwargs = export_kwargs
+        self.exception = None
+
+    def run(self):
+        """Acquire symbols from the queue until there is nothing left.
+
+        The lane pauses while its API is tripped out.
+        """
+        health = self.acquisiter.health
+        while True:
+            if not health.available(self.api):
+                time.sleep(health.time_to_available([self.api]))
+                continue
+            item = self.symbol_queue.get(self.api)
+            if item is None:
+                break
+            symbol, tried = item
+            try:
+                self.acquisiter.update_symbol(
+                    symbol=symbol, api=self.api,
+                    download_kwargs=self.download_kwargs,
+                    export_kwargs=self.export_kwargs
+                    )
+            except stockdaq.acquisiter.health.ExportError as err:
+                # Local errors, stop instead of failing over.
+                logger.error("Export error in {} lane, symbol: {}, "
+                             "stopping lane.\nError message:\n{}"
+                             "".format(self.api, symbol, err))
+                # Not put back to the queue for the other lanes.
+                self.symbol_queue.done(symbol)
+                self.acquisiter.record(
+                    symbol=symbol, status="failed",
+                    reason="export: {}".format(err))
+                self.exception = err
+                break
+            except stockdaq.acquisiter.health.provider_errors as err:
+                logger.error("Error encountered when trying to acquisite "
+                             "symbol: {} data from API: {}\nError message:"
+                             "\n{}"
+                             "".format(symbol, self.api, err))
+                if self.symbol_queue.fail(symbol, tried, self.api):
+                    self.acquisiter.record(
+                        symbol=symbol, status="failed",
+                        reason="{}: {}".format(self.api, err))
+            except Exception as err:
+                logger.error("Unexpected error in {} lane, symbol: {}, "
+                             "stopping lane.\nError message:\n{}"
+                             "".format(self.api, symbol, err))
+                if self.symbol_queue.fail(symbol, tried, self.api):
+                    self.acquisiter.record(
+                        symbol=symbol, status="failed",
+                        reason="{}: {!r}".format(self.api, err))
+                self.exception = err
+                break
+            else:
+                self.symbol_queue.done(symbol)
+                self.acquisiter.record(symbol=symbol, status="done")
+        logger.info("{} lane finished.".format(self.api))
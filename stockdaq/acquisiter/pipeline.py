@@ -0,0 +1,450 @@
+"""Pipelined acquisition: download -> format/segment -> write stages.
+"""
+import queue
+import threading
+import time
+
+import stockdaq.acquisiter.health
+import stockdaq.data.data
+from stockdaq.logger import logger
+
+
+_stop = object()
+
+
+class Stage:
+    """A pipeline stage: a pool of worker threads consuming a queue.
+
+    Parameters
+    ----------
+    name: str
+        The name of the stage.
+    function: callable
+        Function called with each item of the input queue.
+        Returns an iterable of items for the output queue.
+    input_queue: queue.Queue
+        The input queue.
+    output_queue: queue.Queue, optional
+        The output queue. Puts block when it is full.
+        Defaults to None, i.e. the outputs are discarded.
+    workers: int, optional
+        Number of worker threads.
+        Defaults to 1.
+
+    Attributes
+    ----------
+    name: str
+        The name of the stage.
+    workers: int
+        Number of worker threads.
+    busy: int
+        Number of workers currently processing an item.
+    processed: int
+        Number of items processed.
+    errors: int
+        Number of items that raised an exception.
+    exceptions: list of Exception
+        Exceptions raised by the function.
+    busy_time: float
+        Total time (seconds) spent by workers processing items.
+    """
+    def __init__(self, name, function, input_queue, output_queue=None,
+                 workers=1):
+        """Constructor
+
+        Parameters
+        ----------
+        name: str
+            The name of the stage.
+        function: callable
+            Function called with each item of the input queue.
+            Returns an iterable of items for the output queue.
+        input_queue: queue.Queue
+            The input queue.
+        output_queue: queue.Queue, optional
+            The output queue. Puts block when it is full.
+            Defaults to None, i.e. the outputs are discarded.
+        workers: int, optional
+            Number of worker threads.
+            Defaults to 1.
+        """
+        if workers < 1:
+            raise ValueError("{} stage needs at least 1 worker.".format(name))
+        self.name = name
+        self.function = function
+        self.input_queue = input_queue
+        self.output_queue = output_queue
+        self.workers = workers
+        self.busy = 0
+        self.processed = 0
+        self.errors = 0
+        self.exceptions = []
+        self.busy_time = 0.
+        self._lock = threading.Lock()
+        self._threads = []
+        self._start_time = None
+
+    def start(self):
+        """Start the worker threads."""
+        self._start_time = time.time()
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, name="stockdaq-{}-{}".format(self.name, i),
+                daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """Let the workers finish the queued items and wait for them."""
+        for _ in self._threads:
+            self.input_queue.put(_stop)
+        for thread in self._threads:
+            thread.join()
+
+    def stats(self):
+        """Get the occupancy of the stage.
+
+        Returns
+        -------
+        dict
+            "name", "workers", "busy", "queued" (items waiting in the
+            input queue), "processed", "errors" and "utilization"
+            (fraction of worker time spent processing items).
+        """
+        with self._lock:
+            elapsed = 0.
+            if self._start_time is not None:
+                elapsed = time.time() - self._start_time
+            utilization = 0.
+            if elapsed > 0:
+                utilization = self.busy_time / (elapsed*self.workers)
+            return {
+                "name": self.name,
+                "workers": self.workers,
+                "busy": self.busy,
+                "queued": self.input_queue.qsize(),
+                "processed": self.processed,
+                "errors": self.errors,
+                "utilization": utilization,
+            }
+
+    def _work(self):
+        """Worker loop."""
+        while True:
+            item = self.input_queue.get()
+            if item is _stop:
+                break
+            with self._lock:
+                self.busy += 1
+            t0 = time.time()
+            try:
+                outputs = list(self.function(item))
+            except Exception as err:
+                logger.error("Unexpected error in {} stage.\n"
+                             "Error message:\n{}".format(self.name, err))
+                outputs = []
+                with self._lock:
+                    self.errors += 1
+                    self.exceptions.append(err)
+            with self._lock:
+                self.busy -= 1
+                self.processed += 1
+                self.busy_time += time.time() - t0
+            if self.output_queue is not None:
+                for output in outputs:
+                    self.output_queue.put(output)
+
+
+class Pipeline:
+    """Pipelined data acquisition.
+
+    Download workers feed a format/segment stage, which feeds a pool of
+    writer workers. Stages are connected by bounded queues so slow stages
+    apply backpressure to the faster ones, and disk writes overlap with
+    network waits.
+
+    Parameters
+    ----------
+    acquisiter: stockdaq.acquisiter.acquisiter.Acquisiter
+        The acquisiter.
+    download_workers: int, optional
+        Number of download workers.
+        Defaults to None, i.e. one per API in acquisiter.api_list.
+    format_workers: int, optional
+        Number of format/segment workers.
+        Defaults to 1.
+    write_workers: int, optional
+        Number of writer workers.
+        Defaults to 2.
+    queue_size: int, optional
+        Maximum number of items in each queue between stages.
+        Defaults to 16.
+    monitor_interval: float, optional
+        Interval (seconds) between logging stage occupancy.
+        Defaults to 60.
+
+    Attributes
+    ----------
+    acquisiter: stockdaq.acquisiter.acquisiter.Acquisiter
+        The acquisiter.
+    stages: list of Stage
+        The stages of the last run.
+    """
+    def __init__(self, acquisiter, download_workers=None, format_workers=1,
+                 write_workers=2, queue_size=16, monitor_interval=60):
+        """Constructor
+
+        Parameters
+        ----------
+        acquisiter: stockdaq.acquisiter.acquisiter.Acquisiter
+            The acquisiter.
+        download_workers: int, optional
+            Number of download workers.
+            Defaults to None, i.e. one per API in acquisiter.api_list.
+        format_workers: int, optional
+            Number of format/segment workers.
+            Defaults to 1.
+        write_workers: int, optional
+            Number of writer workers.
+            Defaults to 2.
+        queue_size: int, optional
+            Maximum number of items in each queue between stages.
+            Defaults to 16.
+        monitor_interval: float, optional
+            Interval (seconds) between logging stage occupancy.
+            Defaults to 60.
+        """
+        if download_workers is None:
+            download_workers = len(acquisiter.api_list)
+        self.acquisiter = acquisiter
+        self.download_workers = download_workers
+        self.format_workers = format_workers
+        self.write_workers = write_workers
+        self.queue_size = queue_size
+        self.monitor_interval = monitor_interval
+        self.stages = []
+        self._pending_writes = {}
+        self._failed_writes = set()
+        self._writes_lock = threading.Lock()
+
+    def run(self, download_kwargs={}, export_kwargs={}, symbols=None):
+        """Acquire symbols of the acquisiter.
+
+        Parameters
+        ----------
+        downloader_kwargs: dict
+            Keyword arguments passed to
+            stockdaq.data.downloader.YourDownloader.fetch() method.
+        export_kwargs: dict
+            Keyword arguments passed to
+            stockdaq.data.downloader.Downloader.export() method.
+        symbols: list of str, optional
+            The symbols to be acquired.
+            Defaults to None, i.e. acquisiter.stocklist.
+        """
+        if symbols is None:
+            symbols = self.acquisiter.stocklist
+        symbol_queue = queue.Queue(maxsize=self.queue_size)
+        format_queue = queue.Queue(maxsize=self.queue_size)
+        write_queue = queue.Queue(maxsize=self.queue_size)
+        download_stage = Stage(
+            name="download",
+            function=lambda symbol: self.download(
+                symbol=symbol, download_kwargs=download_kwargs,
+                export_kwargs=export_kwargs),
+            input_queue=symbol_queue, output_queue=format_queue,
+            workers=self.download_workers)
+        format_stage = Stage(
+            name="format",
+            function=lambda item: self.format(
+                *item, export_kwargs=export_kwargs),
+            input_queue=format_queue, output_queue=write_queue,
+            workers=self.format_workers)
+        write_stage = Stage(
+            name="write", function=self.write, input_queue=write_queue,
+            workers=self.write_workers)
+        self.stages = [download_stage, format_stage, write_stage]
+
+        for stage in self.stages:
+            stage.start()
+        finished = threading.Event()
+        monitor = threading.Thread(
+            target=self._monitor, args=(finished,), daemon=True)
+        monitor.start()
+
+        for symbol in symbols:
+            symbol_queue.put(symbol)
+        for stage in self.stages:
+            stage.stop()
+        finished.set()
+        monitor.join()
+        self.log_stats()
+
+        for stage in self.stages:
+            if stage.exceptions:
+                raise stage.exceptions[0]
+
+    def download(self, symbol, download_kwargs={}, export_kwargs={}):
+        """Download stage: get raw data of a symbol from the APIs.
+
+        Parameters
+        ----------
+        symbol: str
+            The stock symbol.
+        downloader_kwargs: dict
+            Keyword arguments passed to
+            stockdaq.data.downloader.YourDownloader.fetch() method.
+        export_kwargs: dict
+            Keyword arguments passed to
+            stockdaq.data.downloader.Downloader.export() method.
+
+        Returns
+        -------
+        list of tuple
+            [(symbol, downloader, rawdata)].
+            Empty if all APIs failed or the stored data are up to date.
+        """
+        current, since = self.acquisiter.check_stored(
+            symbol=symbol, export_kwargs=export_kwargs)
+        if current:
+            logger.info("{} {} data is up to date, skipping."
+                        "".format(symbol, self.acquisiter.frequency))
+            self.acquisiter.record(symbol=symbol, status="done")
+            return []
+        if since is not None:
+            download_kwargs = dict(download_kwargs, since=since)
+        reason = None
+        for api in self.acquisiter.rank_apis():
+            try:
+                downloader = self.acquisiter.get_downloader(api=api)
+                rawdata = self.acquisiter.call_api(
+                    api, downloader.fetch,
+                    cached=downloader.is_cached(
+                        symbol=symbol, frequency=self.acquisiter.frequency,
+                        **download_kwargs),
+                    symbol=symbol, frequency=self.acquisiter.frequency,
+                    **download_kwargs
+                    )
+                return [(symbol, downloader, rawdata)]
+            except stockdaq.acquisiter.health.provider_errors as err:
+                logger.error("Error encountered when trying to acquisite "
+                             "symbol: {} data from API: {}\nError message:"
+                             "\n{}"
+                             "".format(symbol, api, err))
+                reason = "{}: {}".format(api, err)
+        self.acquisiter.record(symbol=symbol, status="failed", reason=reason)
+        return []
+
+    def format(self, symbol, downloader, rawdata, export_kwargs={}):
+        """Format/segment stage: format raw data and split it into files.
+
+        Parameters
+        ----------
+        symbol: str
+            The stock symbol.
+        downloader: stockdaq.data.downloader.Downloader
+            The downloader that fetched the raw data.
+        rawdata: object
+            The raw data.
+        export_kwargs: dict
+            Keyword arguments passed to
+            stockdaq.data.downloader.Downloader.export() method.
+
+        Returns
+        -------
+        list of tuple
+            (symbol, path, data, save_kwargs) of each file to be written.
+        """
+        try:
+            dataframe = downloader.formatter(datadump=rawdata)
+        except ValueError as err:
+            logger.error("Error encountered when trying to format "
+                         "symbol: {} data from API: {}\nError message:"
+                         "\n{}"
+                         "".format(symbol, downloader.api, err))
+            self.acquisiter.record(
+                symbol=symbol, status="failed",
+                reason="{}: {}".format(downloader.api, err))
+            return []
+        export_kwargs = self.acquisiter.get_export_kwargs(
+            symbol=symbol, export_kwargs=export_kwargs)
+        # The other export keyword arguments are passed to Data.save().
+        partition_kwargs = {
+            key: export_kwargs.pop(key)
+            for key in ["criterion", "prefix", "suffix", "extension"]
+            if key in export_kwargs
+            }
+        if partition_kwargs.get("extension") is None:
+            partition_kwargs["extension"] = stockdaq.data.data.extensions[
+                export_kwargs.get("format", "hdf5")]
+        file_dict = downloader.partition(
+            dataframe=dataframe, **partition_kwargs)
+        if not file_dict:
+            self.acquisiter.record(symbol=symbol, status="done")
+            return []
+        with self._writes_lock:
+            self._pending_writes[symbol] = len(file_dict)
+        return [
+            (symbol, path, data, export_kwargs)
+            for path, data in file_dict.items()
+            ]
+
+    def write(self, item):
+        """Write stage: save a file.
+
+        A symbol is recorded as done when all of its files are written.
+
+        Parameters
+        ----------
+        item: tuple
+            (symbol, path, data, save_kwargs)
+
+        Returns
+        -------
+        list
+            Empty list.
+        """
+        symbol, path, data, save_kwargs = item
+        try:
+            data.save(path=path, **save_kwargs)
+        except Exception as err:
+            with self._writes_lock:
+                self._failed_writes.add(symbol)
+            self.acquisiter.record(
+                symbol=symbol, status="failed",
+                reason="write {}: {!r}".format(path, err))
+            raise
+        finally:
+            with self._writes_lock:
+                self._pending_writes[symbol] -= 1
+                finished = self._pending_writes[symbol] == 0
+                if finished:
+                    del self._pending_writes[symbol]
+                    failed = symbol in self._failed_writes
+                    self._failed_writes.discard(symbol)
+        if finished and not failed:
+            self.acquisiter.record(symbol=symbol, status="done")
+        return []
+
+    def stats(self):
+        """Get the occupancy of all stages.
+
+        Returns
+        -------
+        list of dict
+            See Stage.stats().
+        """
+        return [stage.stats() for stage in self.stages]
+
+    def log_stats(self):
+        """Log the occupancy of all stages."""
+        for stats in self.stats():
+            logger.info("Pipeline stage {name}: {busy}/{workers} busy, "
+                        "{queued} queued, {processed} processed, "
+                        "{errors} errors, {utilization:.0%} utilization."
+                        "".format(**stats))
+
+    def _monitor(self, finished):
+        """Log stage occupancy until finished is set."""
+        while not finished.wait(self.monitor_interval):
+            self.log_stats()
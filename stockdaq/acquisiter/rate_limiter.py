@@ -0,0 +1,418 @@
+"""API rate limiters.
+"""
+import asyncio
+import contextlib
+import functools
+import json
+import math
+import os
+import threading
+import time
+from configparser import ConfigParser
+
+from stockdaq.logger import logger
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+_state_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def _lock_state(state_path):
+    """Lock a state file against other threads and processes.
+
+    The lock is taken on a separate file, state_path+".lock", as the state
+    file itself is replaced on every write. Without fcntl, e.g. on
+    Windows, only threads of the same process are excluded.
+
+    Parameters
+    ----------
+    state_path: str
+        Path to the state file.
+    """
+    state_dir = os.path.dirname(state_path)
+    if state_dir and not os.path.isdir(state_dir):
+        os.makedirs(state_dir, exist_ok=True)
+    with _state_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(state_path+".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class TokenBucket:
+    """Token bucket.
+
+    Parameters
+    ----------
+    capacity: float
+        Maximum number of tokens in the bucket.
+    period: float
+        Time (seconds) it takes to refill an empty bucket.
+    aligned: boolean, optional
+        If True, the bucket is refilled in full at every multiple of
+        period since the epoch (e.g. at UTC midnight for period=86400),
+        instead of continuously.
+        Defaults to False.
+    tokens: float, optional
+        Initial number of tokens.
+        Defaults to capacity.
+    timestamp: float, optional
+        Time (seconds since the epoch) of the last refill.
+        Defaults to now.
+
+    Attributes
+    ----------
+    capacity: float
+        Maximum number of tokens in the bucket.
+    period: float
+        Time (seconds) it takes to refill an empty bucket.
+    aligned: boolean
+        Refill in full at every multiple of period since the epoch.
+    tokens: float
+        Number of tokens available. Negative if tokens are reserved
+        in advance.
+    timestamp: float
+        Time (seconds since the epoch) of the last refill.
+    """
+    def __init__(self, capacity, period, aligned=False, tokens=None,
+                 timestamp=None):
+        """Constructor
+
+        Parameters
+        ----------
+        capacity: float
+            Maximum number of tokens in the bucket.
+        period: float
+            Time (seconds) it takes to refill an empty bucket.
+        aligned: boolean, optional
+            If True, the bucket is refilled in full at every multiple of
+            period since the epoch.
+            Defaults to False.
+        tokens: float, optional
+            Initial number of tokens.
+            Defaults to capacity.
+        timestamp: float, optional
+            Time (seconds since the epoch) of the last refill.
+            Defaults to now.
+        """
+        if capacity <= 0 or period <= 0:
+            raise ValueError("capacity and period must be positive.")
+        self.capacity = capacity
+        self.period = period
+        self.aligned = aligned
+        self.tokens = capacity if tokens is None else tokens
+        self.timestamp = time.time() if timestamp is None else timestamp
+
+    @property
+    def rate(self):
+        """Refill rate (tokens per second)"""
+        return self.capacity / self.period
+
+    def refill(self, now=None):
+        """Add tokens accumulated since the last refill.
+
+        Parameters
+        ----------
+        now: float, optional
+            Current time (seconds since the epoch).
+            Defaults to time.time().
+        """
+        if now is None:
+            now = time.time()
+        if self.aligned:
+            windows = (math.floor(now/self.period)
+                       - math.floor(self.timestamp/self.period))
+            added = max(windows, 0) * self.capacity
+        else:
+            added = max(now-self.timestamp, 0) * self.rate
+        self.tokens = min(self.capacity, self.tokens+added)
+        self.timestamp = now
+
+    def reserve(self, tokens=1, now=None):
+        """Take tokens from the bucket.
+
+        Parameters
+        ----------
+        tokens: float, optional
+            Number of tokens to take.
+            Defaults to 1.
+        now: float, optional
+            Current time (seconds since the epoch).
+            Defaults to time.time().
+
+        Returns
+        -------
+        delay: float
+            Time (seconds) to wait before the tokens can be used.
+        """
+        if now is None:
+            now = time.time()
+        self.refill(now=now)
+        self.tokens -= tokens
+        if self.tokens >= 0:
+            return 0.
+        if self.aligned:
+            windows = math.ceil(-self.tokens/self.capacity)
+            next_window = (math.floor(now/self.period)+windows) * self.period
+            return next_window - now
+        return -self.tokens / self.rate
+
+    def get_state(self):
+        """Get the state of the bucket.
+
+        Returns
+        -------
+        dict
+            {"tokens": tokens, "timestamp": timestamp}
+        """
+        return {"tokens": self.tokens, "timestamp": self.timestamp}
+
+    def set_state(self, state):
+        """Restore the state of the bucket.
+
+        Parameters
+        ----------
+        state: dict
+            {"tokens": tokens, "timestamp": timestamp}
+        """
+        self.tokens = min(self.capacity, state["tokens"])
+        self.timestamp = state["timestamp"]
+
+
+class RateLimiter:
+    """Rate limiter of an API.
+
+    Parameters
+    ----------
+    api: str
+        The name of the API.
+    buckets: dict of TokenBucket, optional
+        {"name": TokenBucket} pairs. A call is permitted only when
+        all buckets have tokens.
+        Defaults to {}, i.e. no rate limit.
+    state_path: str, optional
+        Path to the file where the quota state is kept, so the quota
+        survives restarts and is shared by processes using the same file.
+        If None, the state is not saved.
+        Defaults to None.
+    save_interval: float, optional
+        Minimal time (seconds) between writes of the state file.
+        Tokens taken in between are only known to this process.
+        Defaults to 1.
+
+    Attributes
+    ----------
+    api: str
+        The name of the API.
+    buckets: dict of TokenBucket
+        {"name": TokenBucket} pairs.
+    state_path: str or None
+        Path to the file where the quota state is kept.
+    save_interval: float
+        Minimal time (seconds) between writes of the state file.
+
+    Note
+    ----
+    Call flush() before exiting, so the tokens taken since the last write
+    are saved.
+    """
+    def __init__(self, api, buckets={}, state_path=None, save_interval=1.):
+        """Constructor
+
+        Parameters
+        ----------
+        api: str
+            The name of the API.
+        buckets: dict of TokenBucket, optional
+            {"name": TokenBucket} pairs. A call is permitted only when
+            all buckets have tokens.
+            Defaults to {}, i.e. no rate limit.
+        state_path: str, optional
+            Path to the file where the quota state is kept, so the quota
+            survives restarts and is shared by processes using the same
+            file. If None, the state is not saved.
+            Defaults to None.
+        save_interval: float, optional
+            Minimal time (seconds) between writes of the state file.
+            Tokens taken in between are only known to this process.
+            Defaults to 1.
+        """
+        self.api = api
+        self.buckets = dict(buckets)
+        self.state_path = state_path
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        # Tokens taken from each bucket since the last write.
+        self._taken = {name: 0 for name in self.buckets}
+        self._saved_at = time.time()
+        self.load_state()
+
+    def reserve(self, tokens=1):
+        """Take tokens from all buckets.
+
+        Parameters
+        ----------
+        tokens: float, optional
+            Number of tokens to take.
+            Defaults to 1.
+
+        Returns
+        -------
+        delay: float
+            Time (seconds) to wait before the API can be called.
+        """
+        with self._lock:
+            now = time.time()
+            delay = 0.
+            for name, bucket in self.buckets.items():
+                delay = max(delay, bucket.reserve(tokens=tokens, now=now))
+                self._taken[name] += tokens
+            if now - self._saved_at >= self.save_interval:
+                self._save_state(now=now)
+        if delay > 60:
+            logger.info("{} quota exhausted, next API call at {}."
+                        "".format(self.api, time.ctime(now+delay)))
+        return delay
+
+    def acquire(self, tokens=1):
+        """Block until the API can be called.
+
+        Parameters
+        ----------
+        tokens: float, optional
+            Number of tokens to take.
+            Defaults to 1.
+        """
+        delay = self.reserve(tokens=tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, tokens=1):
+        """Wait asynchronously until the API can be called.
+
+        reserve() may write the state file, so it is run in the default
+        executor.
+
+        Parameters
+        ----------
+        tokens: float, optional
+            Number of tokens to take.
+            Defaults to 1.
+        """
+        delay = await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(self.reserve, tokens=tokens))
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def flush(self):
+        """Write the tokens taken since the last write to the state file."""
+        with self._lock:
+            self._save_state(now=time.time())
+
+    def load_state(self):
+        """Restore bucket states from self.state_path."""
+        if self.state_path is None or not os.path.exists(self.state_path):
+            return
+        with _lock_state(self.state_path):
+            with open(self.state_path, "r") as f:
+                state = json.load(f)
+        for name, bucket_state in state.get(self.api, {}).items():
+            if name in self.buckets:
+                self.buckets[name].set_state(bucket_state)
+
+    def save_state(self):
+        """Merge bucket states into self.state_path.
+
+        The stored states may have been changed by other processes, so the
+        tokens taken since the last write are taken from the stored states,
+        instead of overwriting them.
+        """
+        with self._lock:
+            self._save_state(now=time.time())
+
+    def _save_state(self, now):
+        """Merge bucket states. Must be called with self._lock held."""
+        self._saved_at = now
+        if self.state_path is None:
+            return
+        with _lock_state(self.state_path):
+            state = {}
+            if os.path.exists(self.state_path):
+                with open(self.state_path, "r") as f:
+                    state = json.load(f)
+            stored = state.get(self.api, {})
+            for name, bucket in self.buckets.items():
+                if name in stored:
+                    bucket.set_state(stored[name])
+                    bucket.refill(now=now)
+                    bucket.tokens -= self._taken[name]
+                self._taken[name] = 0
+            state[self.api] = {
+                name: bucket.get_state()
+                for name, bucket in self.buckets.items()
+            }
+            tmp_path = "{}.{}.tmp".format(self.state_path, os.getpid())
+            with open(tmp_path, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+
+
+def get_rate_limiters(api_config_path, api_list, state_path=None,
+                      api_call_interval=None):
+    """Make rate limiters from the API configuration file.
+
+    Parameters
+    ----------
+    api_config_path: str
+        Path to the API configuration file.
+        "API requests per minute" and "API requests per day" are read from
+        the section of each API.
+    api_list: list of str
+        List of APIs.
+    state_path: str, optional
+        Path to the file where the quota state is kept.
+        Defaults to None.
+    api_call_interval: float, optional
+        Minimal delay (seconds) between API calls, used for APIs without
+        limits in the API configuration file.
+        Defaults to None, i.e. no rate limit.
+
+    Returns
+    -------
+    rate_limiters: dict of RateLimiter
+        {"api": RateLimiter} pairs.
+    """
+    api_config = ConfigParser(allow_no_value=True)
+    api_config.optionxform = str
+    api_config.read(api_config_path)
+
+    rate_limiters = {}
+    for api in api_list:
+        buckets = {}
+        if api_config.has_section(api):
+            per_minute = api_config.getfloat(
+                api, "API requests per minute", fallback=None)
+            per_day = api_config.getfloat(
+                api, "API requests per day", fallback=None)
+            if per_minute:
+                buckets["minute"] = TokenBucket(
+                    capacity=1, period=60/per_minute)
+            if per_day:
+                buckets["day"] = TokenBucket(
+                    capacity=per_day, period=86400, aligned=True)
+        if not buckets and api_call_interval:
+            buckets["interval"] = TokenBucket(
+                capacity=1, period=api_call_interval)
+        rate_limiters[api] = RateLimiter(
+            api=api, buckets=buckets, state_path=state_path)
+    return rate_limiters
@@ -0,0 +1,216 @@
+"""Due-time scheduler for rolling database updates.
+"""
+import heapq
+import json
+import os
+import threading
+import time
+
+from stockdaq.logger import logger
+
+
+_state_lock = threading.Lock()
+
+
+class Scheduler:
+    """Scheduler of the next update time of each symbol.
+
+    Due times are kept in a heap, so the next due symbols are found
+    without scanning the whole stock list.
+
+    Parameters
+    ----------
+    symbols: list of str
+        The symbols to be scheduled.
+    frequency: str
+        "intraday", "daily", "weekly", "monthly".
+    interval: float
+        Default time (seconds) between updates of a symbol.
+    update_intervals: dict, optional
+        {"symbol": interval} pairs overriding the default interval.
+        Defaults to {}.
+    state_path: str, optional
+        Path to the file where the due times are kept, so the schedule
+        survives restarts. If None, the schedule is not saved.
+        Defaults to None.
+
+    Attributes
+    ----------
+    frequency: str
+        "intraday", "daily", "weekly", "monthly".
+    interval: float
+        Default time (seconds) between updates of a symbol.
+    update_intervals: dict
+        {"symbol": interval} pairs overriding the default interval.
+    state_path: str or None
+        Path to the file where the due times are kept.
+    due: dict
+        {"symbol": due time (seconds since the epoch)} pairs.
+    """
+    def __init__(self, symbols, frequency, interval, update_intervals={},
+                 state_path=None):
+        """Constructor
+
+        Parameters
+        ----------
+        symbols: list of str
+            The symbols to be scheduled.
+        frequency: str
+            "intraday", "daily", "weekly", "monthly".
+        interval: float
+            Default time (seconds) between updates of a symbol.
+        update_intervals: dict, optional
+            {"symbol": interval} pairs overriding the default interval.
+            Defaults to {}.
+        state_path: str, optional
+            Path to the file where the due times are kept, so the schedule
+            survives restarts. If None, the schedule is not saved.
+            Defaults to None.
+        """
+        if interval <= 0:
+            raise ValueError("interval must be positive.")
+        self.frequency = frequency
+        self.interval = interval
+        self.update_intervals = dict(update_intervals)
+        self.state_path = state_path
+        self.due = {}
+        self._heap = []
+        state = self.load_state()
+        now = time.time()
+        for symbol in symbols:
+            self.schedule(symbol=symbol, due=state.get(symbol, now))
+
+    def get_interval(self, symbol):
+        """Get the update interval of a symbol.
+
+        Parameters
+        ----------
+        symbol: str
+            The stock symbol.
+
+        Returns
+        -------
+        float
+            Time (seconds) between updates of the symbol.
+        """
+        return self.update_intervals.get(symbol, self.interval)
+
+    def schedule(self, symbol, due):
+        """Set the due time of a symbol.
+
+        Parameters
+        ----------
+        symbol: str
+            The stock symbol.
+        due: float
+            Due time (seconds since the epoch).
+        """
+        self.due[symbol] = due
+        heapq.heappush(self._heap, (due, symbol))
+        # Drop outdated heap entries so memory stays bounded.
+        if len(self._heap) > 2*len(self.due):
+            self._heap = [(due_, symbol_)
+                          for symbol_, due_ in self.due.items()]
+            heapq.heapify(self._heap)
+
+    def reschedule(self, symbols, now=None):
+        """Schedule the next update of symbols after their interval.
+
+        Parameters
+        ----------
+        symbols: list of str
+            The updated symbols.
+        now: float, optional
+            Time (seconds since the epoch) of the update.
+            Defaults to time.time().
+        """
+        if now is None:
+            now = time.time()
+        for symbol in symbols:
+            self.schedule(symbol=symbol, due=now+self.get_interval(symbol))
+        self.save_state()
+
+    def next_due(self):
+        """Get the earliest due time.
+
+        Returns
+        -------
+        float or None
+            Due time (seconds since the epoch).
+            None if nothing is scheduled.
+        """
+        while self._heap:
+            due, symbol = self._heap[0]
+            if self.due.get(symbol) == due:
+                return due
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_due(self, now=None):
+        """Take the symbols that are due.
+
+        Parameters
+        ----------
+        now: float, optional
+            Current time (seconds since the epoch).
+            Defaults to time.time().
+
+        Returns
+        -------
+        list of str
+            The due symbols, earliest first.
+        """
+        if now is None:
+            now = time.time()
+        symbols = []
+        while True:
+            due = self.next_due()
+            if due is None or due > now:
+                break
+            _, symbol = heapq.heappop(self._heap)
+            symbols.append(symbol)
+        return symbols
+
+    def wait(self):
+        """Sleep until the next symbol is due."""
+        due = self.next_due()
+        if due is None:
+            return
+        delay = due - time.time()
+        if delay > 0:
+            logger.info("Next update is scheduled at {}."
+                        "".format(time.ctime(due)))
+            time.sleep(delay)
+
+    def load_state(self):
+        """Read due times from self.state_path.
+
+        Returns
+        -------
+        dict
+            {"symbol": due time} pairs of self.frequency.
+        """
+        if self.state_path is None or not os.path.exists(self.state_path):
+            return {}
+        with _state_lock:
+            with open(self.state_path, "r") as f:
+                state = json.load(f)
+        return state.get(self.frequency, {})
+
+    def save_state(self):
+        """Write due times to self.state_path."""
+        if self.state_path is None:
+            return
+        with _state_lock:
+            state = {}
+            if os.path.exists(self.state_path):
+                with open(self.state_path, "r") as f:
+                    state = json.load(f)
+            state[self.frequency] = self.due
+            state_dir = os.path.dirname(self.state_path)
+            if state_dir and not os.path.isdir(state_dir):
+                os.makedirs(state_dir)
+            tmp_path = self.state_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
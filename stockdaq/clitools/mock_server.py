@@ -0,0 +1,61 @@
+import argparse
+
+
+def parser():
+    parser = argparse.ArgumentParser(
+        description="Run a local mock of the Alpha Vantage and Yahoo Finance"
+        " APIs. Use the \"Mock Alpha Vantage\" and \"Mock yfinance\" APIs to"
+        " acquire data from it.")
+    parser.add_argument(
+        "--host", type=str, help="Host of the server", default="127.0.0.1"
+    )
+    parser.add_argument(
+        "-p", "--port", type=int, help="Port of the server", default=8765
+    )
+    parser.add_argument(
+        "-l", "--latency", type=float,
+        help="Delay (seconds) before each response", default=0.
+    )
+    parser.add_argument(
+        "-j", "--latency-jitter", type=float,
+        help="Random extra delay (seconds) of each response", default=0.
+    )
+    parser.add_argument(
+        "-e", "--error-rate", type=float,
+        help="Fraction of requests answered with a server error", default=0.
+    )
+    parser.add_argument(
+        "-r", "--rate-limit", type=float,
+        help="Requests per minute allowed for each API", default=None
+    )
+    parser.add_argument(
+        "-m", "--missing", type=str, help="Symbols without data",
+        nargs="*", default=[]
+    )
+    parser.add_argument(
+        "-s", "--sample", type=str,
+        help="Path of the recorded Alpha Vantage intraday data", default=None
+    )
+    parser.add_argument(
+        "--seed", type=int, help="Seed of the random errors and latency",
+        default=None
+    )
+    return parser
+
+
+def main(args=None):
+    import stockdaq.data.mock_server
+
+    options = parser().parse_args(args)
+    server = stockdaq.data.mock_server.MockProviderServer(
+        host=options.host,
+        port=options.port,
+        latency=options.latency,
+        latency_jitter=options.latency_jitter,
+        error_rate=options.error_rate,
+        rate_limit=options.rate_limit,
+        missing_symbols=options.missing,
+        sample_path=options.sample,
+        seed=options.seed
+    )
+    server.serve_forever()
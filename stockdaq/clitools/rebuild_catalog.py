@@ -0,0 +1,39 @@
+import argparse
+
+
+def parser():
+    parser = argparse.ArgumentParser(
+        description="Rebuild the catalog of the data files of a stockdaq"
+        " database.")
+    parser.add_argument(
+        "root_dir", type=str, help="The root directory of the database"
+    )
+    parser.add_argument(
+        "-f", "--file-structure", type=str,
+        help="How the parent/child folders are set up",
+        nargs="*", default=["symbol", "frequency", "data"]
+    )
+    parser.add_argument(
+        "-p", "--path", type=str,
+        help="Path of the catalog, defaults to \".catalog.sqlite\" in"
+        " root_dir", default=None
+    )
+    return parser
+
+
+def main(args=None):
+    import os
+
+    import stockdaq.data.catalog
+
+    options = parser().parse_args(args)
+    path = options.path
+    if path is None:
+        path = os.path.join(options.root_dir, ".catalog.sqlite")
+    catalog = stockdaq.data.catalog.Catalog(
+        path=path,
+        root_dir=options.root_dir,
+        file_structure=options.file_structure
+    )
+    count = catalog.rebuild()
+    print("{} files in catalog {}".format(count, path))
@@ -18,6 +18,16 @@ def parser():
         "-ga", "--get-api-config", help="Get a sample API configuration file.",
         action="store_true"
     )
+    parser.add_argument(
+        "--resume", help="Continue the pending symbols of the latest"
+        " interrupted update.",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--retry-failed", help="Retry the failed symbols of the latest"
+        " update.",
+        action="store_true"
+    )
     return parser
 
 
@@ -31,6 +41,7 @@ def main(args=None):
             make_sample_api_config()
     else:
         import stockdaq.acquisiter.acquisiter
+        import stockdaq.acquisiter.async_acquisiter
         import stockdaq.utils.config
         import stockdaq.symbol
 
@@ -73,7 +84,88 @@ def main(args=None):
             "configuration", "Database rolling update interval (seconds)"
             )
 
-        ac = stockdaq.acquisiter.acquisiter.Acquisiter(
+        # Symbol groups refreshed at their own interval, e.g.
+        # "AAPL, TSLA = 3600".
+        update_intervals = {}
+        if config.has_section("update intervals (seconds)"):
+            for symbols, interval in config["update intervals (seconds)"].\
+                    items():
+                for symbol in stockdaq.utils.config.str2list(string=symbols):
+                    update_intervals[symbol] = float(interval)
+
+        parallel = config.getboolean(
+            "configuration", "parallel lanes", fallback=False
+            )
+
+        incremental = config.getboolean(
+            "configuration", "incremental", fallback=False
+            )
+
+        batch_size = config.getint(
+            "configuration", "batch size", fallback=1
+            )
+
+        session_kwargs = {
+            "pool_size": config.getint(
+                "configuration", "HTTP pool size", fallback=10
+                ),
+            "timeout": config.getfloat(
+                "configuration", "HTTP timeout (seconds)", fallback=30
+                ),
+            }
+
+        health_kwargs = {
+            "cooldown": config.getfloat(
+                "configuration", "API cooldown (seconds)", fallback=300
+                ),
+            "failure_threshold": config.getint(
+                "configuration", "API failure threshold", fallback=5
+                ),
+            "max_retries": config.getint(
+                "configuration", "API call retries", fallback=2
+                ),
+            }
+
+        response_cache_dir = config.get(
+            "configuration", "response cache directory", fallback=None
+            ) or None
+        response_cache_kwargs = {
+            "ttl": config.getfloat(
+                "configuration", "response cache TTL (seconds)",
+                fallback=86400
+                ),
+            "max_size": 1e6*config.getfloat(
+                "configuration", "response cache size (MB)", fallback=1000
+                ),
+            "offline": config.getboolean(
+                "configuration", "offline", fallback=False
+                ),
+            }
+
+        pipeline = config.getboolean(
+            "configuration", "pipeline", fallback=False
+            )
+        pipeline_kwargs = {
+            "write_workers": config.getint(
+                "configuration", "pipeline write workers", fallback=2
+                ),
+            "queue_size": config.getint(
+                "configuration", "pipeline queue size", fallback=16
+                ),
+            }
+
+        acquisiter_kwargs = {}
+        if config.getboolean(
+                "configuration", "async engine", fallback=False):
+            acquisiter_class = stockdaq.acquisiter.async_acquisiter.\
+                AsyncAcquisiter
+            acquisiter_kwargs["max_concurrency"] = config.getint(
+                "configuration", "max concurrency", fallback=100
+                )
+        else:
+            acquisiter_class = stockdaq.acquisiter.acquisiter.Acquisiter
+
+        ac = acquisiter_class(
             stocklist=stocklist,
             apikey_dict=apikey_dict,
             api_list=api_list,
@@ -83,7 +175,32 @@ def main(args=None):
             file_structure=file_structure,
             rolling=rolling,
             api_call_interval=api_call_interval,
-            database_update_interval=database_update_interval
+            database_update_interval=database_update_interval,
+            parallel=parallel,
+            pipeline=pipeline,
+            pipeline_kwargs=pipeline_kwargs,
+            incremental=incremental,
+            batch_size=batch_size,
+            session_kwargs=session_kwargs,
+            journal=config.getboolean(
+                "configuration", "journal", fallback=True
+                ),
+            journal_keep=config.getint(
+                "configuration", "journals kept", fallback=10
+                ),
+            catalog=config.getboolean(
+                "configuration", "catalog", fallback=False
+                ),
+            resume=options.resume,
+            update_intervals=update_intervals,
+            health_kwargs=health_kwargs,
+            response_cache_dir=response_cache_dir,
+            response_cache_kwargs=response_cache_kwargs,
+            timezone=config.get(
+                "configuration", "timezone", fallback=None
+                ) or None,
+            retry_failed=options.retry_failed,
+            **acquisiter_kwargs
             )
 
         download_kwargs = dict(config["download kwargs"])
@@ -119,6 +236,28 @@ def make_sample_config():
             "configuration", "Database rolling update interval (seconds)",
             "86400"
             )
+        config.set("configuration", "timezone", "")
+        config.set("configuration", "incremental", "False")
+        config.set("configuration", "journal", "True")
+        config.set("configuration", "journals kept", "10")
+        config.set("configuration", "catalog", "False")
+        config.set("configuration", "batch size", "1")
+        config.set("configuration", "HTTP pool size", "10")
+        config.set("configuration", "HTTP timeout (seconds)", "30")
+        config.set("configuration", "API call retries", "2")
+        config.set("configuration", "API failure threshold", "5")
+        config.set("configuration", "API cooldown (seconds)", "300")
+        config.set("configuration", "response cache directory", "")
+        config.set("configuration", "response cache TTL (seconds)", "86400")
+        config.set("configuration", "response cache size (MB)", "1000")
+        config.set("configuration", "offline", "False")
+        config.set("configuration", "parallel lanes", "False")
+        config.set("configuration", "pipeline", "False")
+        config.set("configuration", "pipeline write workers", "2")
+        config.set("configuration", "pipeline queue size", "16")
+        config.set("configuration", "async engine", "False")
+        config.set("configuration", "max concurrency", "100")
+        config.add_section("update intervals (seconds)")
         config.add_section("download kwargs")
         config.add_section("export kwargs")
         with open(path, "w") as f:
@@ -4,6 +4,23 @@
 
 
 columns = ["open", "high", "low", "close", "volume"]
+# dtypes of stockdaq.data.data.Data columns.
+data_dtypes = {
+    "open": "float64",
+    "high": "float64",
+    "low": "float64",
+    "close": "float64",
+    "volume": "int64",
+}
+
+# Half the memory of the prices, with about 7 significant digits.
+compact_dtypes = {
+    "open": "float32",
+    "high": "float32",
+    "low": "float32",
+    "close": "float32",
+    "volume": "int64",
+}
 
 # downloader_dict = {
 #     "Alpha Vantage": av_downloader.AlphaVantageDownloader,
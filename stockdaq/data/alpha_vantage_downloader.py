@@ -1,15 +1,86 @@
 """Alpha Vantage downloader
 """
+import datetime
 
 import alpha_vantage.timeseries
 import numpy as np
-import pandas as pd
 
-import stockdaq.constants
 import stockdaq.data.downloader
 import stockdaq.data.manager
 
 
+class SessionTimeSeries(alpha_vantage.timeseries.TimeSeries):
+    """Alpha Vantage timeseries making API calls with a HTTP session.
+
+    Parameters
+    ----------
+    *args:
+        Arguments passed to alpha_vantage.timeseries.TimeSeries.
+    session: requests.Session, optional
+        The session used for API calls.
+        Defaults to None, i.e. a new connection for each call.
+    **kwargs:
+        Keyword arguments passed to alpha_vantage.timeseries.TimeSeries.
+
+    Attributes
+    ----------
+    session: requests.Session or None
+        The session used for API calls.
+    """
+    def __init__(self, *args, session=None, **kwargs):
+        """Constructor
+
+        Parameters
+        ----------
+        *args:
+            Arguments passed to alpha_vantage.timeseries.TimeSeries.
+        session: requests.Session, optional
+            The session used for API calls.
+            Defaults to None, i.e. a new connection for each call.
+        **kwargs:
+            Keyword arguments passed to
+            alpha_vantage.timeseries.TimeSeries.
+        """
+        super().__init__(*args, **kwargs)
+        self.session = session
+
+    def _handle_api_call(self, url):
+        """Call the API with self.session and return the json response.
+
+        Raises ValueError on problems, like
+        alpha_vantage.alphavantage.AlphaVantage._handle_api_call.
+
+        Parameters
+        ----------
+        url: str
+            The url of the service.
+
+        Returns
+        -------
+        dict
+            The json response.
+        """
+        if self.session is None or not any(
+                output_format in self.output_format.lower()
+                for output_format in ["json", "pandas"]):
+            return super()._handle_api_call(url)
+        response = self.session.get(
+            url, proxies=self.proxy, headers=self.headers)
+        if response.status_code >= 500:
+            response.raise_for_status()
+        json_response = response.json()
+        if not json_response:
+            raise ValueError(
+                "Error getting data from the api, no return was given.")
+        elif "Error Message" in json_response:
+            raise ValueError(json_response["Error Message"])
+        elif "Information" in json_response and self.treat_info_as_error:
+            raise ValueError(json_response["Information"])
+        elif "Note" in json_response and self.treat_info_as_error:
+            raise ValueError(json_response["Note"])
+        return json_response
+
+
 class AlphaVantageDownloader(stockdaq.data.downloader.Downloader):
     """Downloader using Alpha Vantage API
 
@@ -20,6 +91,9 @@ class AlphaVantageDownloader(stockdaq.data.downloader.Downloader):
     output_format: str, optional
         The output_format of the getters.
         Only "pandas" avilable now.
+    session: requests.Session, optional
+        The HTTP session used for API calls.
+        Defaults to None.
 
     Attributes
     ----------
@@ -28,12 +102,28 @@ class AlphaVantageDownloader(stockdaq.data.downloader.Downloader):
     output_format: str, optional
         The output_format of the getters.
         Only "pandas" avilable now.
-    ts: alpha_vantage.timeseries.TimeSeries
+    ts: SessionTimeSeries
         The Alpha Vantage timeseries instance for getting data.
     dataframe: pandas.core.frame.DataFrame
         The obtained data. Update using getters.
+    compact_size: int
+        Number of data points returned with outputsize="compact".
+    column_map: dict
+        {"Alpha Vantage column": "stockdaq column"} pairs.
+    source_timezone: str
+        Timezone of the Alpha Vantage timestamps, "US/Eastern".
     """
-    def __init__(self, apikey, output_format="pandas"):
+    compact_size = 100
+    column_map = {
+        "1. open": "open",
+        "2. high": "high",
+        "3. low": "low",
+        "4. close": "close",
+        "5. volume": "volume",
+    }
+    source_timezone = "US/Eastern"
+
+    def __init__(self, apikey, output_format="pandas", session=None):
         """Constructor
 
         Parameters
@@ -43,16 +133,32 @@ class AlphaVantageDownloader(stockdaq.data.downloader.Downloader):
         output_format: str, optional
             The output_format of the getters.
             Only "pandas" avilable now.
+        session: requests.Session, optional
+            The HTTP session used for API calls.
+            Defaults to None.
         """
         super().__init__(
             api="Alpha Vantage")
         self.apikey = apikey
         self.output_format = output_format
-        self.ts = alpha_vantage.timeseries.TimeSeries(
+        self.ts = SessionTimeSeries(
             key=self.apikey, output_format=self.output_format)
+        self.set_session(session)
+
+    def set_session(self, session):
+        """Use a HTTP session for API calls.
+
+        Parameters
+        ----------
+        session: requests.Session
+            The session, e.g. from make_session().
+        """
+        super().set_session(session)
+        self.ts.session = session
 
-    def download(self, symbol, frequency="intraday", **kwargs):
-        """Get data from API
+    def fetch_api(self, symbol, frequency="intraday", since=None,
+                  **kwargs):
+        """Get raw data from API, set self.rawdata
 
         Parameters
         ----------
@@ -60,19 +166,73 @@ class AlphaVantageDownloader(stockdaq.data.downloader.Downloader):
             Stock symbol
         frequency: str, optional
             "intraday", "daily", "weekly", "monthly".
+        since: datetime.datetime, optional
+            Only data newer than this are needed.
+            If the data since then fit in a compact output,
+            outputsize defaults to "compact".
+            Defaults to None.
         **kwargs:
-            Keyword arguments passed to the getter methods.
+            Keyword arguments passed to the
+            alpha_vantage.timeseries.TimeSeries getter methods.
+            "interval" defaults to "1min" and "outputsize" defaults
+            to "full".
+
+        Returns
+        -------
+        pandas.core.frame.DataFrame
+            The raw data.
         """
         if frequency == "intraday":
-            self.get_intraday(symbol=symbol, **kwargs)
+            kwargs = dict({"interval": "1min"}, **kwargs)
+            if "outputsize" not in kwargs:
+                kwargs["outputsize"] = self.get_outputsize(
+                    since=since, frequency=frequency,
+                    interval=kwargs["interval"])
+            self.rawdata, _ = self.ts.get_intraday(symbol=symbol, **kwargs)
         elif frequency == "daily":
-            self.get_daily(symbol=symbol, **kwargs)
+            if "outputsize" not in kwargs:
+                kwargs["outputsize"] = self.get_outputsize(
+                    since=since, frequency=frequency)
+            self.rawdata, _ = self.ts.get_daily(symbol=symbol, **kwargs)
         elif frequency == "weekly":
-            self.get_weekly(symbol=symbol)
+            self.rawdata, _ = self.ts.get_weekly(symbol=symbol)
         elif frequency == "monthly":
-            self.get_monthly(symbol=symbol)
+            self.rawdata, _ = self.ts.get_monthly(symbol=symbol)
         else:
             raise ValueError("{} frequency not available.".format(frequency))
+        return self.rawdata
+
+    def get_outputsize(self, since=None, frequency="intraday",
+                       interval="1min"):
+        """Get the smallest outputsize covering the data since a time.
+
+        Parameters
+        ----------
+        since: datetime.datetime, optional
+            Only data newer than this are needed.
+            Defaults to None, i.e. all data are needed.
+        frequency: str, optional
+            "intraday" or "daily".
+        interval: str, optional
+            Interval between intraday data.
+            Defaults to "1min".
+
+        Returns
+        -------
+        str
+            "compact" or "full".
+        """
+        if since is None:
+            return "full"
+        now = datetime.datetime.now()
+        if frequency == "intraday":
+            minutes = int(interval.rstrip("min"))
+            npoints = (now-since).total_seconds() / 60 / minutes
+        else:
+            npoints = np.busday_count(since.date(), now.date())
+        if npoints < self.compact_size:
+            return "compact"
+        return "full"
 
     def get_intraday(self, symbol, interval="1min", outputsize="full"):
         """Get intraday data, set self.dataframe
@@ -96,8 +256,9 @@ class AlphaVantageDownloader(stockdaq.data.downloader.Downloader):
         pandas.core.frame.DataFrame
             The intraday data.
         """
-        self.rawdata, _ = self.ts.get_intraday(
-            symbol=symbol, interval=interval, outputsize=outputsize)
+        self.fetch(
+            symbol=symbol, frequency="intraday", interval=interval,
+            outputsize=outputsize)
         self.dataframe = self.formatter(datadump=self.rawdata)
         return self.dataframe
 
@@ -119,8 +280,7 @@ class AlphaVantageDownloader(stockdaq.data.downloader.Downloader):
         pandas.core.frame.DataFrame
             The daily data.
         """
-        self.rawdata, _ = self.ts.get_daily(
-            symbol=symbol, outputsize=outputsize)
+        self.fetch(symbol=symbol, frequency="daily", outputsize=outputsize)
         self.dataframe = self.formatter(datadump=self.rawdata)
         return self.dataframe
 
@@ -137,8 +297,7 @@ class AlphaVantageDownloader(stockdaq.data.downloader.Downloader):
         pandas.core.frame.DataFrame
             The weekly data.
         """
-        self.rawdata, _ = self.ts.get_weekly(
-            symbol=symbol)
+        self.fetch(symbol=symbol, frequency="weekly")
         self.dataframe = self.formatter(datadump=self.rawdata)
         return self.dataframe
 
@@ -155,42 +314,6 @@ class AlphaVantageDownloader(stockdaq.data.downloader.Downloader):
         pandas.core.frame.DataFrame
             The weekly data.
         """
-        self.rawdata, _ = self.ts.get_monthly(
-            symbol=symbol)
+        self.fetch(symbol=symbol, frequency="monthly")
         self.dataframe = self.formatter(datadump=self.rawdata)
         return self.dataframe
-
-    def formatter(self, datadump):
-        """Convert Alpha Vantage dataframe to standard stockdaq format
-
-        Parameters
-        ----------
-        datadump: pandas.core.frame.DataFrame
-            Dataframe from Alpha Vantage.
-
-        Returns
-        -------
-        dataframe: pandas.core.frame.DataFrame
-            Formated dataframe.
-        """
-        # Sort by ascending datetime
-        dataframe = datadump.sort_index()
-
-        # Remove timezone
-        dt = []
-        for i in range(len(dataframe.index)):
-            dt.append(dataframe.index[i].replace(tzinfo=None))
-        dt = pd.DatetimeIndex(dt)
-
-        open_ = dataframe["1. open"].values
-        high = dataframe["2. high"].values
-        low = dataframe["3. low"].values
-        close = dataframe["4. close"].values
-        volume = dataframe["5. volume"].values
-
-        dataframe = pd.DataFrame(
-            data=np.array([open_, high, low, close, volume]).T,
-            columns=stockdaq.constants.columns,
-            index=dt)
-
-        return dataframe
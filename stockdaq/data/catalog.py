@@ -0,0 +1,407 @@
+"""Catalog of the data files in the stockdaq database.
+
+The catalog is a SQLite database with one row per data file: symbol,
+frequency, partition key, path, first and last timestamps, number of rows,
+size and modification time. It is updated on every write, so the contents
+of the database can be found by index lookups instead of listing
+directories and opening files. Checksums, which read the whole file, are
+only computed by Catalog.rebuild().
+"""
+import contextlib
+import hashlib
+import os
+import sqlite3
+
+import pandas as pd
+
+import stockdaq.data.data
+from stockdaq.logger import logger
+
+
+schema = """
+CREATE TABLE IF NOT EXISTS partitions (
+    path TEXT PRIMARY KEY,
+    symbol TEXT NOT NULL,
+    frequency TEXT NOT NULL,
+    partition TEXT NOT NULL,
+    format TEXT NOT NULL,
+    start_time INTEGER,
+    end_time INTEGER,
+    rows INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime INTEGER NOT NULL,
+    checksum TEXT
+);
+CREATE INDEX IF NOT EXISTS partitions_range
+    ON partitions (symbol, frequency, start_time);
+"""
+
+
+def get_checksum(path, chunk_size=1 << 20):
+    """Get the SHA-256 checksum of a file.
+
+    Parameters
+    ----------
+    path: str
+        The path of the file.
+    chunk_size: int, optional
+        Number of bytes read at a time.
+        Defaults to 1 MiB.
+
+    Returns
+    -------
+    str
+        The hex digest.
+    """
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class Catalog:
+    """SQLite catalog of the data files of a stockdaq database.
+
+    Parameters
+    ----------
+    path: str
+        Path of the SQLite file.
+    root_dir: str, optional
+        The root directory of the database.
+        Defaults to "./".
+    file_structure: list of str, optional
+        How the parent/child folders are set up.
+        Defaults to ["symbol", "frequency", "data"].
+    timeout: float, optional
+        Time (seconds) to wait for other writers.
+        Defaults to 30.
+
+    Attributes
+    ----------
+    path: str
+        Path of the SQLite file.
+    root_dir: str
+        The root directory of the database.
+    file_structure: list of str
+        How the parent/child folders are set up.
+    timeout: float
+        Time (seconds) to wait for other writers.
+    """
+    def __init__(self, path, root_dir="./",
+                 file_structure=["symbol", "frequency", "data"], timeout=30):
+        """Constructor
+
+        Parameters
+        ----------
+        path: str
+            Path of the SQLite file.
+        root_dir: str, optional
+            The root directory of the database.
+            Defaults to "./".
+        file_structure: list of str, optional
+            How the parent/child folders are set up.
+            Defaults to ["symbol", "frequency", "data"].
+        timeout: float, optional
+            Time (seconds) to wait for other writers.
+            Defaults to 30.
+        """
+        self.path = path
+        self.root_dir = root_dir
+        self.file_structure = file_structure
+        self.timeout = timeout
+        catalog_dir = os.path.dirname(path)
+        if catalog_dir and not os.path.isdir(catalog_dir):
+            os.makedirs(catalog_dir, exist_ok=True)
+        with self.connect() as connection:
+            connection.executescript(schema)
+
+    @contextlib.contextmanager
+    def connect(self):
+        """Context manager of a transaction.
+
+        The transaction is committed on success and rolled back on error.
+
+        Yields
+        ------
+        sqlite3.Connection
+            The connection.
+        """
+        connection = sqlite3.connect(self.path, timeout=self.timeout)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def parse_path(self, path):
+        """Get the symbol, frequency and partition key of a data file.
+
+        Parameters
+        ----------
+        path: str
+            The path of the file.
+
+        Returns
+        -------
+        symbol: str or None
+            The stock symbol.
+        frequency: str or None
+            The frequency.
+        partition: str
+            The partition key, i.e. the filename without extension.
+        relpath: str
+            The path relative to self.root_dir.
+        """
+        relpath = os.path.relpath(path, self.root_dir)
+        folders = relpath.split(os.sep)[:-1]
+        symbol = frequency = None
+        for folder, name in zip(self.file_structure, folders):
+            if folder == "symbol":
+                symbol = name
+            elif folder == "frequency":
+                frequency = name
+        partition = os.path.splitext(os.path.basename(path))[0]
+        return symbol, frequency, partition, relpath
+
+    def get_entry(self, path, format=None, checksum=False):
+        """Get the catalog entry of a data file.
+
+        Parameters
+        ----------
+        path: str
+            The path of the file.
+        format: str, optional
+            The format of the file.
+            Defaults to None, i.e. from the extension, and "hdf5-table"
+            for HDF5 tables.
+        checksum: boolean, optional
+            Compute the checksum of the file.
+            Defaults to False.
+
+        Returns
+        -------
+        tuple
+            The values of the row of the file.
+        """
+        symbol, frequency, partition, relpath = self.parse_path(path)
+        if symbol is None or frequency is None:
+            raise ValueError("{} is not in the database.".format(path))
+        if format is None:
+            format = stockdaq.data.data.get_format(path)
+            if format == "hdf5" and stockdaq.data.data.is_table(path):
+                format = "hdf5-table"
+        first, last = stockdaq.data.data.get_index_bounds(path)
+        rows = stockdaq.data.data.get_num_rows(path)
+        stat = os.stat(path)
+        return (
+            relpath, symbol, frequency, partition, format,
+            None if first is None else first.value,
+            None if last is None else last.value,
+            int(rows), stat.st_size, stat.st_mtime_ns,
+            get_checksum(path) if checksum else None)
+
+    def record(self, path, format=None):
+        """Add or update the entry of a data file.
+
+        Only the index bounds and the number of rows are read, so an
+        append does not read the whole file again.
+
+        Parameters
+        ----------
+        path: str
+            The path of the file.
+        format: str, optional
+            The format of the file.
+            Defaults to None, i.e. from the extension, and "hdf5-table"
+            for HDF5 tables.
+        """
+        entry = self.get_entry(path=path, format=format)
+        with self.connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO partitions VALUES "
+                "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", entry)
+
+    def remove(self, path):
+        """Remove the entry of a data file.
+
+        Parameters
+        ----------
+        path: str
+            The path of the file.
+        """
+        relpath = os.path.relpath(path, self.root_dir)
+        with self.connect() as connection:
+            connection.execute(
+                "DELETE FROM partitions WHERE path = ?", (relpath,))
+
+    def rebuild(self):
+        """Recreate the catalog from the files in self.root_dir.
+
+        The checksums of the files are computed. The catalog is replaced
+        in one transaction, so readers never see a partial catalog.
+
+        Returns
+        -------
+        int
+            Number of files in the catalog.
+        """
+        formats = list(stockdaq.data.data.extensions.values())
+        paths = []
+        for directory, folders, filenames in os.walk(self.root_dir):
+            # Skip hidden directories, e.g. the journal.
+            folders[:] = [
+                folder for folder in folders if not folder.startswith(".")]
+            for filename in filenames:
+                if os.path.splitext(filename)[1] not in formats:
+                    continue
+                path = os.path.join(directory, filename)
+                symbol, frequency, _, _ = self.parse_path(path)
+                if symbol is not None and frequency is not None:
+                    paths.append(path)
+        with self.connect() as connection:
+            formats = dict(connection.execute(
+                "SELECT path, format FROM partitions").fetchall())
+        entries = []
+        for path in paths:
+            relpath = os.path.relpath(path, self.root_dir)
+            try:
+                entries.append(self.get_entry(
+                    path=path, format=formats.get(relpath), checksum=True))
+            except (OSError, ValueError, KeyError) as err:
+                logger.warning("Skipping {}: {!r}".format(path, err))
+        with self.connect() as connection:
+            connection.execute("DELETE FROM partitions")
+            connection.executemany(
+                "INSERT INTO partitions VALUES "
+                "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", entries)
+        logger.info("Catalog {} rebuilt.".format(self.path))
+        return self.count()
+
+    def count(self):
+        """Number of files in the catalog.
+
+        Returns
+        -------
+        int
+            Number of files.
+        """
+        with self.connect() as connection:
+            return connection.execute(
+                "SELECT COUNT(*) FROM partitions").fetchone()[0]
+
+    def get_symbols(self, frequency):
+        """Get the symbols with data of a frequency.
+
+        Parameters
+        ----------
+        frequency: str
+            "intraday", "daily", "weekly", "monthly".
+
+        Returns
+        -------
+        list of str
+            The symbols, sorted.
+        """
+        with self.connect() as connection:
+            rows = connection.execute(
+                "SELECT DISTINCT symbol FROM partitions WHERE frequency = ? "
+                "ORDER BY symbol", (frequency,)).fetchall()
+        return [row[0] for row in rows]
+
+    def query(self, symbol, frequency, start=None, end=None):
+        """Get the files overlapping a time range.
+
+        Parameters
+        ----------
+        symbol: str
+            The stock symbol.
+        frequency: str
+            "intraday", "daily", "weekly", "monthly".
+        start: datetime.datetime, optional
+            Start time, inclusive.
+            Defaults to None.
+        end: datetime.datetime, optional
+            End time, exclusive.
+            Defaults to None.
+
+        Returns
+        -------
+        pandas.core.frame.DataFrame
+            "path", "partition", "format", "start" (first timestamp),
+            "end" (last timestamp), "rows", "size", "mtime" (nanoseconds)
+            and "checksum" of the files, in time order. Paths are joined
+            with self.root_dir.
+        """
+        sql = ("SELECT path, partition, format, start_time, end_time, rows, "
+               "size, mtime, checksum FROM partitions "
+               "WHERE symbol = ? AND frequency = ?")
+        parameters = [symbol, frequency]
+        if start is not None:
+            sql += " AND end_time >= ?"
+            parameters.append(pd.Timestamp(start).value)
+        if end is not None:
+            sql += " AND start_time < ?"
+            parameters.append(pd.Timestamp(end).value)
+        sql += " ORDER BY start_time"
+        with self.connect() as connection:
+            rows = connection.execute(sql, parameters).fetchall()
+        entries = pd.DataFrame(rows, columns=[
+            "path", "partition", "format", "start", "end", "rows", "size",
+            "mtime", "checksum"])
+        entries["path"] = [
+            os.path.join(self.root_dir, path) for path in entries["path"]]
+        entries["start"] = pd.to_datetime(entries["start"])
+        entries["end"] = pd.to_datetime(entries["end"])
+        return entries
+
+    def get_latest_timestamp(self, symbol, frequency):
+        """Get the newest timestamp stored of a symbol.
+
+        Parameters
+        ----------
+        symbol: str
+            The stock symbol.
+        frequency: str
+            "intraday", "daily", "weekly", "monthly".
+
+        Returns
+        -------
+        datetime.datetime or None
+            The newest timestamp. None if there is no data.
+        """
+        with self.connect() as connection:
+            last = connection.execute(
+                "SELECT MAX(end_time) FROM partitions WHERE symbol = ? "
+                "AND frequency = ?", (symbol, frequency)).fetchone()[0]
+        if last is None:
+            return None
+        return pd.Timestamp(last).to_pydatetime()
+
+    def find_gaps(self, symbol, frequency, max_gap):
+        """Find gaps longer than max_gap between stored files.
+
+        Parameters
+        ----------
+        symbol: str
+            The stock symbol.
+        frequency: str
+            "intraday", "daily", "weekly", "monthly".
+        max_gap: datetime.timedelta
+            The longest time allowed between consecutive files.
+
+        Returns
+        -------
+        list of tuple
+            (end of the data before the gap, start of the data after the
+            gap) pairs of pandas.Timestamp.
+        """
+        entries = self.query(symbol=symbol, frequency=frequency)
+        entries = entries.dropna(subset=["start", "end"])
+        gaps = []
+        ends = entries["end"].to_list()
+        starts = entries["start"].to_list()
+        for last, first in zip(ends[:-1], starts[1:]):
+            if first - last > pd.Timedelta(max_gap):
+                gaps.append((last, first))
+        return gaps
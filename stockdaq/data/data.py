@@ -1,20 +1,426 @@
 """Base data class
 """
 import os
+import threading
 
 import numpy as np
 import pandas as pd
 
 import stockdaq.constants
 import stockdaq.data.data
+import stockdaq.data.memmap
 from stockdaq.logger import logger
 
 
 header = stockdaq.constants.columns
 
+# PyTables is not thread-safe, HDF5 file access is serialized.
+hdf5_lock = threading.RLock()
+
+# {"format": "extension"} pairs of the file formats.
+extensions = {
+    "hdf5": ".h5",
+    "hdf5-table": ".h5",
+    "parquet": ".parquet",
+    "memmap": ".mmap",
+    "csv": ".csv",
+}
+
+# Name of the datetime column of parquet files.
+parquet_index = "datetime"
+
+
+def get_format(path):
+    """Get the format of a data file from its extension.
+
+    Parameters
+    ----------
+    path: str
+        The path of the file.
+
+    Returns
+    -------
+    str
+        "parquet", "memmap" or "csv", "hdf5" for other extensions.
+    """
+    extension = os.path.splitext(path)[1]
+    for format in ["parquet", "memmap", "csv"]:
+        if extension == extensions[format]:
+            return format
+    return "hdf5"
+
+
+def get_index_bounds(path):
+    """Read the first and last timestamps of a data file.
+
+    Only the ends of the stored index of hdf5 and memmap files, or the
+    statistics of the datetime column of parquet files, are read.
+
+    Parameters
+    ----------
+    path: str
+        The path of the file.
+
+    Returns
+    -------
+    first: pandas.Timestamp or None
+        The first timestamp. None if the file has no data.
+    last: pandas.Timestamp or None
+        The last timestamp. None if the file has no data.
+    """
+    if get_format(path) == "parquet":
+        return get_parquet_bounds(path)
+    elif get_format(path) == "memmap":
+        return stockdaq.data.memmap.get_index_bounds(path)
+    elif get_format(path) == "csv":
+        index = pd.DatetimeIndex(pd.read_csv(path, index_col=0).index)
+        if len(index) == 0:
+            return None, None
+        return index.min(), index.max()
+    with hdf5_lock:
+        with pd.HDFStore(path, mode="r") as store:
+            storer = store.get_storer("stockdaq")
+            if storer.is_table:
+                if storer.nrows == 0:
+                    return None, None
+                first = store.select_column(
+                    "stockdaq", "index", start=0, stop=1).iloc[0]
+                last = store.select_column(
+                    "stockdaq", "index", start=storer.nrows-1).iloc[0]
+                return first, last
+            node = store.get_node("stockdaq/axis1")
+            kind = str(node.attrs.kind)
+            if not kind.startswith("datetime64") or len(node) == 0:
+                index = store.select("stockdaq").index
+                if len(index) == 0:
+                    return None, None
+                return index.min(), index.max()
+            # e.g. "datetime64[us]", nanoseconds if the unit is not stored.
+            unit = kind[len("datetime64["):-1] or "ns"
+            first = pd.Timestamp(np.datetime64(int(node[0]), unit))
+            last = pd.Timestamp(np.datetime64(int(node[-1]), unit))
+            return first, last
+
+
+def get_num_rows(path):
+    """Read the number of rows of a data file.
+
+    Parameters
+    ----------
+    path: str
+        The path of the file.
+
+    Returns
+    -------
+    int
+        Number of rows.
+    """
+    format = get_format(path)
+    if format == "parquet":
+        import pyarrow.parquet  # Only needed for parquet files.
+        return pyarrow.parquet.ParquetFile(path).metadata.num_rows
+    elif format == "memmap":
+        return stockdaq.data.memmap.read_header(path)["rows"]
+    elif format == "csv":
+        return len(pd.read_csv(path, index_col=0).index)
+    with hdf5_lock:
+        with pd.HDFStore(path, mode="r") as store:
+            storer = store.get_storer("stockdaq")
+            if storer.is_table:
+                return int(storer.nrows)
+            return len(store.get_node("stockdaq/axis1"))
+
+
+def get_parquet_bounds(path):
+    """Read the first and last timestamps of a parquet file.
+
+    Parameters
+    ----------
+    path: str
+        The path of the file.
+
+    Returns
+    -------
+    first: pandas.Timestamp or None
+        The first timestamp. None if the file has no data.
+    last: pandas.Timestamp or None
+        The last timestamp. None if the file has no data.
+    """
+    import pyarrow.parquet  # Only needed for parquet files.
+    metadata = pyarrow.parquet.ParquetFile(path).metadata
+    if metadata.num_rows == 0:
+        return None, None
+    column = metadata.schema.names.index(parquet_index)
+    minimums = []
+    maximums = []
+    for i in range(metadata.num_row_groups):
+        statistics = metadata.row_group(i).column(column).statistics
+        if statistics is None or not statistics.has_min_max:
+            index = read_parquet(path, columns=[]).index
+            return index.min(), index.max()
+        minimums.append(statistics.min)
+        maximums.append(statistics.max)
+    return pd.Timestamp(min(minimums)), pd.Timestamp(max(maximums))
+
+
+def read_parquet(path, columns=None, start=None, end=None):
+    """Read a parquet file or a directory of parquet files.
+
+    Only the requested columns are decoded, and row groups outside the
+    time range are skipped using their statistics.
+
+    Parameters
+    ----------
+    path: str
+        The path of the file, or of a directory of files, e.g. the
+        partitions of a symbol and frequency.
+    columns: list of str, optional
+        The columns to be read.
+        Defaults to None, i.e. all columns.
+    start: datetime.datetime, optional
+        Only read data at or after this time.
+        Defaults to None.
+    end: datetime.datetime, optional
+        Only read data before this time.
+        Defaults to None.
+
+    Returns
+    -------
+    pandas.core.frame.DataFrame
+        The data, sorted.
+    """
+    filters = []
+    if start is not None:
+        filters.append((parquet_index, ">=", pd.Timestamp(start)))
+    if end is not None:
+        filters.append((parquet_index, "<", pd.Timestamp(end)))
+    dataframe = pd.read_parquet(
+        path, columns=columns, filters=filters or None)
+    dataframe.index.name = None
+    if not dataframe.index.is_monotonic_increasing:
+        dataframe = dataframe.sort_index()
+    return dataframe
+
+
+def get_where(start=None, end=None):
+    """Get the PyTables query of a time range.
+
+    Parameters
+    ----------
+    start: datetime.datetime, optional
+        Start time, inclusive.
+        Defaults to None.
+    end: datetime.datetime, optional
+        End time, exclusive.
+        Defaults to None.
+
+    Returns
+    -------
+    list of str or None
+        The query conditions, None if no range is given.
+    """
+    where = []
+    if start is not None:
+        where.append("index>={!r}".format(str(pd.Timestamp(start))))
+    if end is not None:
+        where.append("index<{!r}".format(str(pd.Timestamp(end))))
+    return where or None
+
+
+def get_mask(index, start=None, end=None):
+    """Get the boolean mask of a time range.
+
+    Parameters
+    ----------
+    index: pandas.core.indexes.datetimes.DatetimeIndex
+        Date and time.
+    start: datetime.datetime, optional
+        Start time, inclusive.
+        Defaults to None.
+    end: datetime.datetime, optional
+        End time, exclusive.
+        Defaults to None.
+
+    Returns
+    -------
+    numpy.ndarray
+        True for the rows in the range.
+    """
+    index = pd.DatetimeIndex(index)
+    mask = np.ones(len(index), dtype=bool)
+    if start is not None:
+        mask &= index >= pd.Timestamp(start)
+    if end is not None:
+        mask &= index < pd.Timestamp(end)
+    return mask
+
+
+def read_dataframe(path, format=None, columns=None, start=None, end=None):
+    """Read a stockdaq data file.
+
+    Parameters
+    ----------
+    path: str
+        The path of the file to be read.
+        A directory is read as one parquet dataset.
+    format: str, optional
+        The format of the file.
+        Defaults to None, i.e. from the extension, see get_format().
+        Options are ["hdf5", "hdf5-table", "parquet", "memmap", "csv"]
+    columns: list of str, optional
+        Only read these columns, e.g. ["close"].
+        Defaults to None, i.e. all columns.
+    start: datetime.datetime, optional
+        Only read data at or after this time.
+        Defaults to None.
+    end: datetime.datetime, optional
+        Only read data before this time.
+        Defaults to None.
+
+    Returns
+    -------
+    pandas.core.frame.DataFrame
+        The data.
+
+    Note
+    ----
+    The time range selection of tables is done by PyTables using the
+    index of the datetime column, of parquet files by skipping row
+    groups and of memmap files by binary search. Other files are read
+    in full and then sliced. Only the selected columns of parquet and
+    memmap files are decoded.
+    """
+    if format is None:
+        format = "parquet" if os.path.isdir(path) else get_format(path)
+    if format in ["hdf5", "hdf5-table"]:
+        with hdf5_lock:
+            with pd.HDFStore(path, mode="r") as store:
+                if store.get_storer("stockdaq").is_table:
+                    where = get_where(start=start, end=end)
+                    dataframe = store.select(
+                        "stockdaq", where=where, columns=columns)
+                    start = end = None
+                else:
+                    dataframe = store.select("stockdaq")
+                    if columns is not None:
+                        dataframe = dataframe[columns]
+    elif format == "parquet":
+        dataframe = read_parquet(
+            path, columns=columns, start=start, end=end)
+        start = end = None
+    elif format == "memmap":
+        dataframe = stockdaq.data.memmap.read_dataframe(
+            path, columns=columns, start=start, end=end)
+        start = end = None
+    elif format == "csv":
+        dataframe = pd.read_csv(path, index_col=0)
+        if columns is not None:
+            dataframe = dataframe[columns]
+    else:
+        raise ValueError("{} format not available".format(format))
+    if start is not None or end is not None:
+        dataframe = dataframe.loc[
+            get_mask(dataframe.index, start=start, end=end)]
+    return dataframe
+
+
+def as_dtype(array, dtype):
+    """Convert an array to a dtype, without copying if it already has it.
+
+    Float arrays with NaN, infinity or fractions are not converted to
+    integers.
+
+    Parameters
+    ----------
+    array: array
+        The array.
+    dtype: str or numpy.dtype
+        The dtype.
+
+    Returns
+    -------
+    numpy.ndarray
+        The converted array.
+    """
+    array = np.asarray(array)
+    dtype = np.dtype(dtype)
+    if array.dtype == dtype:
+        return array
+    if dtype.kind in "iu" and array.dtype.kind == "f":
+        if not (np.isfinite(array).all() and (array % 1 == 0).all()):
+            return array
+    return array.astype(dtype)
+
+
+def is_table(path):
+    """Check if a hdf5 data file is a table.
+
+    Parameters
+    ----------
+    path: str
+        The path of the file.
+
+    Returns
+    -------
+    boolean
+        True if the file is an appendable table.
+    """
+    with hdf5_lock:
+        with pd.HDFStore(path, mode="r") as store:
+            return bool(store.get_storer("stockdaq").is_table)
+
+
+def merge_dataframes(old, new, mergehow="keep old"):
+    """Merge new data with old data.
+
+    Only the old rows from the first timestamp of the new data onwards
+    are deduplicated and sorted, the rest are concatenated as they are.
+
+    Parameters
+    ----------
+    old: pandas.core.frame.DataFrame
+        Old data, sorted.
+    new: pandas.core.frame.DataFrame
+        New data.
+    mergehow: str, optional
+        "keep old": If there are duplicated indexes, keep old data.
+        "update": If there are duplicated indexes, keep new data.
+        Defaults to "keep old".
+
+    Returns
+    -------
+    pandas.core.frame.DataFrame
+        The merged data, sorted.
+    """
+    if mergehow not in ["keep old", "update"]:
+        raise ValueError("mergehow:{} not available".format(mergehow))
+    if not new.index.is_monotonic_increasing:
+        new = new.sort_index()
+    if len(new.index) == 0:
+        return old
+    if len(old.index) == 0:
+        return new
+    first = new.index[0]
+    if old.index[-1] < first:
+        return pd.concat([old, new])
+    split = old.index.searchsorted(first)
+    head, tail = old.iloc[:split], old.iloc[split:]
+    if mergehow == "keep old":
+        df = pd.concat([tail, new])
+    else:
+        df = pd.concat([new, tail])
+    df = df[~df.index.duplicated()]
+    df = df.sort_index()
+    return pd.concat([head, df])
+
+
 class Data:
     """Data class for saving and loading stockdaq format stock data.
 
+    The data are held as one contiguous array per column, with the dtypes
+    of the schema. The dataframe is made from the arrays, without copying
+    them, only when it is used.
+
     Parameters
     ----------
     datetime_column: pandas.core.indexes.datetimes.DatetimeIndex
@@ -29,6 +435,19 @@ class Data:
         close price data
     volume: array
         volume data
+    dtypes: dict, optional
+        {"column": dtype} pairs overriding stockdaq.constants.data_dtypes,
+        e.g. stockdaq.constants.compact_dtypes for float32 prices.
+        Defaults to None.
+    columns: list of str, optional
+        Only load these columns from load_path.
+        Defaults to None, i.e. all columns.
+    lazy: boolean, optional
+        Read each column from load_path only when it is first used.
+        Defaults to False.
+    cache: stockdaq.data.data_cache.DataCache, optional
+        Read load_path through this cache.
+        Defaults to None.
 
     Attritubes
     ----------
@@ -44,12 +463,17 @@ class Data:
         close price data
     volume: array
         volume data
+    columns: dict of array
+        {"column": array} pairs of the loaded price and volume data.
+    dtypes: dict
+        {"column": dtype} pairs of the schema.
     dataframe: pandas.core.frame.DataFrame
         The data frame.
     """
     def __init__(
             self, datetime_column=None, open_=None, high=None, low=None,
-            close=None, volume=None, dataframe=None, load_path=None):
+            close=None, volume=None, dataframe=None, load_path=None,
+            dtypes=None, columns=None, lazy=False, cache=None):
         """Initization with data array or dataframe.
 
         Parameters
@@ -70,18 +494,37 @@ class Data:
             dataframe
         load_path: str
             file name of a stockdaq data file.
+        dtypes: dict, optional
+            {"column": dtype} pairs overriding
+            stockdaq.constants.data_dtypes.
+            Defaults to None.
+        columns: list of str, optional
+            Only load these columns from load_path.
+            Defaults to None, i.e. all columns.
+        lazy: boolean, optional
+            Read each column from load_path only when it is first used.
+            Defaults to False.
+        cache: stockdaq.data.data_cache.DataCache, optional
+            Read load_path through this cache.
+            Defaults to None.
 
         Note
         ----
         Only specify data in stockdaq standardized format.
         """
-        self.dataframe = None
-        if (any([datetime_column is None, open is None,
+        self.dtypes = dict(stockdaq.constants.data_dtypes)
+        if dtypes is not None:
+            self.dtypes.update(dtypes)
+        self.columns = {}
+        self._datetime_column = None
+        self._dataframe = None
+        self._source = None
+        if (any([datetime_column is None, open_ is None,
                 high is None, low is None,
                 close is None, volume is None]) and
                 dataframe is None and load_path is None):
             raise ValueError("Missing data.")
-        elif all([datetime_column is not None, open is not None,
+        elif all([datetime_column is not None, open_ is not None,
                 high is not None, low is not None,
                 close is not None, volume is not None]):
             self.datetime_column = datetime_column
@@ -90,15 +533,65 @@ class Data:
             self.low = low
             self.close = close
             self.volume = volume
-            self._set_self_dataframe_from_data()
         elif load_path is not None:
-            self.load(load_path)
+            self.load(load_path, columns=columns, lazy=lazy, cache=cache)
         elif dataframe is not None:
             self.dataframe = dataframe
-            self._set_self_data_from_dataframe()
+
+    def _column(name):
+        """Property of a column in self.columns."""
+        def fget(self):
+            if name not in self.columns:
+                self._materialize(columns=[name])
+            return self.columns[name]
+
+        def fset(self, array):
+            self.columns[name] = as_dtype(array, self.dtypes[name])
+            self._dataframe = None
+
+        return property(fget, fset, doc="{} data".format(name))
+
+    open = _column("open")
+    high = _column("high")
+    low = _column("low")
+    close = _column("close")
+    volume = _column("volume")
+    del _column
+
+    @property
+    def datetime_column(self):
+        """Date and time"""
+        if self._datetime_column is None and self._source is not None:
+            self._materialize(columns=[])
+        return self._datetime_column
+
+    @datetime_column.setter
+    def datetime_column(self, datetime_column):
+        self._datetime_column = pd.DatetimeIndex(datetime_column, copy=False)
+        self._dataframe = None
+
+    @property
+    def dataframe(self):
+        """The data frame, made from the columns when first used."""
+        if self._dataframe is None:
+            if self._source is not None:
+                self._materialize(columns=self._source["columns"])
+            self._set_self_dataframe_from_data()
+        return self._dataframe
+
+    @dataframe.setter
+    def dataframe(self, dataframe):
+        self._source = None
+        self._set_self_data_from_dataframe(dataframe)
+
+    @property
+    def nbytes(self):
+        """Memory (bytes) used by the data"""
+        return self.datetime_column.nbytes + sum(
+            array.nbytes for array in self.columns.values())
 
     def save(self, path, format="hdf5", conflict="merge",
-            mergehow="keep old", **kwargs):
+            mergehow="keep old", catalog=None, **kwargs):
         """Save the dataframe
 
         Parameters
@@ -108,7 +601,14 @@ class Data:
         format: str, optional
             The format of the file to be saved.
             Defaults to "hdf5".
-            Options are ["hdf5", "csv"]
+            Options are ["hdf5", "hdf5-table", "parquet", "memmap", "csv"]
+            "hdf5-table": appendable PyTables table with an indexed
+            datetime column, supporting time range queries in load().
+            "parquet": columnar parquet file, use the "compression"
+            keyword argument to choose the codec, e.g. "snappy"
+            (default), "zstd", "gzip" or None.
+            "memmap": uncompressed columns loaded as memory maps, see
+            stockdaq.data.memmap.
         conflict: str, optional
             How to resolve conflicts.
             options are ["merge", "overwrite", "ignore"].
@@ -119,8 +619,17 @@ class Data:
             Only effective when conflict == "merge".
             "keep old": If there are duplicated indexes, keep old data.
             "update": If there are duplicated indexes, keep new data.
+        catalog: stockdaq.data.catalog.Catalog, optional
+            Record the written file in this catalog.
+            Defaults to None.
         **kwargs:
             Keyword arguments passed to the pandas methods
+
+        Note
+        ----
+        When merging into a stored table, only the stored rows overlapping
+        self.dataframe are rewritten and self.dataframe is not changed.
+        Otherwise self.dataframe becomes the merged data.
         """
         if os.path.exists(path) and conflict=="ignore":
             logger.info("{} exists, ignoring.".format(path))
@@ -129,46 +638,104 @@ class Data:
             logger.info("{} exists, overwriting.".format(path))
         elif os.path.exists(path) and conflict=="merge":
             logger.info("{} exists, merging. How: {}".format(path, mergehow))
+            if format == "hdf5-table" and is_table(path):
+                self.merge_table(path=path, mergehow=mergehow, **kwargs)
+                if catalog is not None:
+                    catalog.record(path=path, format=format)
+                return None
             self.merge(path=path, mergehow=mergehow)
         elif os.path.exists(path):
             raise ValueError("conflict: {} not available.".format(conflict))
 
         if format == "hdf5":
-            self.dataframe.to_hdf(
-                path_or_buf=path, key="stockdaq", mode="w", **kwargs)
+            with hdf5_lock:
+                self.dataframe.to_hdf(
+                    path_or_buf=path, key="stockdaq", mode="w", **kwargs)
+        elif format == "hdf5-table":
+            with hdf5_lock:
+                self.dataframe.to_hdf(
+                    path_or_buf=path, key="stockdaq", mode="w",
+                    format="table", index=True, **kwargs)
+        elif format == "parquet":
+            self.dataframe.rename_axis(parquet_index).to_parquet(
+                path, **kwargs)
+        elif format == "memmap":
+            stockdaq.data.memmap.write(dataframe=self.dataframe, path=path)
         elif format == "csv":
             self.dataframe.to_csv(path_or_buf=path, header=header, **kwargs)
         else:
             raise ValueError("{} format not available".format(format))
         logger.info("Data written to path: {}".format(path))
+        if catalog is not None:
+            catalog.record(path=path, format=format)
 
-    def load(self, path, format="hdf5"):
+    def load(self, path, format=None, start=None, end=None, columns=None,
+             lazy=False, cache=None):
         """Load a single stockdaq data file.
 
         Parameters
         ----------
         path: str
             The path of the file to be read.
+            A directory is read as one parquet dataset.
         format: str, optional
             The format of the file to be saved.
-            Defaults to "hdf5".
-            Options are ["hdf5", "csv"]
+            Defaults to None, i.e. from the extension, see get_format().
+            Options are ["hdf5", "hdf5-table", "parquet", "memmap", "csv"]
+            "hdf5" reads both fixed format files and tables.
+            "memmap" data are read-only views of the file.
+        start: datetime.datetime, optional
+            Only load data at or after this time.
+            Defaults to None.
+        end: datetime.datetime, optional
+            Only load data before this time.
+            Defaults to None.
+        columns: list of str, optional
+            Only load these columns, e.g. ["close"].
+            Defaults to None, i.e. all columns.
+        lazy: boolean, optional
+            Read each column, and the datetime column, only when it is
+            first used.
+            Defaults to False.
+        cache: stockdaq.data.data_cache.DataCache, optional
+            Read the file through this cache. Not used if lazy is True.
+            Defaults to None.
+
+        Note
+        ----
+        See read_dataframe().
         """
         if not os.path.exists(path):
             raise FileExistsError("{} does not exist".format(path))
-
-        if format == "hdf5":
-            self.dataframe = pd.read_hdf(path)
-        elif format == "csv":
-            self.dataframe = pd.read_csv(path, index_col=0)
-        else:
-            raise ValueError("{} format not available".format(format))
-
-        self._set_self_data_from_dataframe()
+        if format is None:
+            format = "parquet" if os.path.isdir(path) else get_format(path)
+        if columns is None:
+            columns = list(header)
+        if not lazy:
+            reader = read_dataframe if cache is None else cache.read_dataframe
+            self.dataframe = reader(
+                path=path, format=format, columns=columns, start=start,
+                end=end)
+            return
+        # Whether columns can be read separately.
+        projection = format in ["parquet", "memmap"]
+        if format in ["hdf5", "hdf5-table"]:
+            projection = is_table(path)
+        self.columns = {}
+        self._datetime_column = None
+        self._dataframe = None
+        self._source = {
+            "path": path, "format": format, "start": start, "end": end,
+            "columns": columns, "projection": projection,
+        }
 
     def merge(self, path, mergehow="keep old"):
         """Merge self.dataframe with an exist datafile.
 
+        Data newer than the stored data are concatenated. Otherwise only
+        the stored rows from the first timestamp of self.dataframe onwards
+        are deduplicated and sorted.
+
         Parameters
         ----------
         path: str
@@ -177,37 +744,143 @@ class Data:
             "keep old": If there are duplicated indexes, keep old data.
             "update": If there are duplicated indexes, keep new data.
         """
-        data = stockdaq.data.data.Data(load_path=path)
-        if mergehow == "keep old":
-            df_keep = data.dataframe
-            df_other = self.dataframe
-        elif mergehow == "update":
-            df_keep = self.dataframe
-            df_other = data.dataframe
-        else:
+        data = stockdaq.data.data.Data(load_path=path, dtypes=self.dtypes)
+        self.dataframe = merge_dataframes(
+            old=data.dataframe, new=self.dataframe, mergehow=mergehow)
+
+    def merge_table(self, path, mergehow="keep old", **kwargs):
+        """Merge self.dataframe into a stored table in place.
+
+        If the data are newer than the stored data, only the stored index
+        bounds are read and the data are appended. Otherwise the stored
+        rows from the first timestamp of self.dataframe onwards are read
+        and merged. The merged rows are appended before the old ones are
+        removed, so a failed append leaves the stored rows intact.
+
+        Parameters
+        ----------
+        path: str
+            The path of the table.
+        mergehow: str, optional
+            "keep old": If there are duplicated indexes, keep old data.
+            "update": If there are duplicated indexes, keep new data.
+        **kwargs:
+            Keyword arguments passed to pandas.HDFStore.append().
+        """
+        if mergehow not in ["keep old", "update"]:
             raise ValueError("mergehow:{} not available".format(mergehow))
-        df = pd.concat([df_keep, df_other])
-        df = df[~df.index.duplicated()]
-        df = df.sort_index()
-        self.dataframe = df
+        dataframe = self.dataframe
+        if len(dataframe.index) == 0:
+            return
+        if not dataframe.index.is_monotonic_increasing:
+            dataframe = dataframe.sort_index()
+        first = dataframe.index[0]
+        with hdf5_lock:
+            _, last = get_index_bounds(path)
+            with pd.HDFStore(path, mode="a") as store:
+                overlap = last is not None and first <= last
+                replaced = []
+                if overlap:
+                    replaced = store.select_as_coordinates(
+                        "stockdaq", where=get_where(start=first))
+                    stored = store.select("stockdaq", where=replaced)
+                    dataframe = merge_dataframes(
+                        old=stored, new=dataframe, mergehow=mergehow)
+                    logger.debug("Rewriting {} stored rows of {}."
+                                 "".format(len(stored.index), path))
+                # Appended columns must have the dtypes of the table.
+                stored_dtypes = store.select(
+                    "stockdaq", start=0, stop=0).dtypes.to_dict()
+                dataframe = pd.DataFrame({
+                    column: as_dtype(
+                        dataframe[column].to_numpy(),
+                        stored_dtypes.get(column, dataframe[column].dtype))
+                    for column in dataframe.columns
+                }, index=dataframe.index)
+                widen = not all(
+                    dataframe[column].dtype == dtype
+                    for column, dtype in stored_dtypes.items()
+                    if column in dataframe.columns)
+                if not widen:
+                    store.append(
+                        "stockdaq", dataframe, format="table", index=True,
+                        **kwargs)
+                    # The replaced rows are only removed once the merged
+                    # rows are stored.
+                    if len(replaced):
+                        store.remove("stockdaq", where=replaced)
+                else:
+                    stored = store.select(
+                        "stockdaq", where=get_where(end=first))
+            if widen:
+                # E.g. NaN volume in an int64 table, the table is
+                # rewritten with the columns widened.
+                logger.info("Widening the columns of {}.".format(path))
+                tmp_path = path + ".tmp"
+                with pd.HDFStore(tmp_path, mode="w") as store:
+                    store.append(
+                        "stockdaq", pd.concat([stored, dataframe]),
+                        format="table", index=True, **kwargs)
+                os.replace(tmp_path, path)
+        logger.info("Data appended to path: {}".format(path))
+
+    def _set_self_data_from_dataframe(self, dataframe):
+        """ set self.open, self.close, etc from a dataframe.
 
-    def _set_self_data_from_dataframe(self):
-        """ set self.open, self.close, etc from self.dataframe.
+        Parameters
+        ----------
+        dataframe: pandas.core.frame.DataFrame
+            The data frame.
         """
-        self.datetime_column = pd.DatetimeIndex(self.dataframe.index)
-        self.open = self.dataframe["open"].values
-        self.high = self.dataframe["high"].values
-        self.low = self.dataframe["low"].values
-        self.close = self.dataframe["close"].values
-        self.volume = self.dataframe["volume"].values
+        self.datetime_column = dataframe.index
+        self.columns = {}
+        for column in header:
+            if column in dataframe.columns:
+                self.columns[column] = as_dtype(
+                    dataframe[column].to_numpy(), self.dtypes[column])
+        self._dataframe = None
 
     def _set_self_dataframe_from_data(self):
         """ set self.dataframe from self.open, self.close, etc.
         """
-        self.dataframe = pd.DataFrame(
-            data=np.array(
-                [self.open, self.high, self.low, self.close, self.volume]
-                ).T,
-            index=self.datetime_column,
-            columns=header,
-            )
+        self._dataframe = pd.DataFrame(
+            {column: self.columns[column]
+             for column in header if column in self.columns},
+            index=self.datetime_column, copy=False)
+
+    def _materialize(self, columns):
+        """Read columns of a lazily loaded file.
+
+        Parameters
+        ----------
+        columns: list of str
+            The columns to be read. Only the datetime column if empty.
+        """
+        if self._source is None:
+            raise ValueError("{} column not available.".format(
+                ", ".join(columns)))
+        source = self._source
+        missing = [
+            column for column in columns if column not in self.columns]
+        unknown = [
+            column for column in missing if column not in source["columns"]]
+        if unknown:
+            raise ValueError("{} column not available.".format(
+                ", ".join(unknown)))
+        if not source["projection"]:
+            # Files without column access are read once, in full.
+            missing = [
+                column for column in source["columns"]
+                if column not in self.columns]
+        if not missing and self._datetime_column is not None:
+            return
+        dataframe = read_dataframe(
+            path=source["path"], format=source["format"], columns=missing,
+            start=source["start"], end=source["end"])
+        if self._datetime_column is None:
+            self._datetime_column = pd.DatetimeIndex(
+                dataframe.index, copy=False)
+        for column in missing:
+            self.columns[column] = as_dtype(
+                dataframe[column].to_numpy(), self.dtypes[column])
+        self._dataframe = None
@@ -0,0 +1,241 @@
+"""In-memory cache of loaded data files.
+"""
+import collections
+import os
+import threading
+
+import pandas as pd
+
+import stockdaq.data.data
+from stockdaq.logger import logger
+
+
+class DataCache:
+    """Memory-bounded LRU cache of dataframes read from data files.
+
+    Entries are keyed by the path and the read arguments, and stamped with
+    the modification time and size of the file. A file changed since it
+    was read is read again. The least recently used entries are evicted
+    when the cache exceeds its size.
+
+    Parameters
+    ----------
+    max_size: int, optional
+        Maximum size (bytes) of the cached data.
+        Defaults to 1e9 (1 GB).
+
+    Attributes
+    ----------
+    max_size: int
+        Maximum size (bytes) of the cached data.
+    size: int
+        Size (bytes) of the cached data.
+    hits: int
+        Number of reads served from the cache.
+    misses: int
+        Number of reads from the files.
+    evictions: int
+        Number of entries evicted.
+
+    Note
+    ----
+    Readers get copies of the cached dataframes, so the cache is never
+    changed by their edits. The copies are shallow with copy-on-write,
+    always on from pandas 3, which copies the data on the first edit.
+    """
+    def __init__(self, max_size=1e9):
+        """Constructor
+
+        Parameters
+        ----------
+        max_size: int, optional
+            Maximum size (bytes) of the cached data.
+            Defaults to 1e9 (1 GB).
+        """
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Number of cached entries."""
+        return len(self._entries)
+
+    def make_key(self, path, format=None, columns=None, start=None,
+                 end=None):
+        """Make the key of a read.
+
+        Parameters
+        ----------
+        path: str
+            The path of the file.
+        format: str, optional
+            The format of the file.
+            Defaults to None.
+        columns: list of str, optional
+            The columns read.
+            Defaults to None, i.e. all columns.
+        start: datetime.datetime, optional
+            Start time of the read.
+            Defaults to None.
+        end: datetime.datetime, optional
+            End time of the read.
+            Defaults to None.
+
+        Returns
+        -------
+        tuple
+            The key.
+        """
+        if columns is not None:
+            columns = tuple(columns)
+        if start is not None:
+            start = pd.Timestamp(start)
+        if end is not None:
+            end = pd.Timestamp(end)
+        return (os.path.abspath(path), format, columns, start, end)
+
+    def read_dataframe(self, path, format=None, columns=None, start=None,
+                       end=None):
+        """Read a data file through the cache.
+
+        See stockdaq.data.data.read_dataframe().
+
+        Parameters
+        ----------
+        path: str
+            The path of the file.
+        format: str, optional
+            The format of the file.
+            Defaults to None, i.e. from the extension.
+        columns: list of str, optional
+            Only read these columns, e.g. ["close"].
+            Defaults to None, i.e. all columns.
+        start: datetime.datetime, optional
+            Only read data at or after this time.
+            Defaults to None.
+        end: datetime.datetime, optional
+            Only read data before this time.
+            Defaults to None.
+
+        Returns
+        -------
+        pandas.core.frame.DataFrame
+            The data, a copy of the cached dataframe.
+        """
+        key = self.make_key(
+            path=path, format=format, columns=columns, start=start, end=end)
+        stamp = self._get_stamp(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return _copy(entry[1])
+            if entry is not None:
+                # The file has changed.
+                self._pop(key)
+            self.misses += 1
+        dataframe = stockdaq.data.data.read_dataframe(
+            path=path, format=format, columns=columns, start=start, end=end)
+        self.put(key=key, stamp=stamp, dataframe=dataframe)
+        return _copy(dataframe)
+
+    def put(self, key, stamp, dataframe):
+        """Put a dataframe in the cache and evict old entries.
+
+        Dataframes larger than self.max_size are not cached.
+
+        Parameters
+        ----------
+        key: tuple
+            The key, see make_key().
+        stamp: tuple
+            (modification time, size) of the file.
+        dataframe: pandas.core.frame.DataFrame
+            The data.
+        """
+        nbytes = int(dataframe.memory_usage(index=True).sum())
+        if nbytes > self.max_size:
+            logger.debug("{} too large to be cached.".format(key[0]))
+            return
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+            self._entries[key] = (stamp, dataframe, nbytes)
+            self.size += nbytes
+            while self.size > self.max_size:
+                self._pop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, path):
+        """Remove the entries of a file.
+
+        Parameters
+        ----------
+        path: str
+            The path of the file.
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == path]:
+                self._pop(key)
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self):
+        """Get the statistics of the cache.
+
+        Returns
+        -------
+        dict
+            "entries", "size", "max_size", "hits", "misses", "hit_rate"
+            and "evictions".
+        """
+        with self._lock:
+            reads = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "size": self.size,
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / reads if reads else 0.,
+                "evictions": self.evictions,
+            }
+
+    def _pop(self, key):
+        """Remove an entry. Must be called with self._lock held."""
+        _, _, nbytes = self._entries.pop(key)
+        self.size -= nbytes
+
+    def _get_stamp(self, path):
+        """Get the (modification time, size) of a file or directory."""
+        if os.path.isdir(path):
+            stats = [
+                os.stat(os.path.join(directory, filename))
+                for directory, _, filenames in os.walk(path)
+                for filename in filenames
+            ]
+            return (max([stat.st_mtime_ns for stat in stats], default=0),
+                    sum([stat.st_size for stat in stats]))
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+
+def _copy(dataframe):
+    """Copy a cached dataframe for a reader.
+
+    Without copy-on-write, a shallow copy shares its arrays with the
+    cached dataframe, so the data are copied.
+    """
+    if int(pd.__version__.split(".")[0]) >= 3:
+        return dataframe.copy(deep=False)
+    return dataframe.copy(deep=pd.options.mode.copy_on_write is not True)
@@ -0,0 +1,345 @@
+"""Reader of the stockdaq database.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+import stockdaq.constants
+import stockdaq.data.data
+import stockdaq.data.manager
+
+
+class Database:
+    """Read data of symbols and time ranges from a stockdaq database.
+
+    The database is laid out as written by stockdaq.acquisiter, i.e.
+    partition files in directories derived from root_dir and
+    file_structure. Only the partitions overlapping the requested time
+    range are opened.
+
+    Parameters
+    ----------
+    root_dir: str, optional
+        The root directory of the database.
+        Defaults to "./".
+    file_structure: list of str, optional
+        How the parent/child folders are set up.
+        Defaults to ["symbol", "frequency", "data"].
+    format: str, optional
+        Format of the files, see stockdaq.data.data.Data.save().
+        Defaults to "hdf5".
+    prefix: str, optional
+        Prefix to the filenames.
+        Defaults to "".
+    suffix: str, optional
+        suffix to the filenames, before the extension.
+        Defaults to "".
+    extension: str, optional
+        Extension of the files.
+        Defaults to None, i.e. the extension of the format, e.g. ".h5".
+    dtypes: dict, optional
+        {"column": dtype} pairs of the loaded Data,
+        see stockdaq.data.data.Data.
+        Defaults to None.
+    catalog: stockdaq.data.catalog.Catalog, optional
+        Find the partitions in this catalog instead of listing the
+        directories.
+        Defaults to None.
+    cache: stockdaq.data.data_cache.DataCache, optional
+        Read the partitions through this cache.
+        Defaults to None.
+    loader: stockdaq.data.loader.BulkLoader, optional
+        Read the partitions in parallel with this loader.
+        Defaults to None.
+
+    Attributes
+    ----------
+    root_dir: str
+        The root directory of the database.
+    file_structure: list of str
+        How the parent/child folders are set up.
+    format: str
+        Format of the files.
+    prefix: str
+        Prefix to the filenames.
+    suffix: str
+        suffix to the filenames, before the extension.
+    extension: str
+        Extension of the files.
+    dtypes: dict or None
+        {"column": dtype} pairs of the loaded Data.
+    catalog: stockdaq.data.catalog.Catalog or None
+        The catalog of the partitions.
+    cache: stockdaq.data.data_cache.DataCache or None
+        The cache of the partitions.
+    loader: stockdaq.data.loader.BulkLoader or None
+        The parallel loader of the partitions.
+    """
+    def __init__(self, root_dir="./",
+                 file_structure=["symbol", "frequency", "data"],
+                 format="hdf5", prefix="", suffix="", extension=None,
+                 dtypes=None, catalog=None, cache=None, loader=None):
+        """Constructor
+
+        Parameters
+        ----------
+        root_dir: str, optional
+            The root directory of the database.
+            Defaults to "./".
+        file_structure: list of str, optional
+            How the parent/child folders are set up.
+            Defaults to ["symbol", "frequency", "data"].
+        format: str, optional
+            Format of the files, see stockdaq.data.data.Data.save().
+            Defaults to "hdf5".
+        prefix: str, optional
+            Prefix to the filenames.
+            Defaults to "".
+        suffix: str, optional
+            suffix to the filenames, before the extension.
+            Defaults to "".
+        extension: str, optional
+            Extension of the files.
+            Defaults to None, i.e. the extension of the format, e.g. ".h5".
+        dtypes: dict, optional
+            {"column": dtype} pairs of the loaded Data,
+            see stockdaq.data.data.Data.
+            Defaults to None.
+        catalog: stockdaq.data.catalog.Catalog, optional
+            Find the partitions in this catalog instead of listing the
+            directories.
+            Defaults to None.
+        cache: stockdaq.data.data_cache.DataCache, optional
+            Read the partitions through this cache.
+            Defaults to None.
+        loader: stockdaq.data.loader.BulkLoader, optional
+            Read the partitions in parallel with this loader.
+            Defaults to None.
+        """
+        if extension is None:
+            extension = stockdaq.data.data.extensions[format]
+        self.root_dir = root_dir
+        self.file_structure = file_structure
+        self.format = format
+        self.prefix = prefix
+        self.suffix = suffix
+        self.extension = extension
+        self.dtypes = dtypes
+        self.catalog = catalog
+        self.cache = cache
+        self.loader = loader
+
+    def get_prefix(self, symbol, frequency):
+        """Get the directory of the data of a symbol and frequency.
+
+        Parameters
+        ----------
+        symbol: str
+            The stock symbol.
+        frequency: str
+            "intraday", "daily", "weekly", "monthly".
+
+        Returns
+        -------
+        str
+            The directory.
+        """
+        return stockdaq.data.manager.get_prefix(
+            root_dir=self.root_dir, file_structure=self.file_structure,
+            symbol=symbol, frequency=frequency)
+
+    def get_partitions(self, symbol, frequency, start=None, end=None):
+        """Get the files of the partitions overlapping a time range.
+
+        Parameters
+        ----------
+        symbol: str
+            The stock symbol.
+        frequency: str
+            "intraday", "daily", "weekly", "monthly".
+        start: datetime.datetime, optional
+            Start time, inclusive.
+            Defaults to None.
+        end: datetime.datetime, optional
+            End time, exclusive.
+            Defaults to None.
+
+        Returns
+        -------
+        list of str
+            Paths of the files, in time order.
+        """
+        if self.catalog is not None:
+            entries = self.catalog.query(
+                symbol=symbol, frequency=frequency, start=start, end=end)
+            return entries["path"].to_list()
+        directory = self.get_prefix(symbol=symbol, frequency=frequency)
+        if not os.path.isdir(directory):
+            return []
+        ending = self.suffix + self.extension
+        if start is not None:
+            start = pd.Timestamp(start)
+        if end is not None:
+            end = pd.Timestamp(end)
+        paths = []
+        for filename in sorted(os.listdir(directory)):
+            if (not filename.startswith(self.prefix)
+                    or not filename.endswith(ending)):
+                continue
+            key = filename[len(self.prefix):len(filename)-len(ending)]
+            key_start, key_end = stockdaq.data.manager.get_partition_range(
+                key)
+            if key_start is not None:
+                if start is not None and key_end <= start:
+                    continue
+                if end is not None and key_start >= end:
+                    continue
+            paths.append(os.path.join(directory, filename))
+        return paths
+
+    def load(self, symbols, frequency, start=None, end=None, columns=None):
+        """Load the data of symbols in a time range.
+
+        Parameters
+        ----------
+        symbols: str or list of str
+            The stock symbol, or a list of symbols.
+        frequency: str
+            "intraday", "daily", "weekly", "monthly".
+        start: datetime.datetime, optional
+            Start time, inclusive.
+            Defaults to None.
+        end: datetime.datetime, optional
+            End time, exclusive.
+            Defaults to None.
+        columns: list of str, optional
+            Only load these columns, e.g. ["close"].
+            Defaults to None, i.e. all columns.
+
+        Returns
+        -------
+        stockdaq.data.data.Data or dict of stockdaq.data.data.Data
+            The data of the symbol, or {"symbol": stockdaq.data.data.Data}
+            pairs for a list of symbols.
+
+        Note
+        ----
+        With self.loader, the partitions of all symbols are read in
+        parallel.
+        """
+        if self.loader is not None and not isinstance(symbols, str):
+            paths = {
+                symbol: self.get_partitions(
+                    symbol=symbol, frequency=frequency, start=start, end=end)
+                for symbol in symbols
+            }
+            dataframes = iter(self.loader.read_dataframes(
+                paths=[path for symbol in paths for path in paths[symbol]],
+                format=self.format, columns=columns, start=start, end=end))
+            return {
+                symbol: concatenate(
+                    [next(dataframes) for _ in paths[symbol]],
+                    columns=columns, dtypes=self.dtypes)
+                for symbol in paths
+            }
+        if isinstance(symbols, str):
+            return self.load_symbol(
+                symbol=symbols, frequency=frequency, start=start, end=end,
+                columns=columns)
+        return {
+            symbol: self.load_symbol(
+                symbol=symbol, frequency=frequency, start=start, end=end,
+                columns=columns)
+            for symbol in symbols
+        }
+
+    def load_symbol(self, symbol, frequency, start=None, end=None,
+                    columns=None):
+        """Load the data of a symbol in a time range.
+
+        The partitions are read into arrays that are concatenated once,
+        and the Data is made from them without copying.
+
+        Parameters
+        ----------
+        symbol: str
+            The stock symbol.
+        frequency: str
+            "intraday", "daily", "weekly", "monthly".
+        start: datetime.datetime, optional
+            Start time, inclusive.
+            Defaults to None.
+        end: datetime.datetime, optional
+            End time, exclusive.
+            Defaults to None.
+        columns: list of str, optional
+            Only load these columns, e.g. ["close"].
+            Defaults to None, i.e. all columns.
+
+        Returns
+        -------
+        stockdaq.data.data.Data
+            The data.
+        """
+        paths = self.get_partitions(
+            symbol=symbol, frequency=frequency, start=start, end=end)
+        if self.loader is not None:
+            return self.loader.load(
+                paths=paths, format=self.format, columns=columns,
+                start=start, end=end, dtypes=self.dtypes)
+        reader = stockdaq.data.data.read_dataframe
+        if self.cache is not None:
+            reader = self.cache.read_dataframe
+        dataframes = [
+            reader(
+                path=path, format=self.format, columns=columns, start=start,
+                end=end)
+            for path in paths
+        ]
+        return concatenate(dataframes, columns=columns, dtypes=self.dtypes)
+
+
+def concatenate(dataframes, columns=None, dtypes=None):
+    """Concatenate partitions into one Data.
+
+    Parameters
+    ----------
+    dataframes: list of pandas.core.frame.DataFrame
+        Data of the partitions, in time order.
+    columns: list of str, optional
+        The columns.
+        Defaults to None, i.e. all columns.
+    dtypes: dict, optional
+        {"column": dtype} pairs of the Data, see stockdaq.data.data.Data.
+        Defaults to None.
+
+    Returns
+    -------
+    stockdaq.data.data.Data
+        The data.
+    """
+    if columns is None:
+        columns = stockdaq.constants.columns
+    dataframes = [
+        dataframe for dataframe in dataframes if len(dataframe.index) > 0]
+    if len(dataframes) == 1:
+        return stockdaq.data.data.Data(
+            dataframe=dataframes[0], dtypes=dtypes)
+    if not dataframes:
+        index = pd.DatetimeIndex([], dtype="datetime64[ns]")
+        arrays = {
+            column: np.empty(0, dtype=stockdaq.constants.data_dtypes[column])
+            for column in columns
+        }
+    else:
+        index = dataframes[0].index.append(
+            [dataframe.index for dataframe in dataframes[1:]])
+        arrays = {
+            column: np.concatenate([
+                dataframe[column].to_numpy() for dataframe in dataframes])
+            for column in columns
+        }
+    return stockdaq.data.data.Data(
+        dataframe=pd.DataFrame(arrays, index=index, copy=False),
+        dtypes=dtypes)
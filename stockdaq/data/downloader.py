@@ -1,10 +1,16 @@
 """Download data and save as Pandas dataframe using APIs.
 """
+import asyncio
+import functools
 import os
 
+import numpy as np
 import pandas as pd
 
+import stockdaq.constants
+import stockdaq.data.data
 import stockdaq.data.manager
+import stockdaq.data.session
 
 
 class Downloader:
@@ -19,14 +25,47 @@ class Downloader:
     ----------
     api: str
         The name of the API being used.
+    rawdata: object or None
+        The raw data returned by the API.
     dataframe: pandas.core.frame.DataFrame or None
         The downloaded data.
+    session: object or None
+        The HTTP session used for API calls.
+        None if the API library manages its own connections.
+    cache: stockdaq.data.response_cache.ResponseCache or None
+        The cache of raw API responses.
+    timezone: str or None
+        Timezone the timestamps are converted to, e.g. the exchange
+        timezone "America/New_York".
+        None to keep the wall time of the API and drop the timezone.
+    column_map: dict
+        {"API column": "stockdaq column"} pairs, a class attribute.
+    source_timezone: str or None
+        Timezone of API timestamps without timezone, a class attribute.
 
     Methods
     -------
+    make_session(cls, pool_size=10, timeout=30, retries=0)
+    set_session(self, session)
+    set_cache(self, cache)
+    set_timezone(self, timezone)
+    download(self, symbol, frequency="intraday", **kwargs)
+    download_async(self, symbol, frequency="intraday", executor=None,
+            **kwargs)
+    fetch(self, symbol, frequency="intraday", **kwargs)
+    fetch_api(self, symbol, frequency="intraday", **kwargs)
+    is_cached(self, symbol, frequency="intraday", **kwargs)
+    formatter(self, datadump)
+    normalize(self, datadump)
+    partition(self, criterion="date", prefix="", suffix="",
+            extension=".h5")
     export(self, criterion="date", prefix="", suffix="",
-            extension=".h5", conflict="merge", mergehow="keep old")
+            extension=None, conflict="merge", mergehow="keep old",
+            format="hdf5", **kwargs)
     """
+    column_map = {column: column for column in stockdaq.constants.columns}
+    source_timezone = None
+
     def __init__(self, api):
         """Constructor
 
@@ -36,16 +75,267 @@ class Downloader:
             The name of the API being used.
         """
         self.api = api
+        self.rawdata = None
         self.dataframe = None
+        self.session = None
+        self.cache = None
+        self.timezone = None
+
+    @classmethod
+    def make_session(cls, pool_size=10, timeout=30, retries=0):
+        """Make a pooled keep-alive HTTP session suitable for this API.
+
+        Parameters
+        ----------
+        pool_size: int, optional
+            Maximum number of connections kept alive per host.
+            Defaults to 10.
+        timeout: float, optional
+            Timeout (seconds) of the requests.
+            Defaults to 30.
+        retries: int, optional
+            Number of retries on connection errors.
+            Defaults to 0.
+
+        Returns
+        -------
+        session: object
+            The session.
+        """
+        return stockdaq.data.session.make_session(
+            pool_size=pool_size, timeout=timeout, retries=retries)
+
+    def set_session(self, session):
+        """Use a HTTP session for API calls.
+
+        Parameters
+        ----------
+        session: object
+            The session, e.g. from make_session().
+        """
+        self.session = session
+
+    def set_cache(self, cache):
+        """Use a cache of raw API responses.
+
+        Parameters
+        ----------
+        cache: stockdaq.data.response_cache.ResponseCache or None
+            The cache. None to disable caching.
+        """
+        self.cache = cache
+
+    def set_timezone(self, timezone):
+        """Convert timestamps to a timezone.
+
+        Parameters
+        ----------
+        timezone: str or None
+            The timezone, e.g. "America/New_York".
+            None to keep the wall time of the API and drop the timezone.
+        """
+        self.timezone = timezone
+
+    def download(self, symbol, frequency="intraday", **kwargs):
+        """Get data from API, set self.rawdata and self.dataframe
+
+        Parameters
+        ----------
+        symbol: str
+            Stock symbol
+        frequency: str, optional
+            "intraday", "daily", "weekly", "monthly".
+        **kwargs:
+            Keyword arguments passed to the fetch() method.
+        """
+        self.fetch(symbol=symbol, frequency=frequency, **kwargs)
+        self.dataframe = self.formatter(datadump=self.rawdata)
+
+    def fetch(self, symbol, frequency="intraday", **kwargs):
+        """Get raw data from self.cache or from API, set self.rawdata
+
+        Parameters
+        ----------
+        symbol: str
+            Stock symbol
+        frequency: str, optional
+            "intraday", "daily", "weekly", "monthly".
+        **kwargs:
+            Keyword arguments passed to the fetch_api() method.
+
+        Returns
+        -------
+        object
+            The raw data.
+        """
+        if self.cache is None:
+            return self.fetch_api(symbol=symbol, frequency=frequency, **kwargs)
+        key = self.cache.make_key(
+            api=self.api, symbol=symbol, frequency=frequency, kwargs=kwargs)
+        rawdata = self.cache.get(key)
+        if rawdata is None:
+            if self.cache.offline:
+                raise ValueError("{} {} data from {} not available offline."
+                                 "".format(symbol, frequency, self.api))
+            rawdata = self.fetch_api(
+                symbol=symbol, frequency=frequency, **kwargs)
+            # Empty responses are usually errors, don't replay them.
+            if rawdata is not None and not getattr(rawdata, "empty", False):
+                self.cache.put(key, rawdata)
+        self.rawdata = rawdata
+        return self.rawdata
+
+    def is_cached(self, symbol, frequency="intraday", **kwargs):
+        """Check if fetch() would use a cached response.
+
+        Parameters
+        ----------
+        symbol: str
+            Stock symbol
+        frequency: str, optional
+            "intraday", "daily", "weekly", "monthly".
+        **kwargs:
+            Keyword arguments passed to the fetch_api() method.
+
+        Returns
+        -------
+        boolean
+            True if the response is cached, so the API is not called.
+        """
+        if self.cache is None:
+            return False
+        key = self.cache.make_key(
+            api=self.api, symbol=symbol, frequency=frequency, kwargs=kwargs)
+        return self.cache.contains(key)
+
+    def fetch_api(self, symbol, frequency="intraday", **kwargs):
+        """Get raw data from API, set self.rawdata
+
+        To be implemented by the API specific downloaders.
+
+        Parameters
+        ----------
+        symbol: str
+            Stock symbol
+        frequency: str, optional
+            "intraday", "daily", "weekly", "monthly".
+        **kwargs:
+            Keyword arguments passed to the API.
+
+        Returns
+        -------
+        object
+            The raw data.
+        """
+        raise NotImplementedError
+
+    def formatter(self, datadump):
+        """Convert raw data to standard stockdaq format
+
+        Defaults to normalize(). API specific downloaders with other raw
+        data than dataframes override this.
+
+        Parameters
+        ----------
+        datadump: object
+            Raw data from the API.
+
+        Returns
+        -------
+        dataframe: pandas.core.frame.DataFrame
+            Formated dataframe.
+        """
+        return self.normalize(datadump=datadump)
+
+    def normalize(self, datadump):
+        """Convert an API dataframe to standard stockdaq format.
+
+        Columns are renamed with self.column_map and cast to
+        stockdaq.constants.data_dtypes with stockdaq.data.data.as_dtype(),
+        without copies when the dtype already matches. The index is sorted ascending and converted to
+        self.timezone, or its timezone dropped, as a whole.
+
+        Parameters
+        ----------
+        datadump: pandas.core.frame.DataFrame
+            Dataframe from the API.
+
+        Returns
+        -------
+        dataframe: pandas.core.frame.DataFrame
+            Formated dataframe.
+        """
+        index = datadump.index
+        order = None
+        if index.is_monotonic_decreasing and not index.is_monotonic_increasing:
+            order = slice(None, None, -1)  # A view, e.g. Alpha Vantage
+        elif not index.is_monotonic_increasing:
+            order = np.argsort(index.values, kind="stable")
+        index = pd.DatetimeIndex(index)
+        if order is not None:
+            index = index[order]
+
+        if self.timezone is not None:
+            if index.tz is None and self.source_timezone is not None:
+                index = index.tz_localize(
+                    self.source_timezone, ambiguous="NaT",
+                    nonexistent="shift_forward")
+            if index.tz is not None:
+                index = index.tz_convert(self.timezone)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+
+        data = {}
+        for api_column, column in self.column_map.items():
+            if api_column not in datadump.columns:
+                raise ValueError("{} column not available in {} data."
+                                 "".format(api_column, self.api))
+            values = datadump[api_column].to_numpy()
+            if values.dtype.kind not in "iuf":
+                values = values.astype("float64")  # E.g. strings
+            values = stockdaq.data.data.as_dtype(
+                values, stockdaq.constants.data_dtypes[column])
+            if order is not None:
+                values = values[order]
+            data[column] = values
+        return pd.DataFrame(data, index=index, copy=False)
+
+    async def download_async(self, symbol, frequency="intraday",
+                             executor=None, **kwargs):
+        """Get data from API without blocking the event loop.
+
+        The blocking download() method of the downloader is run in
+        an executor.
+
+        Parameters
+        ----------
+        symbol: str
+            Stock symbol
+        frequency: str, optional
+            "intraday", "daily", "weekly", "monthly".
+        executor: concurrent.futures.Executor, optional
+            The executor to run download() in.
+            Defaults to None, i.e. the default executor of the event loop.
+        **kwargs:
+            Keyword arguments passed to the download() method.
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            executor,
+            functools.partial(
+                self.download, symbol=symbol, frequency=frequency, **kwargs)
+            )
 
     def export(self, criterion="date", prefix="", suffix="",
-               extension=".h5", conflict="merge", mergehow="keep old"):
-        """Export self.dataframe to hdf5 files, names derive from criterion.
+               extension=None, conflict="merge", mergehow="keep old",
+               format="hdf5", **kwargs):
+        """Export self.dataframe to files, names derive from criterion.
 
         Parameters
         ----------
         criterion: str, optional
-            Data in same file has same "date" or "year".
+            Data in same file has same "year", "month", "week", "date"
+            or "hour". "none" puts all data in one file named "all".
             Defaults to date.
         prefix: str, optional
             Prefix to the filename.
@@ -53,7 +343,7 @@ class Downloader:
             suffix to the filename, before the extension.
         extension: str, optional
             Extension of the files.
-            Defaults to ".h5".
+            Defaults to None, i.e. the extension of the format, e.g. ".h5".
         conflict: str, optional
             How to resolve conflicts.
             options are ["merge", "overwrite", "ignore"].
@@ -64,15 +354,61 @@ class Downloader:
             Only effective when conflict == "merge".
             "keep old": If there are duplicated indexes, keep old data.
             "update": If there are duplicated indexes, keep new data.
+        format: str, optional
+            Format of the files, see stockdaq.data.data.Data.save().
+            Use "hdf5-table" with criterion "none" to keep one appendable
+            table per symbol and frequency, or "parquet" for columnar
+            files partitioned by symbol, frequency and criterion.
+            Defaults to "hdf5".
+        **kwargs:
+            Keyword arguments passed to stockdaq.data.data.Data.save(),
+            e.g. compression="zstd" for parquet files.
         """
-        data_dict = stockdaq.data.manager.segmenter(
-            dataframe=self.dataframe,
-            criterion=criterion,
+        if extension is None:
+            extension = stockdaq.data.data.extensions[format]
+        file_dict = self.partition(
+            criterion=criterion, prefix=prefix, suffix=suffix,
+            extension=extension
             )
-        for key in data_dict.keys():
-            data = data_dict[key]
-            filename = prefix+key+suffix+extension
+        for filename, data in file_dict.items():
             data.save(
-                path=filename, format="hdf5", conflict=conflict,
-                mergehow=mergehow
+                path=filename, format=format, conflict=conflict,
+                mergehow=mergehow, **kwargs
                 )
+
+    def partition(self, criterion="date", prefix="", suffix="",
+                  extension=".h5", dataframe=None):
+        """Split self.dataframe into files, names derive from criterion.
+
+        Parameters
+        ----------
+        criterion: str, optional
+            Data in same file has same "year", "month", "week", "date"
+            or "hour". "none" puts all data in one file named "all".
+            Defaults to date.
+        prefix: str, optional
+            Prefix to the filename.
+        suffix: str, optional
+            suffix to the filename, before the extension.
+        extension: str, optional
+            Extension of the files.
+            Defaults to ".h5".
+        dataframe: pandas.core.frame.DataFrame, optional
+            The data to be split.
+            Defaults to None, i.e. self.dataframe.
+
+        Returns
+        -------
+        file_dict: dict of stockdaq.data.data.Data
+            {"filename": stockdaq.data.data.Data} pairs.
+        """
+        if dataframe is None:
+            dataframe = self.dataframe
+        data_dict = stockdaq.data.manager.segmenter(
+            dataframe=dataframe,
+            criterion=criterion,
+            )
+        file_dict = {}
+        for key, data in data_dict.items():
+            file_dict[prefix+key+suffix+extension] = data
+        return file_dict
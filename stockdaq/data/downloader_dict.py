@@ -1,7 +1,11 @@
 import stockdaq.data.alpha_vantage_downloader as av_downloader
+import stockdaq.data.mock_downloader
 import stockdaq.data.yfinance_downloader
 
 downloader_dict = {
     "Alpha Vantage": av_downloader.AlphaVantageDownloader,
     "yfinance": stockdaq.data.yfinance_downloader.yfinanceDownloader,
+    "Mock Alpha Vantage": (
+        stockdaq.data.mock_downloader.MockAlphaVantageDownloader),
+    "Mock yfinance": stockdaq.data.mock_downloader.MockyfinanceDownloader,
 }
@@ -0,0 +1,213 @@
+"""Parallel loader of many data files.
+"""
+import concurrent.futures
+import functools
+import multiprocessing
+import os
+import threading
+
+import stockdaq.data.data
+import stockdaq.data.database
+from stockdaq.logger import logger
+
+
+class BulkLoader:
+    """Read many data files in parallel on a thread or process pool.
+
+    Parquet and memmap files are read on threads, as the readers release
+    the GIL. HDF5 reads are serialized by stockdaq.data.data.hdf5_lock in
+    each process, so HDF5 files are read on processes.
+
+    Parameters
+    ----------
+    workers: int, optional
+        Number of workers.
+        Defaults to None, i.e. the number of CPUs.
+    executor: str, optional
+        "thread" or "process".
+        Defaults to None, i.e. "process" for HDF5 files and "thread" for
+        the other formats.
+    cache: stockdaq.data.data_cache.DataCache, optional
+        Read the files through this cache. Only used on threads.
+        Defaults to None.
+
+    Attributes
+    ----------
+    workers: int
+        Number of workers.
+    executor: str or None
+        "thread" or "process", or None for the format default.
+    cache: stockdaq.data.data_cache.DataCache or None
+        The cache of the files read on threads.
+    """
+    def __init__(self, workers=None, executor=None, cache=None):
+        """Constructor
+
+        Parameters
+        ----------
+        workers: int, optional
+            Number of workers.
+            Defaults to None, i.e. the number of CPUs.
+        executor: str, optional
+            "thread" or "process".
+            Defaults to None, i.e. "process" for HDF5 files and "thread"
+            for the other formats.
+        cache: stockdaq.data.data_cache.DataCache, optional
+            Read the files through this cache. Only used on threads.
+            Defaults to None.
+        """
+        if executor not in [None, "thread", "process"]:
+            raise ValueError("executor: {} not available.".format(executor))
+        if workers is None:
+            workers = os.cpu_count() or 1
+        self.workers = workers
+        self.executor = executor
+        self.cache = cache
+        self._executors = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def get_kind(self, paths, format=None):
+        """Get the kind of executor reading files.
+
+        Parameters
+        ----------
+        paths: list of str
+            Paths of the files.
+        format: str, optional
+            The format of the files.
+            Defaults to None, i.e. from the extensions.
+
+        Returns
+        -------
+        str
+            "thread" or "process".
+        """
+        if self.executor is not None:
+            return self.executor
+        if format is not None:
+            formats = {format}
+        else:
+            formats = {
+                "parquet" if os.path.isdir(path)
+                else stockdaq.data.data.get_format(path)
+                for path in paths
+            }
+        if formats & {"hdf5", "hdf5-table"}:
+            return "process"
+        return "thread"
+
+    def get_executor(self, kind):
+        """Get the pool of a kind, made once and reused.
+
+        Parameters
+        ----------
+        kind: str
+            "thread" or "process".
+
+        Returns
+        -------
+        concurrent.futures.Executor
+            The pool.
+        """
+        with self._lock:
+            if kind not in self._executors:
+                if kind == "process":
+                    # Forked workers could inherit a held hdf5_lock.
+                    self._executors[kind] = (
+                        concurrent.futures.ProcessPoolExecutor(
+                            max_workers=self.workers,
+                            mp_context=multiprocessing.get_context("spawn")))
+                else:
+                    self._executors[kind] = (
+                        concurrent.futures.ThreadPoolExecutor(
+                            max_workers=self.workers))
+            return self._executors[kind]
+
+    def read_dataframes(self, paths, format=None, columns=None, start=None,
+                        end=None):
+        """Read data files in parallel.
+
+        Parameters
+        ----------
+        paths: list of str
+            Paths of the files.
+        format: str, optional
+            The format of the files.
+            Defaults to None, i.e. from the extensions.
+        columns: list of str, optional
+            Only read these columns, e.g. ["close"].
+            Defaults to None, i.e. all columns.
+        start: datetime.datetime, optional
+            Only read data at or after this time.
+            Defaults to None.
+        end: datetime.datetime, optional
+            Only read data before this time.
+            Defaults to None.
+
+        Returns
+        -------
+        list of pandas.core.frame.DataFrame
+            The data of the files, in the order of paths.
+        """
+        paths = list(paths)
+        kind = self.get_kind(paths=paths, format=format)
+        reader = stockdaq.data.data.read_dataframe
+        if kind == "thread" and self.cache is not None:
+            reader = self.cache.read_dataframe
+        reader = functools.partial(
+            reader, format=format, columns=columns, start=start, end=end)
+        if len(paths) <= 1 or self.workers <= 1:
+            return [reader(path) for path in paths]
+        logger.debug("Reading {} files on {} {} workers.".format(
+            len(paths), self.workers, kind))
+        return list(self.get_executor(kind).map(reader, paths))
+
+    def load(self, paths, format=None, columns=None, start=None, end=None,
+             dtypes=None):
+        """Load data files in parallel into one Data.
+
+        Parameters
+        ----------
+        paths: list of str
+            Paths of the files, in time order.
+        format: str, optional
+            The format of the files.
+            Defaults to None, i.e. from the extensions.
+        columns: list of str, optional
+            Only load these columns, e.g. ["close"].
+            Defaults to None, i.e. all columns.
+        start: datetime.datetime, optional
+            Only load data at or after this time.
+            Defaults to None.
+        end: datetime.datetime, optional
+            Only load data before this time.
+            Defaults to None.
+        dtypes: dict, optional
+            {"column": dtype} pairs of the Data,
+            see stockdaq.data.data.Data.
+            Defaults to None.
+
+        Returns
+        -------
+        stockdaq.data.data.Data
+            The data.
+        """
+        dataframes = self.read_dataframes(
+            paths=paths, format=format, columns=columns, start=start,
+            end=end)
+        return stockdaq.data.database.concatenate(
+            dataframes, columns=columns, dtypes=dtypes)
+
+    def close(self):
+        """Shut down the pools."""
+        with self._lock:
+            executors = list(self._executors.values())
+            self._executors = {}
+        for executor in executors:
+            executor.shutdown()
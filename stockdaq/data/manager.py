@@ -1,64 +1,261 @@
 """Data manager
 """
+import datetime
+import os
+
+import numpy as np
 import pandas as pd
 
 import stockdaq.data.data
 
 
+# Partition criteria: (datetime64 unit of the partition key, filename format).
+criteria = {
+    "year": ("Y", "%Y"),
+    "month": ("M", "%Y-%m"),
+    "week": ("W", "%G-W%V"),
+    "date": ("D", "%Y-%m-%d"),
+    "hour": ("h", "%Y-%m-%dT%H"),
+}
+
+
+def get_boundaries(index, criterion="date"):
+    """Get the boundaries of the partitions of a sorted datetime index.
+
+    Parameters
+    ----------
+    index: pandas.core.indexes.datetimes.DatetimeIndex
+        Sorted date and time.
+    criterion: str, optional
+        "year", "month", "week", "date", "hour" or "none".
+        Defaults to "date".
+
+    Returns
+    -------
+    keys: list of str
+        Names of the partitions, e.g. "2020-01-01" for "date",
+        "2020-W01" (ISO week) for "week" and "all" for "none".
+    starts: numpy.ndarray
+        Positions of the first rows of the partitions.
+    ends: numpy.ndarray
+        Positions after the last rows of the partitions.
+    """
+    n = len(index)
+    if criterion == "none":
+        if n == 0:
+            return [], np.array([], dtype=int), np.array([], dtype=int)
+        return ["all"], np.array([0]), np.array([n])
+    if criterion not in criteria:
+        raise ValueError("{} criterion not avaiable.".format(criterion))
+    unit, key_format = criteria[criterion]
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    values = index.values
+    if unit == "W":
+        # The epoch is a Thursday, shift by 3 days so weeks start on Monday.
+        codes = (values.astype("datetime64[D]").astype(np.int64)+3) // 7
+    else:
+        codes = values.astype("datetime64[{}]".format(unit))
+    changes = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+    starts = np.concatenate([[0], changes]) if n else changes
+    ends = np.concatenate([changes, [n]]) if n else changes
+    keys = list(index[starts].strftime(key_format))
+    return keys, starts, ends
+
+
 def segmenter(dataframe, criterion="date"):
     """Split dataframe into multiple stockdaq.data.data.Data objects
 
+    Partition boundaries are found from the sorted index without looping
+    over the rows, and the Data objects are made from slices (views) of
+    the columns.
+
     Parameters
     ----------
     dataframe: pandas.core.frame.DataFrame
         Dataframe
     criterion: str
-        "date" or "year"
+        "year", "month", "week", "date", "hour" or "none".
+        "none" puts all data in one partition.
 
     Returns
     -------
     data_dict: dict of stockdaq.data.data.Data
-        {"date" or "year": stockdaq.data.data.Data} pair
+        {"year", "month", "week", "date", "hour" or "all":
+        stockdaq.data.data.Data} pairs.
         For example {"2020-01-01": ..., "2020-01-02": ..., ...}.
     """
-    dates = []  # Not technically date, just the string version\
-        # of the datetime column.
-    slice_indexes = []
+    if not dataframe.index.is_monotonic_increasing:
+        dataframe = dataframe.sort_index()
+    index = pd.DatetimeIndex(dataframe.index)
+    keys, starts, ends = get_boundaries(index=index, criterion=criterion)
+    columns = [dataframe[column].to_numpy(copy=False)
+               for column in stockdaq.data.data.header]
     data_dict = {}
-    for i in range(len(dataframe.index)):
-        if criterion == "date":
-            date = str(dataframe.index[i].date())
-        elif criterion == "year":
-            date = str(dataframe.index[i].year)
-        else:
-            raise ValueError("{} criterion not avaiable.".format(criterion))
-        if date not in dates:
-            dates.append(date)
-            slice_indexes.append(i)
-    slice_indexes.append(len(dataframe.index))
-
-    for i in range(len(dates)):
-        begin = slice_indexes[i]
-        end = slice_indexes[i+1]
-        datetime_column = dataframe.index[begin:end]
-        open_ = dataframe.open.values[begin:end]
-        high = dataframe.high.values[begin:end]
-        low = dataframe.low.values[begin:end]
-        close = dataframe.close.values[begin:end]
-        volume = dataframe.volume.values[begin:end]
+    for key, begin, end in zip(keys, starts, ends):
+        open_, high, low, close, volume = [
+            column[begin:end] for column in columns]
         data = stockdaq.data.data.Data(
-            datetime_column=datetime_column,
+            datetime_column=index[begin:end],
             open_=open_,
             high=high,
             low=low,
             close=close,
             volume=volume,
         )
-        data_dict[dates[i]] = data
+        data_dict[key] = data
 
     return data_dict
 
 
+def get_partition_range(key):
+    """Get the time range of a partition from its name.
+
+    Parameters
+    ----------
+    key: str
+        Name of the partition, see segmenter(), e.g. "2020-01-01".
+
+    Returns
+    -------
+    start: pandas.Timestamp or None
+        Start time of the partition, inclusive.
+        None if the range is unknown, e.g. "all".
+    end: pandas.Timestamp or None
+        End time of the partition, exclusive.
+        None if the range is unknown.
+    """
+    try:
+        if len(key) == 4:  # year
+            start = pd.Timestamp(year=int(key), month=1, day=1)
+            return start, start + pd.DateOffset(years=1)
+        elif len(key) == 7:  # month
+            start = pd.Timestamp(key+"-01")
+            return start, start + pd.DateOffset(months=1)
+        elif len(key) == 8 and key[5] == "W":  # ISO week
+            start = pd.Timestamp(datetime.date.fromisocalendar(
+                int(key[:4]), int(key[6:]), 1))
+            return start, start + pd.Timedelta(days=7)
+        elif len(key) == 10:  # date
+            start = pd.Timestamp(key)
+            return start, start + pd.Timedelta(days=1)
+        elif len(key) == 13 and key[10] == "T":  # hour
+            start = pd.Timestamp(key+":00")
+            return start, start + pd.Timedelta(hours=1)
+    except ValueError:
+        pass
+    return None, None
+
+
+def get_prefix(root_dir, file_structure, symbol, frequency):
+    """Get the directory of the data of a symbol and frequency.
+
+    Parameters
+    ----------
+    root_dir: str
+        The root directory of the database.
+    file_structure: list of str
+        The directory structure, e.g. ["symbol", "frequency", "data"].
+    symbol: str
+        The stock symbol.
+    frequency: str
+        "intraday", "daily", "weekly", "monthly".
+
+    Returns
+    -------
+    prefix: str
+        The prefix of the file path.
+    """
+    prefix = root_dir+""
+    for folder in file_structure:
+        if folder == "data":
+            break
+        elif folder == "frequency":
+            prefix += frequency+"/"
+        elif folder == "symbol":
+            prefix += symbol+"/"
+        else:
+            raise ValueError("{} structure not available.".format(folder))
+    return prefix
+
+
+def get_latest_timestamp(directory, prefix="", suffix="", extension=".h5"):
+    """Get the newest timestamp stored in a directory of data files.
+
+    Files are named by the segmenter criterion, so the newest data are in
+    the last file in sorted order. Only the ends of the stored index are
+    read.
+
+    Parameters
+    ----------
+    directory: str
+        The directory of the data files.
+    prefix: str, optional
+        Prefix to the filenames.
+    suffix: str, optional
+        suffix to the filenames, before the extension.
+    extension: str, optional
+        Extension of the files.
+        Defaults to ".h5".
+
+    Returns
+    -------
+    datetime.datetime or None
+        The newest timestamp. None if there is no data.
+    """
+    if not os.path.isdir(directory):
+        return None
+    filenames = sorted(
+        filename for filename in os.listdir(directory)
+        if filename.startswith(prefix)
+        and filename.endswith(suffix+extension)
+        )
+    for filename in reversed(filenames):
+        _, last = stockdaq.data.data.get_index_bounds(
+            path=os.path.join(directory, filename))
+        if last is not None:
+            return last.to_pydatetime()
+    return None
+
+
+def is_current(timestamp, frequency, now=None):
+    """Check if the stored data are up to date.
+
+    Intraday and daily data are up to date if they include the previous
+    business day. Weekly and monthly data are up to date if the last data
+    point is less than a week or a month old.
+
+    Parameters
+    ----------
+    timestamp: datetime.datetime or None
+        The newest timestamp stored.
+    frequency: str
+        "intraday", "daily", "weekly", "monthly".
+    now: datetime.datetime, optional
+        The current time.
+        Defaults to datetime.datetime.now().
+
+    Returns
+    -------
+    boolean
+        True if no newer complete data are available.
+    """
+    if timestamp is None:
+        return False
+    if now is None:
+        now = datetime.datetime.now()
+    if frequency in ["intraday", "daily"]:
+        previous_business_day = np.busday_offset(
+            now.date(), -1, roll="forward")
+        return np.datetime64(timestamp.date()) >= previous_business_day
+    elif frequency == "weekly":
+        return now - timestamp < datetime.timedelta(days=7)
+    elif frequency == "monthly":
+        return now - timestamp < datetime.timedelta(days=31)
+    else:
+        raise ValueError("{} frequency not available.".format(frequency))
+
+
 def extended_trading_splitter(dataframe, begin="9:30", end="15:59"):
     """Divide data into three segments: premkt, open, aftermkt.
 
@@ -0,0 +1,247 @@
+"""Memory-mapped columnar binary format.
+
+A file is a small header followed by each column stored as a raw
+contiguous array:
+
+    magic (8 bytes) | header size (8 bytes, little endian) | JSON header |
+    padding | datetime column | padding | open | ... | volume
+
+The JSON header has the number of rows and the name, dtype and byte
+offset of each column, relative to the end of the header. The end of the
+header and the columns are aligned to 64 bytes. The datetime column holds
+int64 nanoseconds since the epoch.
+
+Loading maps the file into memory, so columns are views of the file and
+load time does not depend on file size. The same layout is used for
+shared memory, see stockdaq.data.shared_store.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import stockdaq.constants
+
+
+magic = b"SDQMMAP1"
+alignment = 64
+
+
+def write(dataframe, path):
+    """Write a dataframe to a memory-mapped columnar file.
+
+    The file is written to a temporary file first and then replaces the
+    old file, so readers that have the old file mapped are not affected.
+
+    Parameters
+    ----------
+    dataframe: pandas.core.frame.DataFrame
+        Data in stockdaq standardized format.
+    path: str
+        The path of the file.
+    """
+    prologue, arrays, size = pack(dataframe)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(prologue)
+        for offset, array in arrays:
+            f.seek(offset)
+            f.write(array.tobytes())
+        f.truncate(size)
+    os.replace(tmp_path, path)
+
+
+def pack(dataframe):
+    """Lay out a dataframe in the columnar format.
+
+    Parameters
+    ----------
+    dataframe: pandas.core.frame.DataFrame
+        Data in stockdaq standardized format.
+
+    Returns
+    -------
+    prologue: bytes
+        The magic, header size and header.
+    arrays: list of tuple
+        (byte offset, array) pairs of the columns.
+    size: int
+        Total size (bytes).
+    """
+    index = pd.DatetimeIndex(dataframe.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    arrays = [("datetime", index.as_unit("ns").asi8)]
+    for column in stockdaq.constants.columns:
+        if column not in dataframe.columns:
+            continue
+        array = dataframe[column].to_numpy()
+        arrays.append((column, np.ascontiguousarray(array)))
+
+    columns = []
+    offset = 0
+    for name, array in arrays:
+        columns.append([name, array.dtype.str, offset])
+        offset = _align(offset + array.nbytes)
+    header = json.dumps({"rows": len(index), "columns": columns}).encode()
+    base = _align(len(magic) + 8 + len(header))
+    prologue = magic + len(header).to_bytes(8, "little") + header
+    return (
+        prologue,
+        [(base + offset, array)
+         for (_, array), (_, _, offset) in zip(arrays, columns)],
+        base + offset)
+
+
+def read_header(path):
+    """Read the header of a memory-mapped columnar file.
+
+    Parameters
+    ----------
+    path: str
+        The path of the file.
+
+    Returns
+    -------
+    dict
+        {"rows": number of rows, "columns": [[name, dtype, offset], ...],
+        "base": byte offset of the end of the header}.
+    """
+    with open(path, "rb") as f:
+        prologue = f.read(len(magic) + 8)
+        if prologue[:len(magic)] != magic:
+            raise ValueError("{} is not a memmap data file.".format(path))
+        header_size = int.from_bytes(prologue[len(magic):], "little")
+        header = json.loads(f.read(header_size))
+    header["base"] = _align(len(magic) + 8 + header_size)
+    return header
+
+
+def read_buffer(buffer, columns=None, name="buffer"):
+    """Get views of the columns in a buffer in the columnar format.
+
+    Parameters
+    ----------
+    buffer: buffer
+        The buffer, e.g. a numpy.memmap or a memoryview.
+    columns: list of str, optional
+        The columns to be read.
+        Defaults to None, i.e. all columns.
+    name: str, optional
+        Name of the buffer in error messages.
+        Defaults to "buffer".
+
+    Returns
+    -------
+    index: pandas.core.indexes.datetimes.DatetimeIndex
+        Date and time, a view of the buffer.
+    arrays: dict of numpy.ndarray
+        {"column": array} pairs, views of the buffer.
+    """
+    buffer = np.frombuffer(buffer, dtype=np.uint8)
+    if bytes(buffer[:len(magic)]) != magic:
+        raise ValueError("{} is not a memmap data buffer.".format(name))
+    header_size = int.from_bytes(
+        bytes(buffer[len(magic):len(magic)+8]), "little")
+    begin = len(magic) + 8
+    header = json.loads(bytes(buffer[begin:begin+header_size]))
+    rows = header["rows"]
+    base = _align(begin + header_size)
+    arrays = {}
+    for column, dtype, offset in header["columns"]:
+        if (columns is not None and column != "datetime"
+                and column not in columns):
+            continue
+        dtype = np.dtype(dtype)
+        begin = base + offset
+        arrays[column] = buffer[begin:begin+rows*dtype.itemsize].view(dtype)
+    index = pd.DatetimeIndex(
+        arrays.pop("datetime").view("datetime64[ns]"), copy=False)
+    return index, arrays
+
+
+def read(path, columns=None):
+    """Map the columns of a memory-mapped columnar file.
+
+    Parameters
+    ----------
+    path: str
+        The path of the file.
+    columns: list of str, optional
+        The columns to be mapped.
+        Defaults to None, i.e. all columns.
+
+    Returns
+    -------
+    index: pandas.core.indexes.datetimes.DatetimeIndex
+        Date and time, a view of the file.
+    arrays: dict of numpy.ndarray
+        {"column": array} pairs, read-only views of the file.
+    """
+    return read_buffer(
+        np.memmap(path, dtype=np.uint8, mode="r"), columns=columns,
+        name=path)
+
+
+def read_dataframe(path, columns=None, start=None, end=None):
+    """Read a memory-mapped columnar file as a dataframe.
+
+    The time range is found by binary search, so the dataframe is a view
+    of the file.
+
+    Parameters
+    ----------
+    path: str
+        The path of the file.
+    columns: list of str, optional
+        The columns to be read.
+        Defaults to None, i.e. all columns.
+    start: datetime.datetime, optional
+        Only read data at or after this time.
+        Defaults to None.
+    end: datetime.datetime, optional
+        Only read data before this time.
+        Defaults to None.
+
+    Returns
+    -------
+    pandas.core.frame.DataFrame
+        The data.
+    """
+    index, arrays = read(path, columns=columns)
+    begin = 0
+    stop = len(index)
+    if start is not None:
+        begin = index.searchsorted(pd.Timestamp(start), side="left")
+    if end is not None:
+        stop = index.searchsorted(pd.Timestamp(end), side="left")
+    return pd.DataFrame(
+        {name: array[begin:stop] for name, array in arrays.items()},
+        index=index[begin:stop], copy=False)
+
+
+def get_index_bounds(path):
+    """Read the first and last timestamps of a memory-mapped file.
+
+    Parameters
+    ----------
+    path: str
+        The path of the file.
+
+    Returns
+    -------
+    first: pandas.Timestamp or None
+        The first timestamp. None if the file has no data.
+    last: pandas.Timestamp or None
+        The last timestamp. None if the file has no data.
+    """
+    index, _ = read(path, columns=[])
+    if len(index) == 0:
+        return None, None
+    return index[0], index[-1]
+
+
+def _align(offset):
+    """Round offset up to a multiple of the alignment."""
+    return -(-offset // alignment) * alignment
@@ -0,0 +1,263 @@
+"""Downloaders of the local mock provider server.
+
+See stockdaq.data.mock_server.
+"""
+import pandas as pd
+import requests
+
+import stockdaq.data.alpha_vantage_downloader as av_downloader
+import stockdaq.data.session
+import stockdaq.data.yfinance_downloader
+
+
+default_url = "http://127.0.0.1:8765"
+
+
+class MockTimeSeries(av_downloader.SessionTimeSeries):
+    """Alpha Vantage timeseries calling the mock provider server.
+
+    Parameters
+    ----------
+    *args:
+        Arguments passed to SessionTimeSeries.
+    base_url: str, optional
+        Base URL of the mock provider server.
+        Defaults to "http://127.0.0.1:8765".
+    **kwargs:
+        Keyword arguments passed to SessionTimeSeries.
+
+    Attributes
+    ----------
+    base_url: str
+        Base URL of the mock provider server.
+    """
+    def __init__(self, *args, base_url=default_url, **kwargs):
+        """Constructor
+
+        Parameters
+        ----------
+        *args:
+            Arguments passed to SessionTimeSeries.
+        base_url: str, optional
+            Base URL of the mock provider server.
+            Defaults to "http://127.0.0.1:8765".
+        **kwargs:
+            Keyword arguments passed to SessionTimeSeries.
+        """
+        super().__init__(*args, **kwargs)
+        self.base_url = base_url
+
+    def _handle_api_call(self, url):
+        """Call the mock provider server instead of Alpha Vantage.
+
+        Parameters
+        ----------
+        url: str
+            The url of the Alpha Vantage service.
+
+        Returns
+        -------
+        dict
+            The json response.
+        """
+        url = url.replace(
+            self._ALPHA_VANTAGE_API_URL, self.base_url+"/query?", 1)
+        return super()._handle_api_call(url)
+
+
+class MockAlphaVantageDownloader(av_downloader.AlphaVantageDownloader):
+    """Alpha Vantage downloader using the mock provider server.
+
+    Parameters
+    ----------
+    apikey: str, optional
+        Dummy API key.
+        Defaults to "mock".
+    output_format: str, optional
+        The output_format of the getters.
+        Only "pandas" avilable now.
+    session: requests.Session, optional
+        The HTTP session used for API calls.
+        Defaults to None.
+
+    Attributes
+    ----------
+    base_url: str
+        Base URL of the mock provider server, a class attribute.
+        Defaults to "http://127.0.0.1:8765".
+    """
+    base_url = default_url
+
+    def __init__(self, apikey="mock", output_format="pandas", session=None):
+        """Constructor
+
+        Parameters
+        ----------
+        apikey: str, optional
+            Dummy API key.
+            Defaults to "mock".
+        output_format: str, optional
+            The output_format of the getters.
+            Only "pandas" avilable now.
+        session: requests.Session, optional
+            The HTTP session used for API calls.
+            Defaults to None.
+        """
+        super().__init__(
+            apikey=apikey or "mock", output_format=output_format)
+        self.api = "Mock Alpha Vantage"
+        self.ts = MockTimeSeries(
+            key=self.apikey, output_format=self.output_format,
+            base_url=self.base_url)
+        self.set_session(session)
+
+
+class MockyfinanceDownloader(stockdaq.data.yfinance_downloader.
+                             yfinanceDownloader):
+    """yfinance downloader using the mock provider server.
+
+    The chart endpoint of the server is called directly and the response
+    is converted to the yfinance.download() format.
+
+    Parameters
+    ----------
+    apikey: str, optional
+        Dummy keyholder.
+    session: requests.Session, optional
+        The HTTP session used for API calls.
+        Defaults to None, i.e. a new connection for each call.
+
+    Attributes
+    ----------
+    base_url: str
+        Base URL of the mock provider server, a class attribute.
+        Defaults to "http://127.0.0.1:8765".
+    """
+    base_url = default_url
+
+    def __init__(self, apikey="", session=None):
+        """Constructor
+
+        Parameters
+        ----------
+        apikey: str, optional
+            Dummy keyholder.
+        session: requests.Session, optional
+            The HTTP session used for API calls.
+            Defaults to None, i.e. a new connection for each call.
+        """
+        super().__init__(apikey=apikey, session=session)
+        self.api = "Mock yfinance"
+
+    @classmethod
+    def make_session(cls, pool_size=10, timeout=30, retries=0):
+        """Make a pooled keep-alive HTTP session.
+
+        See stockdaq.data.session.make_session().
+        """
+        return stockdaq.data.session.make_session(
+            pool_size=pool_size, timeout=timeout, retries=retries)
+
+    def fetch_api(self, symbol, frequency="intraday", since=None,
+                  group_by="column", **kwargs):
+        """Get raw data from the mock provider server, set self.rawdata
+
+        Parameters
+        ----------
+        symbol: str or list of str
+            Stock symbol, or a list of symbols for a batch download.
+        frequency: str, optional
+            "intraday", "daily", "weekly", "monthly".
+        since: datetime.datetime, optional
+            Only data newer than this are needed.
+            Defaults to None.
+        group_by: str, optional
+            "ticker" to get (ticker, field) columns for a list of symbols.
+            Defaults to "column".
+        **kwargs:
+            Ignored yfinance.download() keyword arguments.
+
+        Returns
+        -------
+        pandas.core.frame.DataFrame
+            The raw data, like yfinance.download().
+        """
+        params = {}
+        if frequency == "intraday":
+            params["interval"] = "1m"
+            params["range"] = "7d"
+        elif frequency == "daily":
+            params["interval"] = "1d"
+        elif frequency == "weekly":
+            params["interval"] = "1wk"
+        elif frequency == "monthly":
+            params["interval"] = "1mo"
+        else:
+            raise ValueError("{} frequency not available".format(frequency))
+        if since is not None:
+            params.pop("range", None)
+            params["period1"] = int(pd.Timestamp(
+                since.date(), tz="America/New_York").timestamp())
+        else:
+            params.setdefault("range", "max")
+
+        if isinstance(symbol, str):
+            self.rawdata = self.get_chart(symbol=symbol, params=params)
+            return self.rawdata
+        dataframes = {}
+        for symbol_ in symbol:
+            try:
+                dataframes[symbol_] = self.get_chart(
+                    symbol=symbol_, params=params)
+            except ValueError:
+                continue
+        if not dataframes:
+            self.rawdata = pd.DataFrame()
+        else:
+            self.rawdata = pd.concat(dataframes, axis=1)
+            if group_by != "ticker":
+                self.rawdata = self.rawdata.swaplevel(axis=1)
+        return self.rawdata
+
+    def get_chart(self, symbol, params):
+        """Get the chart of a symbol from the mock provider server.
+
+        Parameters
+        ----------
+        symbol: str
+            Stock symbol.
+        params: dict
+            Query parameters of the chart request.
+
+        Returns
+        -------
+        pandas.core.frame.DataFrame
+            Dataframe with "Open", "High", "Low", "Close", "Adj Close" and
+            "Volume" columns and a timezone aware index.
+        """
+        url = "{}/v8/finance/chart/{}".format(self.base_url, symbol)
+        if self.session is not None:
+            response = self.session.get(url, params=params)
+        else:
+            response = requests.get(url, params=params)
+        if response.status_code == 429:
+            raise ValueError("429 Too Many Requests for url: {}".format(url))
+        if response.status_code >= 500:
+            response.raise_for_status()
+        chart = response.json()["chart"]
+        if chart["error"] is not None:
+            raise ValueError("{}: {}".format(
+                symbol, chart["error"]["description"]))
+        result = chart["result"][0]
+        quote = result["indicators"]["quote"][0]
+        index = pd.to_datetime(
+            result["timestamp"], unit="s", utc=True).tz_convert(
+                result["meta"]["exchangeTimezoneName"])
+        return pd.DataFrame({
+            "Open": quote["open"],
+            "High": quote["high"],
+            "Low": quote["low"],
+            "Close": quote["close"],
+            "Adj Close": result["indicators"]["adjclose"][0]["adjclose"],
+            "Volume": quote["volume"],
+        }, index=pd.DatetimeIndex(index, name="Datetime"))
@@ -0,0 +1,445 @@
+"""Local mock of the Alpha Vantage and Yahoo Finance APIs.
+
+Serves recorded or synthetic data with configurable latency, error rate
+and rate limit, so data acquisition can be tested and benchmarked offline
+without spending API quota.
+"""
+import datetime
+import http.server
+import json
+import os
+import random
+import threading
+import time
+import urllib.parse
+import zlib
+
+import numpy as np
+import pandas as pd
+
+import stockdaq.acquisiter.rate_limiter
+from stockdaq.logger import logger
+
+
+# Shipped as package data, see setup.py.
+sample_data_path = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "samples", "alpha_vantage_intraday_sample_data.h5")
+
+# Alpha Vantage functions: (frequency, data key)
+alpha_vantage_functions = {
+    "TIME_SERIES_INTRADAY": ("intraday", "Time Series ({interval})"),
+    "TIME_SERIES_DAILY": ("daily", "Time Series (Daily)"),
+    "TIME_SERIES_WEEKLY": ("weekly", "Weekly Time Series"),
+    "TIME_SERIES_MONTHLY": ("monthly", "Monthly Time Series"),
+}
+
+# Yahoo Finance intervals: frequency
+yahoo_intervals = {
+    "1m": "intraday",
+    "1d": "daily",
+    "1wk": "weekly",
+    "1mo": "monthly",
+}
+
+# Yahoo Finance ranges: days
+yahoo_ranges = {
+    "1d": 1, "5d": 5, "7d": 7, "1mo": 31, "3mo": 92, "6mo": 183,
+    "1y": 366, "2y": 731, "5y": 1827, "10y": 3653, "ytd": 366,
+}
+
+alpha_vantage_throttle_note = (
+    "Thank you for using Alpha Vantage! Our standard API call frequency is "
+    "5 calls per minute and 500 calls per day.")
+
+
+class MockProviderServer:
+    """Local HTTP server mimicking the Alpha Vantage and Yahoo Finance APIs.
+
+    Alpha Vantage requests are served at "/query" and Yahoo Finance chart
+    requests at "/v8/finance/chart/<symbol>".
+    Intraday data are the recorded sample data, scaled for each symbol and
+    shifted to the last weeks. Daily, weekly and monthly data are
+    a random walk seeded by the symbol.
+
+    Parameters
+    ----------
+    host: str, optional
+        Host of the server.
+        Defaults to "127.0.0.1".
+    port: int, optional
+        Port of the server. 0 picks a free port.
+        Defaults to 8765.
+    latency: float, optional
+        Delay (seconds) before each response.
+        Defaults to 0.
+    latency_jitter: float, optional
+        Random extra delay (seconds), uniformly distributed between 0 and
+        latency_jitter.
+        Defaults to 0.
+    error_rate: float, optional
+        Fraction of requests answered with "500 Internal Server Error".
+        Defaults to 0.
+    rate_limit: float, optional
+        Requests per minute allowed for each API. Exceeding requests get
+        the throttling response of the API.
+        Defaults to None, i.e. no rate limit.
+    missing_symbols: list of str, optional
+        Symbols answered with the "not found" response of the API.
+        Defaults to [].
+    sample_path: str, optional
+        Path to the recorded Alpha Vantage intraday data.
+        Defaults to sample_data_path, the data shipped with stockdaq.
+    seed: int, optional
+        Seed of the random errors and latency.
+        Defaults to None.
+
+    Attributes
+    ----------
+    url: str
+        Base URL of the server.
+    requests: int
+        Number of requests served.
+    errors: int
+        Number of requests answered with an error.
+    throttled: int
+        Number of requests throttled.
+    """
+    def __init__(self, host="127.0.0.1", port=8765, latency=0.,
+                 latency_jitter=0., error_rate=0., rate_limit=None,
+                 missing_symbols=[], sample_path=None, seed=None):
+        """Constructor
+
+        Parameters
+        ----------
+        host: str, optional
+            Host of the server.
+            Defaults to "127.0.0.1".
+        port: int, optional
+            Port of the server. 0 picks a free port.
+            Defaults to 8765.
+        latency: float, optional
+            Delay (seconds) before each response.
+            Defaults to 0.
+        latency_jitter: float, optional
+            Random extra delay (seconds), uniformly distributed between 0
+            and latency_jitter.
+            Defaults to 0.
+        error_rate: float, optional
+            Fraction of requests answered with "500 Internal Server Error".
+            Defaults to 0.
+        rate_limit: float, optional
+            Requests per minute allowed for each API. Exceeding requests get
+            the throttling response of the API.
+            Defaults to None, i.e. no rate limit.
+        missing_symbols: list of str, optional
+            Symbols answered with the "not found" response of the API.
+            Defaults to [].
+        sample_path: str, optional
+            Path to the recorded Alpha Vantage intraday data.
+            Defaults to sample_data_path, the data shipped with stockdaq.
+        seed: int, optional
+            Seed of the random errors and latency.
+            Defaults to None.
+        """
+        if sample_path is None:
+            sample_path = sample_data_path
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.missing_symbols = set(missing_symbols)
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._buckets = {}
+        if rate_limit:
+            for api in ["Alpha Vantage", "Yahoo Finance"]:
+                self._buckets[api] = (
+                    stockdaq.acquisiter.rate_limiter.TokenBucket(
+                        capacity=1, period=60/rate_limit))
+        self._sample = self._load_sample(sample_path)
+
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = http.server.ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.url = "http://{}:{}".format(*self.httpd.server_address[:2])
+        self._thread = None
+
+    def start(self):
+        """Serve requests in a background thread."""
+        self._thread = threading.Thread(
+            target=self.httpd.serve_forever, name="stockdaq-mock-server",
+            daemon=True)
+        self._thread.start()
+        logger.info("Mock provider server listening at {}.".format(self.url))
+
+    def serve_forever(self):
+        """Serve requests until interrupted."""
+        logger.info("Mock provider server listening at {}.".format(self.url))
+        try:
+            self.httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.httpd.server_close()
+
+    def stop(self):
+        """Stop the server."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def handle(self, request):
+        """Answer a request.
+
+        Parameters
+        ----------
+        request: http.server.BaseHTTPRequestHandler
+            The request.
+        """
+        url = urllib.parse.urlparse(request.path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        with self._lock:
+            self.requests += 1
+            delay = self.latency
+            if self.latency_jitter:
+                delay += self._random.uniform(0, self.latency_jitter)
+            error = self._random.random() < self.error_rate
+        if delay > 0:
+            time.sleep(delay)
+        if error:
+            with self._lock:
+                self.errors += 1
+            self._send(request, 500, "Internal Server Error")
+            return
+        if url.path == "/query":
+            self.handle_alpha_vantage(request, query)
+        elif url.path.startswith("/v8/finance/chart/"):
+            symbol = urllib.parse.unquote(url.path.rsplit("/", 1)[-1])
+            self.handle_yahoo(request, symbol, query)
+        else:
+            self._send(request, 404, "Not Found")
+
+    def handle_alpha_vantage(self, request, query):
+        """Answer an Alpha Vantage time series request.
+
+        Parameters
+        ----------
+        request: http.server.BaseHTTPRequestHandler
+            The request.
+        query: dict
+            The query parameters.
+        """
+        if self._throttle("Alpha Vantage"):
+            self._send_json(request, 200, {"Note": alpha_vantage_throttle_note})
+            return
+        function = query.get("function")
+        symbol = query.get("symbol")
+        if (function not in alpha_vantage_functions
+                or symbol is None or symbol in self.missing_symbols):
+            self._send_json(request, 200, {
+                "Error Message": "Invalid API call. Please retry or visit "
+                                 "the documentation for {}.".format(function)
+            })
+            return
+        frequency, data_key = alpha_vantage_functions[function]
+        interval = query.get("interval", "1min")
+        dataframe = self.get_data(symbol=symbol, frequency=frequency)
+        outputsize = query.get("outputsize", "compact")
+        if frequency in ["weekly", "monthly"]:
+            outputsize = "full"
+        if frequency == "intraday" and interval != "1min":
+            dataframe = dataframe.resample(interval).agg({
+                "open": "first", "high": "max", "low": "min",
+                "close": "last", "volume": "sum"}).dropna()
+        if outputsize == "compact":
+            dataframe = dataframe.iloc[-100:]
+        time_format = "%Y-%m-%d"
+        if frequency == "intraday":
+            time_format = "%Y-%m-%d %H:%M:%S"
+        columns = ["1. open", "2. high", "3. low", "4. close", "5. volume"]
+        series = {}
+        for timestamp, row in zip(
+                dataframe.index[::-1].strftime(time_format),
+                dataframe.values[::-1]):
+            series[timestamp] = {
+                column: "{:.4f}".format(value)
+                for column, value in zip(columns, row)
+            }
+        self._send_json(request, 200, {
+            "Meta Data": {
+                "1. Information": "Mock {} time series".format(frequency),
+                "2. Symbol": symbol,
+                "3. Last Refreshed": dataframe.index[-1].strftime(
+                    time_format),
+                "4. Output Size": outputsize,
+                "5. Time Zone": "US/Eastern",
+            },
+            data_key.format(interval=interval): series,
+        })
+
+    def handle_yahoo(self, request, symbol, query):
+        """Answer a Yahoo Finance chart request.
+
+        Parameters
+        ----------
+        request: http.server.BaseHTTPRequestHandler
+            The request.
+        symbol: str
+            The stock symbol.
+        query: dict
+            The query parameters.
+        """
+        if self._throttle("Yahoo Finance"):
+            self._send(request, 429, "Too Many Requests")
+            return
+        frequency = yahoo_intervals.get(query.get("interval", "1d"))
+        if frequency is None or symbol in self.missing_symbols:
+            self._send_json(request, 404, {"chart": {
+                "result": None,
+                "error": {
+                    "code": "Not Found",
+                    "description": "No data found, symbol may be delisted",
+                },
+            }})
+            return
+        dataframe = self.get_data(symbol=symbol, frequency=frequency)
+        timestamps = dataframe.index.tz_localize("America/New_York")
+        if "period1" in query:
+            start = pd.Timestamp(int(query["period1"]), unit="s", tz="UTC")
+            mask = timestamps >= start
+            if "period2" in query:
+                end = pd.Timestamp(int(query["period2"]), unit="s", tz="UTC")
+                mask &= timestamps < end
+        else:
+            days = yahoo_ranges.get(query.get("range", "max"))
+            mask = np.ones(len(timestamps), dtype=bool)
+            if days is not None:
+                mask = timestamps >= (
+                    timestamps[-1] - pd.Timedelta(days=days))
+        dataframe = dataframe[mask]
+        timestamps = timestamps[mask]
+        quote = {
+            column: [float(value) for value in dataframe[column].values]
+            for column in ["open", "high", "low", "close", "volume"]
+        }
+        self._send_json(request, 200, {"chart": {
+            "result": [{
+                "meta": {
+                    "symbol": symbol,
+                    "currency": "USD",
+                    "exchangeTimezoneName": "America/New_York",
+                    "dataGranularity": query.get("interval", "1d"),
+                },
+                "timestamp": [
+                    int(value) for value in timestamps.as_unit("s").asi8],
+                "indicators": {
+                    "quote": [quote],
+                    "adjclose": [{"adjclose": quote["close"]}],
+                },
+            }],
+            "error": None,
+        }})
+
+    def get_data(self, symbol, frequency):
+        """Get the mock data of a symbol.
+
+        Parameters
+        ----------
+        symbol: str
+            The stock symbol.
+        frequency: str
+            "intraday", "daily", "weekly", "monthly".
+
+        Returns
+        -------
+        pandas.core.frame.DataFrame
+            Data with "open", "high", "low", "close", "volume" columns and
+            ascending US/Eastern local time index.
+        """
+        seed = zlib.crc32(symbol.encode())
+        scale = 0.1 + (seed % 1000) / 100
+        if frequency == "intraday":
+            dataframe = self._sample.copy()
+            dataframe[["open", "high", "low", "close"]] *= scale
+        else:
+            dataframe = self._random_walk(
+                seed=seed, price=100*scale, frequency=frequency)
+        return dataframe
+
+    def _load_sample(self, sample_path):
+        """Read the recorded intraday data, shifted to the last weeks."""
+        dataframe = pd.read_hdf(sample_path).sort_index()
+        dataframe.columns = ["open", "high", "low", "close", "volume"]
+        # Shift by whole weeks so weekdays are kept.
+        today = pd.Timestamp(datetime.date.today())
+        weeks = (today - dataframe.index[-1].normalize()).days // 7
+        dataframe.index = dataframe.index + pd.Timedelta(weeks=weeks)
+        return dataframe
+
+    def _random_walk(self, seed, price, frequency):
+        """Make 20 years of daily, weekly or monthly random walk data."""
+        freq = {"daily": "B", "weekly": "W-FRI", "monthly": "BME"}[frequency]
+        index = pd.date_range(
+            end=pd.Timestamp(datetime.date.today()), periods={
+                "daily": 5040, "weekly": 1040, "monthly": 240}[frequency],
+            freq=freq)
+        rng = np.random.default_rng(seed)
+        close = price * np.exp(np.cumsum(rng.normal(0, 0.01, len(index))))
+        open_ = np.concatenate([[price], close[:-1]])
+        spread = np.abs(rng.normal(0, 0.005, len(index))) * close
+        return pd.DataFrame({
+            "open": open_,
+            "high": np.maximum(open_, close) + spread,
+            "low": np.minimum(open_, close) - spread,
+            "close": close,
+            "volume": rng.integers(1e5, 1e7, len(index)).astype(float),
+        }, index=index)
+
+    def _throttle(self, api):
+        """Check if a request exceeds the rate limit of an API."""
+        if api not in self._buckets:
+            return False
+        with self._lock:
+            bucket = self._buckets[api]
+            bucket.refill()
+            if bucket.tokens < 1:
+                self.throttled += 1
+                return True
+            bucket.tokens -= 1
+            return False
+
+    def _send(self, request, status, text):
+        """Send a text response."""
+        self._send_bytes(request, status, text.encode(), "text/plain")
+
+    def _send_json(self, request, status, content):
+        """Send a json response."""
+        self._send_bytes(
+            request, status, json.dumps(content).encode(), "application/json")
+
+    def _send_bytes(self, request, status, body, content_type):
+        """Send a response."""
+        request.send_response(status)
+        request.send_header("Content-Type", content_type)
+        request.send_header("Content-Length", str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
@@ -0,0 +1,240 @@
+"""On-disk cache of raw API responses.
+"""
+import collections
+import hashlib
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+from stockdaq.logger import logger
+
+
+class ResponseCache:
+    """Content-addressed cache of raw API responses.
+
+    Responses are pickled in files named by the hash of
+    (api, symbol, frequency, kwargs). The least recently used files are
+    evicted when the cache exceeds its size. The sizes and the use order
+    of the files are kept in memory, read from the directory once.
+
+    Parameters
+    ----------
+    cache_dir: str
+        Directory of the cache files.
+    ttl: float, optional
+        Time (seconds) a response stays valid.
+        Defaults to 86400 (1 day).
+    max_size: int, optional
+        Maximum size (bytes) of the cache.
+        Defaults to 1e9 (1 GB).
+    offline: boolean, optional
+        Replay cached responses regardless of their age and never call
+        the APIs. Missing responses raise ValueError.
+        Defaults to False.
+
+    Attributes
+    ----------
+    cache_dir: str
+        Directory of the cache files.
+    ttl: float
+        Time (seconds) a response stays valid.
+    max_size: int
+        Maximum size (bytes) of the cache.
+    offline: boolean
+        Replay cached responses and never call the APIs.
+    hits: int
+        Number of responses found in the cache.
+    misses: int
+        Number of responses not found in the cache.
+    size: int
+        Size (bytes) of the cached responses.
+    """
+    extension = ".pkl"
+
+    def __init__(self, cache_dir, ttl=86400, max_size=1e9, offline=False):
+        """Constructor
+
+        Parameters
+        ----------
+        cache_dir: str
+            Directory of the cache files.
+        ttl: float, optional
+            Time (seconds) a response stays valid.
+            Defaults to 86400 (1 day).
+        max_size: int, optional
+            Maximum size (bytes) of the cache.
+            Defaults to 1e9 (1 GB).
+        offline: boolean, optional
+            Replay cached responses regardless of their age and never call
+            the APIs. Missing responses raise ValueError.
+            Defaults to False.
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_size = max_size
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self.size = 0
+        # {key: size} pairs, least recently used first.
+        self._index = collections.OrderedDict()
+        self._lock = threading.Lock()
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir, exist_ok=True)
+        self.load_index()
+
+    def load_index(self):
+        """Read the sizes and use order of the files in the cache directory."""
+        files = []
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith(self.extension):
+                    continue
+                stat = entry.stat()
+                key = entry.name[:-len(self.extension)]
+                files.append((stat.st_atime, key, stat.st_size))
+        with self._lock:
+            self._index = collections.OrderedDict(
+                (key, size) for _, key, size in sorted(files))
+            self.size = sum(self._index.values())
+
+    def make_key(self, api, symbol, frequency, kwargs={}):
+        """Make the cache key of an API call.
+
+        Parameters
+        ----------
+        api: str
+            The name of the API.
+        symbol: str or list of str
+            Stock symbol, or symbols of a batch call.
+        frequency: str
+            "intraday", "daily", "weekly", "monthly".
+        kwargs: dict, optional
+            Keyword arguments of the call.
+            Defaults to {}.
+
+        Returns
+        -------
+        str
+            The key.
+        """
+        call = json.dumps(
+            [api, symbol, frequency, kwargs], sort_keys=True, default=str)
+        return hashlib.sha256(call.encode()).hexdigest()
+
+    def get_path(self, key):
+        """Get the path of the cache file of a key.
+
+        Parameters
+        ----------
+        key: str
+            The key.
+
+        Returns
+        -------
+        str
+            The path.
+        """
+        return os.path.join(self.cache_dir, key+self.extension)
+
+    def contains(self, key):
+        """Check if a valid response is cached.
+
+        Parameters
+        ----------
+        key: str
+            The key.
+
+        Returns
+        -------
+        boolean
+            True if the response is cached and not expired.
+        """
+        path = self.get_path(key)
+        if not os.path.exists(path):
+            return False
+        if self.offline:
+            return True
+        return time.time() - self._get_created(path) < self.ttl
+
+    def get(self, key):
+        """Get a cached response.
+
+        Parameters
+        ----------
+        key: str
+            The key.
+
+        Returns
+        -------
+        object or None
+            The response. None if not cached or expired.
+        """
+        path = self.get_path(key)
+        with self._lock:
+            if not self.contains(key):
+                self.misses += 1
+                return None
+            try:
+                rawdata = pd.read_pickle(path)
+            except (OSError, EOFError, ValueError):
+                self.misses += 1
+                return None
+            # The access time keeps the use order across restarts.
+            os.utime(path, (time.time(), self._get_created(path)))
+            if key in self._index:
+                self._index.move_to_end(key)
+            else:
+                # Put by another process.
+                self._add(key, os.stat(path).st_size)
+            self.hits += 1
+        return rawdata
+
+    def put(self, key, rawdata):
+        """Cache a response.
+
+        Parameters
+        ----------
+        key: str
+            The key.
+        rawdata: object
+            The response.
+        """
+        path = self.get_path(key)
+        tmp_path = path + ".tmp"
+        with self._lock:
+            pd.to_pickle(rawdata, tmp_path)
+            os.replace(tmp_path, path)
+            self._add(key, os.stat(path).st_size)
+            if self.size > self.max_size:
+                self._evict()
+
+    def evict(self):
+        """Delete least recently used responses until the cache fits."""
+        with self._lock:
+            self._evict()
+
+    def _add(self, key, size):
+        """Index a file. Must be called with self._lock held."""
+        self.size += size - self._index.pop(key, 0)
+        self._index[key] = size
+
+    def _evict(self):
+        """Delete responses. Must be called with self._lock held."""
+        while self.size > self.max_size and self._index:
+            key, size = self._index.popitem(last=False)
+            self.size -= size
+            path = self.get_path(key)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Evicted by another process.
+                continue
+            logger.debug("Evicted {} from the response cache.".format(path))
+
+    def _get_created(self, path):
+        """Time (seconds since the epoch) a response was cached."""
+        return os.stat(path).st_mtime
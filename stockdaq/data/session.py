@@ -0,0 +1,65 @@
+"""Pooled HTTP sessions for the downloaders.
+"""
+import requests
+import requests.adapters
+
+
+class TimeoutSession(requests.Session):
+    """requests.Session with a default timeout.
+
+    Parameters
+    ----------
+    timeout: float, optional
+        Default timeout (seconds) of the requests.
+        Defaults to None, i.e. no timeout.
+
+    Attributes
+    ----------
+    timeout: float or None
+        Default timeout (seconds) of the requests.
+    """
+    def __init__(self, timeout=None):
+        """Constructor
+
+        Parameters
+        ----------
+        timeout: float, optional
+            Default timeout (seconds) of the requests.
+            Defaults to None, i.e. no timeout.
+        """
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        """Send a request, with the default timeout if none is given."""
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def make_session(pool_size=10, timeout=30, retries=0):
+    """Make a keep-alive HTTP session with a connection pool.
+
+    Parameters
+    ----------
+    pool_size: int, optional
+        Maximum number of connections kept alive per host.
+        Defaults to 10.
+    timeout: float, optional
+        Timeout (seconds) of the requests.
+        Defaults to 30.
+    retries: int, optional
+        Number of retries on connection errors.
+        Defaults to 0.
+
+    Returns
+    -------
+    session: TimeoutSession
+        The session.
+    """
+    session = TimeoutSession(timeout=timeout)
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size,
+        max_retries=retries)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
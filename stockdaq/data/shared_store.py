@@ -0,0 +1,255 @@
+"""Shared-memory store of data for processes on the same host.
+
+A loader process puts the data of each series, e.g. a symbol, in a
+shared-memory segment, laid out in the columnar format of
+stockdaq.data.memmap. Other processes get read-only Data views of the
+segments without copying, so the memory is used once per host instead of
+once per process.
+
+Segments are named after a hash of the namespace and the key, so all
+processes using the same namespace find the same segments.
+"""
+import hashlib
+import mmap
+import os
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+import stockdaq.data.data
+import stockdaq.data.memmap
+from stockdaq.logger import logger
+
+try:
+    import _posixshmem
+except ImportError:
+    _posixshmem = None
+
+
+class SharedStore:
+    """Store of columnar data in shared memory.
+
+    Parameters
+    ----------
+    namespace: str, optional
+        Namespace of the segment names.
+        Defaults to "stockdaq".
+
+    Attributes
+    ----------
+    namespace: str
+        Namespace of the segment names.
+
+    Note
+    ----
+    The segments put by a store are removed when the store is closed or
+    its process exits. Views already taken by other processes stay valid
+    until they are released.
+    """
+    def __init__(self, namespace="stockdaq"):
+        """Constructor
+
+        Parameters
+        ----------
+        namespace: str, optional
+            Namespace of the segment names.
+            Defaults to "stockdaq".
+        """
+        self.namespace = namespace
+        self._segments = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def get_name(self, key):
+        """Get the name of the segment of a key.
+
+        Parameters
+        ----------
+        key: str
+            The key, e.g. a symbol.
+
+        Returns
+        -------
+        str
+            The segment name.
+        """
+        digest = hashlib.sha1(
+            "{}/{}".format(self.namespace, key).encode()).hexdigest()
+        # macOS allows 31 characters.
+        return "sdq_{}".format(digest[:24])
+
+    def keys(self):
+        """Get the keys put by this store.
+
+        Returns
+        -------
+        list of str
+            The keys.
+        """
+        with self._lock:
+            return list(self._segments)
+
+    def put(self, key, data):
+        """Put data in shared memory.
+
+        The segment of an existing key is replaced. Views taken of the old
+        segment stay valid.
+
+        Parameters
+        ----------
+        key: str
+            The key, e.g. a symbol.
+        data: stockdaq.data.data.Data or pandas.core.frame.DataFrame
+            The data.
+        """
+        if isinstance(data, stockdaq.data.data.Data):
+            data = data.dataframe
+        prologue, arrays, size = stockdaq.data.memmap.pack(data)
+        name = self.get_name(key)
+        with self._lock:
+            self._remove(key)
+            try:
+                segment = shared_memory.SharedMemory(
+                    name=name, create=True, size=size)
+            except FileExistsError:
+                # Left by another store, e.g. one that crashed.
+                stale = shared_memory.SharedMemory(name=name)
+                stale.close()
+                stale.unlink()
+                segment = shared_memory.SharedMemory(
+                    name=name, create=True, size=size)
+            buffer = np.frombuffer(segment.buf, dtype=np.uint8)
+            magic_size = len(stockdaq.data.memmap.magic)
+            for offset, array in arrays:
+                buffer[offset:offset+array.nbytes] = array.view(np.uint8)
+            # The magic is written last, so readers never see partial data.
+            buffer[magic_size:len(prologue)] = np.frombuffer(
+                prologue[magic_size:], dtype=np.uint8)
+            buffer[:magic_size] = np.frombuffer(
+                prologue[:magic_size], dtype=np.uint8)
+            del buffer
+            self._segments[key] = segment
+        logger.debug("{} put in shared memory {} ({} bytes).".format(
+            key, name, size))
+
+    def fill(self, database, symbols, frequency, start=None, end=None,
+             columns=None):
+        """Put the data of symbols from a database in shared memory.
+
+        Parameters
+        ----------
+        database: stockdaq.data.database.Database
+            The database.
+        symbols: list of str
+            The stock symbols, used as keys.
+        frequency: str
+            "intraday", "daily", "weekly", "monthly".
+        start: datetime.datetime, optional
+            Start time, inclusive.
+            Defaults to None.
+        end: datetime.datetime, optional
+            End time, exclusive.
+            Defaults to None.
+        columns: list of str, optional
+            Only put these columns, e.g. ["close"].
+            Defaults to None, i.e. all columns.
+        """
+        for symbol in symbols:
+            data = database.load_symbol(
+                symbol=symbol, frequency=frequency, start=start, end=end,
+                columns=columns)
+            self.put(key=symbol, data=data)
+
+    def get(self, key, columns=None):
+        """Get a read-only view of data in shared memory.
+
+        Parameters
+        ----------
+        key: str
+            The key, e.g. a symbol.
+        columns: list of str, optional
+            Only get these columns, e.g. ["close"].
+            Defaults to None, i.e. all columns.
+
+        Returns
+        -------
+        stockdaq.data.data.Data
+            The data. The arrays are views of the shared memory.
+        """
+        try:
+            buffer = _attach(self.get_name(key))
+        except FileNotFoundError:
+            raise ValueError("{} not available.".format(key))
+        # The mapping is released with the last view of it.
+        index, arrays = stockdaq.data.memmap.read_buffer(
+            buffer, columns=columns, name=key)
+        dtypes = {column: array.dtype for column, array in arrays.items()}
+        return stockdaq.data.data.Data(
+            dataframe=pd.DataFrame(arrays, index=index, copy=False),
+            dtypes=dtypes)
+
+    def remove(self, key):
+        """Remove the segment of a key put by this store.
+
+        Parameters
+        ----------
+        key: str
+            The key, e.g. a symbol.
+        """
+        with self._lock:
+            self._remove(key)
+
+    def close(self):
+        """Remove the segments put by this store."""
+        with self._lock:
+            for key in list(self._segments):
+                self._remove(key)
+
+    def _remove(self, key):
+        """Remove a segment. Must be called with self._lock held."""
+        segment = self._segments.pop(key, None)
+        if segment is None:
+            return
+        segment.close()
+        try:
+            segment.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _attach(name):
+    """Map a shared memory segment read-only.
+
+    Attaching with multiprocessing.shared_memory.SharedMemory registers
+    the segment with the resource tracker (before Python 3.13), which
+    removes it when the attaching process exits. The segment is mapped
+    directly instead.
+
+    Parameters
+    ----------
+    name: str
+        The segment name.
+
+    Returns
+    -------
+    mmap.mmap
+        The read-only mapping.
+    """
+    if _posixshmem is not None:
+        fd = _posixshmem.shm_open("/"+name, os.O_RDONLY, mode=0o600)
+        try:
+            return mmap.mmap(
+                fd, os.fstat(fd).st_size, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+    segment = shared_memory.SharedMemory(name=name)
+    size = segment.size
+    segment.close()
+    return mmap.mmap(-1, size, tagname=name, access=mmap.ACCESS_READ)
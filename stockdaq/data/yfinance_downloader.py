@@ -1,11 +1,9 @@
 """yfinance downloader
 """
+import datetime
 
-import numpy as np
-import pandas as pd
 import yfinance
 
-import stockdaq.constants
 import stockdaq.data.downloader
 import stockdaq.data.manager
 
@@ -17,33 +15,64 @@ class yfinanceDownloader(stockdaq.data.downloader.Downloader):
     ----------
     dataframe: pandas.core.frame.DataFrame
         The obtained data. Update using getters.
+    column_map: dict
+        {"yfinance column": "stockdaq column"} pairs.
     """
-    def __init__(self, apikey=""):
+    column_map = {
+        "Open": "open",
+        "High": "high",
+        "Low": "low",
+        "Close": "close",
+        "Volume": "volume",
+    }
+    def __init__(self, apikey="", session=None):
         """Constructor
 
         Parameters
         ----------
         apikey: str
             Dummy keyholder
+        session: object, optional
+            The HTTP session passed to yfinance.download().
+            Defaults to None, i.e. yfinance makes a new session for each
+            call.
         """
         super().__init__(api="yfinance")
+        self.set_session(session)
 
-    def download(self, symbol, frequency="intraday", **kwargs):
-        """Get data from API
+    @classmethod
+    def make_session(cls, pool_size=10, timeout=30, retries=0):
+        """Make a keep-alive HTTP session suitable for yfinance.
+
+        A curl_cffi session impersonating a browser is used if curl_cffi
+        is installed, like the one yfinance makes itself.
 
         Parameters
         ----------
-        symbol: str
-            Stock symbol
-        frequency: str, optional
-            "intraday", "daily", "weekly", "monthly".
-        **kwargs:
-            Keyword arguments passed to the getter methods.
+        pool_size: int, optional
+            Maximum number of connections kept alive per host.
+            Only effective without curl_cffi.
+            Defaults to 10.
+        timeout: float, optional
+            Timeout (seconds) of the requests.
+            Defaults to 30.
+        retries: int, optional
+            Number of retries on connection errors.
+            Only effective without curl_cffi.
+            Defaults to 0.
+
+        Returns
+        -------
+        session: object
+            The session.
         """
-        self.get_data(
-            symbol=symbol, frequency=frequency,
-            yfinance_download_kwargs=kwargs
-            )
+        try:
+            import curl_cffi.requests
+        except ImportError:
+            return super().make_session(
+                pool_size=pool_size, timeout=timeout, retries=retries)
+        return curl_cffi.requests.Session(
+            impersonate="chrome", timeout=timeout)
 
     def get_data(
             self, symbol, frequency="intraday", yfinance_download_kwargs={}):
@@ -63,6 +92,35 @@ class yfinanceDownloader(stockdaq.data.downloader.Downloader):
         pandas.core.frame.DataFrame
             The intraday data.
         """
+        self.fetch(
+            symbol=symbol, frequency=frequency, **yfinance_download_kwargs)
+        self.dataframe = self.formatter(datadump=self.rawdata)
+        return self.dataframe
+
+    def fetch_api(self, symbol, frequency="intraday", since=None,
+                  **kwargs):
+        """Get raw data from yfinance, set self.rawdata
+
+        Parameters
+        ----------
+        symbol: str or list of str
+            Stock symbol, or a list of symbols for a batch download.
+        frequency: str, optional
+            "intraday", "daily", "weekly", "monthly".
+        since: datetime.datetime, optional
+            Only data newer than this are needed.
+            If specified, data are requested from the date of since,
+            instead of the maximum period.
+            Intraday data are limited to the last 7 days regardless.
+            Defaults to None.
+        **kwargs:
+            Keyword arguments that passes to yfinance.download()
+
+        Returns
+        -------
+        pandas.core.frame.DataFrame
+            The raw data.
+        """
         period = "max"
         if frequency == "intraday":
             interval = "1m"
@@ -76,44 +134,98 @@ class yfinanceDownloader(stockdaq.data.downloader.Downloader):
         else:
             raise ValueError("{} frequency not available".format(frequency))
 
+        if since is not None and "start" not in kwargs:
+            start = since.date()
+            earliest = datetime.date.today() - datetime.timedelta(days=6)
+            if frequency != "intraday" or start >= earliest:
+                kwargs["start"] = start
+        if "start" in kwargs:
+            period = None
+        if self.session is not None:
+            kwargs.setdefault("session", self.session)
+
         self.rawdata = yfinance.download(
-            tickers=symbol, interval=interval, period=period,
-            **yfinance_download_kwargs
+            tickers=symbol, interval=interval, period=period, **kwargs
             )
-        self.dataframe = self.formatter(datadump=self.rawdata)
-        return self.dataframe
+        return self.rawdata
+
+    def download_batch(self, symbols, frequency="intraday", since=None,
+                       **kwargs):
+        """Get data of multiple symbols with a single yfinance call.
+
+        Parameters
+        ----------
+        symbols: list of str
+            Stock symbols.
+        frequency: str, optional
+            "intraday", "daily", "weekly", "monthly".
+        since: datetime.datetime, optional
+            Only data newer than this are needed.
+            Defaults to None.
+        **kwargs:
+            Keyword arguments that passes to yfinance.download()
+
+        Returns
+        -------
+        dataframes: dict of pandas.core.frame.DataFrame
+            {"symbol": dataframe} pairs in stockdaq format.
+            Symbols without data are omitted.
+        """
+        kwargs = dict(kwargs, group_by="ticker")
+        self.fetch(
+            symbol=list(symbols), frequency=frequency, since=since, **kwargs)
+        return self.split_batch(datadump=self.rawdata, symbols=symbols)
+
+    def split_batch(self, datadump, symbols):
+        """Split a multi-ticker yfinance dataframe into stockdaq dataframes.
+
+        Parameters
+        ----------
+        datadump: pandas.core.frame.DataFrame
+            Dataframe from yfinance.download(group_by="ticker"), with
+            (ticker, field) columns.
+        symbols: list of str
+            Stock symbols.
+
+        Returns
+        -------
+        dataframes: dict of pandas.core.frame.DataFrame
+            {"symbol": dataframe} pairs in stockdaq format.
+            Symbols without data are omitted.
+        """
+        dataframes = {}
+        if datadump is None or datadump.empty:
+            return dataframes
+        tickers = datadump.columns.get_level_values(0)
+        for symbol in symbols:
+            if symbol not in tickers:
+                continue
+            dataframe = datadump[symbol].dropna(how="all")
+            if len(dataframe.index) == 0:
+                continue
+            dataframes[symbol] = self.formatter(datadump=dataframe)
+        return dataframes
 
     def formatter(self, datadump):
-        """Convert Alpha Vantage dataframe to standard stockdaq format
+        """Convert yfinance dataframe to standard stockdaq format
 
         Parameters
         ----------
         datadump: pandas.core.frame.DataFrame
-            Dataframe from Alpha Vantage.
+            Dataframe from yfinance.download(). (field, ticker) or
+            (ticker, field) columns of a single ticker are accepted.
 
         Returns
         -------
         dataframe: pandas.core.frame.DataFrame
             Formated dataframe.
         """
-        # Sort by ascending datetime
-        dataframe = datadump.sort_index()
-
-        # Remove timezone
-        dt = []
-        for i in range(len(dataframe.index)):
-            dt.append(dataframe.index[i].replace(tzinfo=None))
-        dt = pd.DatetimeIndex(dt)
-
-        open_ = dataframe["Open"].values
-        high = dataframe["High"].values
-        low = dataframe["Low"].values
-        close = dataframe["Close"].values
-        volume = dataframe["Volume"].values
-
-        dataframe = pd.DataFrame(
-            data=np.array([open_, high, low, close, volume]).T,
-            columns=stockdaq.constants.columns,
-            index=dt)
-
-        return dataframe
+        if datadump.columns.nlevels > 1:
+            # yfinance returns (field, ticker) columns even for one ticker.
+            for level in range(datadump.columns.nlevels):
+                if "Open" in datadump.columns.get_level_values(level):
+                    break
+            datadump = datadump.droplevel(
+                [level_ for level_ in range(datadump.columns.nlevels)
+                 if level_ != level], axis=1)
+        return self.normalize(datadump=datadump)
@@ -0,0 +1,58 @@
+"""Tests for stockdaq.acquisiter.async_acquisiter
+"""
+import os
+import shutil
+import time
+
+import pandas as pd
+import pytest
+
+import stockdaq.acquisiter.async_acquisiter as aac
+import stockdaq.data.downloader
+import stockdaq.data.downloader_dict
+
+
+class SlowDownloader(stockdaq.data.downloader.Downloader):
+    def __init__(self, apikey=""):
+        super().__init__(api="slow")
+
+    def download(self, symbol, frequency="intraday", **kwargs):
+        time.sleep(0.2)
+        if symbol == "BAD":
+            raise ValueError("{} not available.".format(symbol))
+        self.dataframe = pd.read_hdf(
+            "tests/data/TSLA/intraday/2020-12-24.h5")
+
+
+def test_async_acquisiter():
+    root_dir = "tests/data/async/"
+    if os.path.exists(root_dir):
+        shutil.rmtree(root_dir)
+    stockdaq.data.downloader_dict.downloader_dict["slow"] = SlowDownloader
+    stocklist = ["S{}".format(i) for i in range(20)] + ["BAD"]
+    a = aac.AsyncAcquisiter(
+        stocklist, "", {"slow": ""}, api_list=["slow"], root_dir=root_dir,
+        api_call_interval=0.001, max_concurrency=25
+        )
+    t0 = time.time()
+    a.update_database()
+    elapsed = time.time() - t0
+    del stockdaq.data.downloader_dict.downloader_dict["slow"]
+    flag = all([
+        os.path.exists(root_dir+"S{}/intraday/2020-12-24.h5".format(i))
+        for i in range(20)
+        ])
+    shutil.rmtree(root_dir)
+    assert flag
+    assert elapsed < 2
+
+
+def test_conflicting_modes():
+    root_dir = "tests/data/async_modes/"
+    for kwargs in [{"parallel": True}, {"pipeline": True},
+                   {"batch_size": 10}]:
+        with pytest.raises(ValueError):
+            aac.AsyncAcquisiter(
+                ["A"], "", {}, api_list=[], root_dir=root_dir, **kwargs)
+    if os.path.exists(root_dir):
+        shutil.rmtree(root_dir)
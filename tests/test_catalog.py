@@ -0,0 +1,72 @@
+"""Tests for stockdaq.data.catalog
+"""
+import datetime
+import os
+import shutil
+
+import pandas as pd
+
+import stockdaq.data.catalog
+import stockdaq.data.data
+import stockdaq.data.database
+
+
+def test_catalog():
+    root_dir = "tests/data/catalog/"
+    if os.path.exists(root_dir):
+        shutil.rmtree(root_dir)
+    catalog = stockdaq.data.catalog.Catalog(
+        path=root_dir+".catalog.sqlite", root_dir=root_dir)
+    dataframe = pd.concat([
+        stockdaq.data.data.Data(
+            load_path="tests/data/TSLA/intraday/2020-12-24.h5").dataframe,
+        stockdaq.data.data.Data(
+            load_path="tests/data/TSLA/intraday/2020-12-28.h5").dataframe,
+        ])
+    prefix = root_dir + "TSLA/intraday/"
+    os.makedirs(prefix)
+    formats = {"2020-12-24": "parquet", "2020-12-28": "hdf5-table"}
+    for date, format in formats.items():
+        data = stockdaq.data.data.Data(dataframe=dataframe.loc[date])
+        path = prefix + date + stockdaq.data.data.extensions[format]
+        data.save(path=path, format=format, catalog=catalog)
+    assert catalog.count() == 2
+    assert catalog.get_symbols("intraday") == ["TSLA"]
+    assert catalog.get_latest_timestamp("TSLA", "intraday") == (
+        dataframe.index[-1].to_pydatetime())
+    assert catalog.get_latest_timestamp("AAPL", "intraday") is None
+
+    entries = catalog.query(
+        "TSLA", "intraday", start="2020-12-25", end="2020-12-29")
+    assert entries["path"].to_list() == [prefix+"2020-12-28.h5"]
+    assert entries["rows"].to_list() == [len(dataframe.loc["2020-12-28"])]
+    assert entries["format"].to_list() == ["hdf5-table"]
+    gaps = catalog.find_gaps("TSLA", "intraday", datetime.timedelta(days=1))
+    assert len(gaps) == 1
+    assert gaps[0][1] == dataframe.loc["2020-12-28"].index[0]
+
+    # Merging updates the entry.
+    assert entries["checksum"][0] is None
+    old_mtime = entries["mtime"][0]
+    data = stockdaq.data.data.Data(
+        dataframe=dataframe.loc["2020-12-28"].iloc[:10]*2)
+    data.save(
+        path=prefix+"2020-12-28.h5", format="hdf5-table", mergehow="update",
+        catalog=catalog)
+    entries = catalog.query("TSLA", "intraday", start="2020-12-28")
+    assert entries["mtime"][0] != old_mtime
+    assert entries["size"][0] == os.path.getsize(prefix+"2020-12-28.h5")
+
+    database = stockdaq.data.database.Database(
+        root_dir=root_dir, catalog=catalog)
+    assert database.get_partitions("TSLA", "intraday") == [
+        prefix+"2020-12-24.parquet", prefix+"2020-12-28.h5"]
+
+    catalog.remove(prefix+"2020-12-24.parquet")
+    assert catalog.count() == 1
+    assert catalog.rebuild() == 2
+    entries = catalog.query("TSLA", "intraday")
+    assert entries["format"].to_list() == ["parquet", "hdf5-table"]
+    assert entries["rows"].sum() == len(dataframe.index)
+    assert entries["checksum"].notna().all()
+    shutil.rmtree(root_dir)
@@ -1,7 +1,221 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import stockdaq.constants
 import stockdaq.data.data
+import stockdaq.data.memmap
 
 def test_data():
     data = stockdaq.data.data.Data(
         load_path="tests/data/TSLA/intraday/2020-12-24.h5")
     data.merge(path="tests/data/TSLA/intraday/2020-12-28.h5")
     data._set_self_dataframe_from_data()
+
+
+def test_hdf5_table():
+    table_dir = "tests/data/table/"
+    if os.path.exists(table_dir):
+        shutil.rmtree(table_dir)
+    os.makedirs(table_dir)
+    path = table_dir + "all.h5"
+    dataframe = stockdaq.data.data.Data(
+        load_path="tests/data/TSLA/intraday/2020-12-24.h5").dataframe
+    old, new = dataframe.iloc[:100], dataframe.iloc[100:]
+    stockdaq.data.data.Data(dataframe=old).save(
+        path=path, format="hdf5-table")
+    stockdaq.data.data.Data(dataframe=new).save(
+        path=path, format="hdf5-table")
+    first, last = stockdaq.data.data.get_index_bounds(path=path)
+    assert first == dataframe.index[0]
+    assert last == dataframe.index[-1]
+
+    start, end = dataframe.index[50], dataframe.index[150]
+    data = stockdaq.data.data.Data(load_path=path)
+    assert len(data.dataframe) == len(dataframe)
+    data.load(path=path, start=start, end=end)
+    assert len(data.dataframe) == 100
+    assert data.dataframe.index[0] == start
+    fixed = stockdaq.data.data.Data(dataframe=dataframe.iloc[:1])
+    fixed.load(
+        path="tests/data/TSLA/intraday/2020-12-24.h5", start=start, end=end)
+    assert fixed.dataframe.equals(data.dataframe)
+
+    overlap = dataframe.iloc[150:250] * 2
+    stockdaq.data.data.Data(dataframe=overlap).save(
+        path=path, format="hdf5-table", mergehow="keep old")
+    data = stockdaq.data.data.Data(load_path=path)
+    assert data.dataframe.equals(dataframe)
+    stockdaq.data.data.Data(dataframe=overlap).save(
+        path=path, format="hdf5-table", mergehow="update")
+    data = stockdaq.data.data.Data(load_path=path)
+    assert data.dataframe.index.equals(dataframe.index)
+    assert data.dataframe.iloc[150:250].equals(overlap)
+    assert data.dataframe.iloc[250:].equals(dataframe.iloc[250:])
+
+    # NaN volume widens the int64 volume column of the table.
+    path = table_dir + "volume.h5"
+    stockdaq.data.data.Data(dataframe=old).save(
+        path=path, format="hdf5-table")
+    missing = new.copy()
+    missing.iloc[0, missing.columns.get_loc("volume")] = np.nan
+    stockdaq.data.data.Data(dataframe=missing).save(
+        path=path, format="hdf5-table")
+    data = stockdaq.data.data.Data(load_path=path)
+    assert data.dataframe["volume"].dtype == np.float64
+    assert len(data.dataframe.index) == len(dataframe.index)
+    assert np.isnan(data.volume[100])
+    assert (data.volume[:100] == old["volume"].to_numpy()).all()
+    shutil.rmtree(table_dir)
+
+
+def test_hdf5_table_failed_append(monkeypatch):
+    table_dir = "tests/data/table_failed/"
+    if os.path.exists(table_dir):
+        shutil.rmtree(table_dir)
+    os.makedirs(table_dir)
+    path = table_dir + "all.h5"
+    dataframe = stockdaq.data.data.Data(
+        load_path="tests/data/TSLA/intraday/2020-12-24.h5").dataframe
+    stockdaq.data.data.Data(dataframe=dataframe.iloc[:200]).save(
+        path=path, format="hdf5-table")
+
+    def append(*args, **kwargs):
+        raise ValueError("append failed")
+
+    monkeypatch.setattr(pd.HDFStore, "append", append)
+    with pytest.raises(ValueError):
+        stockdaq.data.data.Data(dataframe=dataframe.iloc[100:300]).save(
+            path=path, format="hdf5-table", mergehow="update")
+    monkeypatch.undo()
+    stored = stockdaq.data.data.Data(load_path=path).dataframe
+    shutil.rmtree(table_dir)
+    assert stored.equals(dataframe.iloc[:200])
+
+
+def test_merge_dataframes():
+    dataframe = stockdaq.data.data.Data(
+        load_path="tests/data/TSLA/intraday/2020-12-24.h5").dataframe
+    old, new = dataframe.iloc[:100], dataframe.iloc[100:]
+    merged = stockdaq.data.data.merge_dataframes(old=old, new=new)
+    assert merged.equals(dataframe)
+    new = dataframe.iloc[50:150] * 2
+    merged = stockdaq.data.data.merge_dataframes(
+        old=old, new=new.iloc[::-1], mergehow="keep old")
+    assert merged.iloc[:100].equals(old)
+    assert merged.iloc[100:].equals(new.iloc[50:])
+    merged = stockdaq.data.data.merge_dataframes(
+        old=old, new=new, mergehow="update")
+    assert merged.iloc[:50].equals(old.iloc[:50])
+    assert merged.iloc[50:].equals(new)
+
+
+def test_parquet():
+    parquet_dir = "tests/data/parquet/"
+    if os.path.exists(parquet_dir):
+        shutil.rmtree(parquet_dir)
+    os.makedirs(parquet_dir)
+    dataframe = stockdaq.data.data.Data(
+        load_path="tests/data/TSLA/intraday/2020-12-24.h5").dataframe
+    old, new = dataframe.iloc[:100], dataframe.iloc[100:]
+    stockdaq.data.data.Data(dataframe=old).save(
+        path=parquet_dir+"a.parquet", format="parquet", compression="zstd")
+    stockdaq.data.data.Data(dataframe=new).save(
+        path=parquet_dir+"b.parquet", format="parquet")
+    first, last = stockdaq.data.data.get_index_bounds(
+        path=parquet_dir+"b.parquet")
+    assert first == dataframe.index[100]
+    assert last == dataframe.index[-1]
+
+    data = stockdaq.data.data.Data(load_path=parquet_dir+"a.parquet")
+    assert data.dataframe.equals(old)
+    start, end = dataframe.index[50], dataframe.index[150]
+    data.load(path=parquet_dir, start=start, end=end)
+    assert data.dataframe.equals(dataframe.iloc[50:150])
+    close = stockdaq.data.data.read_parquet(
+        path=parquet_dir, columns=["close"], start=start, end=end)
+    assert list(close.columns) == ["close"]
+    assert close.index.equals(dataframe.index[50:150])
+
+    stockdaq.data.data.Data(dataframe=new).save(
+        path=parquet_dir+"a.parquet", format="parquet")
+    data = stockdaq.data.data.Data(load_path=parquet_dir+"a.parquet")
+    assert data.dataframe.equals(dataframe)
+    shutil.rmtree(parquet_dir)
+
+
+def test_memmap():
+    memmap_dir = "tests/data/memmap/"
+    if os.path.exists(memmap_dir):
+        shutil.rmtree(memmap_dir)
+    os.makedirs(memmap_dir)
+    path = memmap_dir + "2020-12-24.mmap"
+    dataframe = stockdaq.data.data.Data(
+        load_path="tests/data/TSLA/intraday/2020-12-24.h5").dataframe
+    stockdaq.data.data.Data(dataframe=dataframe.iloc[:100]).save(
+        path=path, format="memmap")
+    stockdaq.data.data.Data(dataframe=dataframe.iloc[100:]).save(
+        path=path, format="memmap")
+    data = stockdaq.data.data.Data(load_path=path)
+    assert data.dataframe.equals(dataframe)
+    assert not data.close.flags.writeable
+    assert not data.close.flags.owndata
+    assert stockdaq.data.data.get_index_bounds(path=path) == (
+        dataframe.index[0], dataframe.index[-1])
+
+    start, end = dataframe.index[50], dataframe.index[150]
+    data.load(path=path, start=start, end=end)
+    assert data.dataframe.equals(dataframe.iloc[50:150])
+    close = stockdaq.data.memmap.read_dataframe(
+        path=path, columns=["close"], start=start)
+    assert list(close.columns) == ["close"]
+    assert len(close) == len(dataframe) - 50
+    shutil.rmtree(memmap_dir)
+
+
+def test_schema():
+    dataframe = stockdaq.data.data.Data(
+        load_path="tests/data/TSLA/intraday/2020-12-24.h5").dataframe
+    data = stockdaq.data.data.Data(dataframe=dataframe)
+    compact = stockdaq.data.data.Data(
+        dataframe=dataframe, dtypes=stockdaq.constants.compact_dtypes)
+    assert data.volume.dtype == "int64"
+    assert compact.close.dtype == "float32"
+    assert compact.nbytes < data.nbytes
+    assert compact._dataframe is None
+    assert np.shares_memory(
+        compact.dataframe["close"].to_numpy(), compact.close)
+    data.close = data.close * 2
+    assert (data.dataframe["close"] == dataframe["close"] * 2).all()
+    volume = np.array([1., np.nan])
+    assert stockdaq.data.data.as_dtype(volume, "int64") is volume
+    assert stockdaq.data.data.as_dtype(
+        np.array([1., 2.]), "int64").dtype == "int64"
+
+
+def test_lazy():
+    path = "tests/data/TSLA/intraday/2020-12-24.h5"
+    dataframe = stockdaq.data.data.Data(load_path=path).dataframe
+    parquet_dir = "tests/data/lazy/"
+    if os.path.exists(parquet_dir):
+        shutil.rmtree(parquet_dir)
+    os.makedirs(parquet_dir)
+    stockdaq.data.data.Data(dataframe=dataframe).save(
+        path=parquet_dir+"2020-12-24.parquet", format="parquet")
+
+    data = stockdaq.data.data.Data(
+        load_path=parquet_dir+"2020-12-24.parquet", lazy=True)
+    assert data.columns == {}
+    assert (data.close == dataframe["close"].to_numpy()).all()
+    assert list(data.columns) == ["close"]
+    assert data.datetime_column.equals(dataframe.index)
+    assert data.dataframe.equals(dataframe)
+
+    data = stockdaq.data.data.Data(load_path=path, columns=["close"])
+    assert list(data.dataframe.columns) == ["close"]
+    with pytest.raises(ValueError):
+        data.open
+    shutil.rmtree(parquet_dir)
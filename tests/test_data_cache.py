@@ -0,0 +1,59 @@
+"""Tests for stockdaq.data.data_cache
+"""
+import os
+import shutil
+
+import stockdaq.data.data
+import stockdaq.data.data_cache
+
+
+def test_data_cache():
+    path = "tests/data/data_cache/"
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.makedirs(path)
+    source = stockdaq.data.data.Data(
+        load_path="tests/data/TSLA/intraday/2020-12-24.h5")
+    source.save(path=path+"a.parquet", format="parquet")
+    source.save(path=path+"b.parquet", format="parquet")
+    cache = stockdaq.data.data_cache.DataCache()
+
+    data = stockdaq.data.data.Data(load_path=path+"a.parquet", cache=cache)
+    assert data.dataframe.equals(source.dataframe)
+    data = stockdaq.data.data.Data(load_path=path+"a.parquet", cache=cache)
+    assert data.dataframe.equals(source.dataframe)
+    assert (cache.hits, cache.misses) == (1, 1)
+    # Edits by a reader don't change the cache.
+    dataframe = cache.read_dataframe(
+        path+"a.parquet", format="parquet",
+        columns=list(stockdaq.data.data.header))
+    dataframe.iloc[0, 0] = -1.
+    dataframe["close"] *= 2
+    data = stockdaq.data.data.Data(load_path=path+"a.parquet", cache=cache)
+    assert data.dataframe.equals(source.dataframe)
+    data = stockdaq.data.data.Data(
+        load_path=path+"a.parquet", columns=["close"], cache=cache)
+    assert list(data.dataframe.columns) == ["close"]
+    assert (cache.hits, cache.misses, len(cache)) == (3, 2, 2)
+
+    # Changed files are read again.
+    half = stockdaq.data.data.Data(dataframe=source.dataframe.iloc[:100])
+    half.save(path=path+"a.parquet", format="parquet", conflict="overwrite")
+    data = stockdaq.data.data.Data(load_path=path+"a.parquet", cache=cache)
+    assert len(data.datetime_column) == 100
+    assert cache.misses == 3
+
+    # Least recently used entries are evicted.
+    cache.max_size = source.dataframe.memory_usage(index=True).sum()
+    stockdaq.data.data.Data(load_path=path+"b.parquet", cache=cache)
+    assert cache.evictions == 2
+    assert len(cache) == 1
+    assert cache.size <= cache.max_size
+    stats = cache.stats()
+    assert stats["entries"] == len(cache)
+    assert stats["hit_rate"] == 3/7
+
+    cache.invalidate(path+"b.parquet")
+    cache.clear()
+    assert cache.size == 0 and len(cache) == 0
+    shutil.rmtree(path)
@@ -0,0 +1,45 @@
+"""Tests for stockdaq.data.database
+"""
+import os
+import shutil
+
+import pandas as pd
+
+import stockdaq.data.data
+import stockdaq.data.database
+
+
+def test_database():
+    root_dir = "tests/data/database/"
+    if os.path.exists(root_dir):
+        shutil.rmtree(root_dir)
+    dataframe = pd.concat([
+        stockdaq.data.data.Data(
+            load_path="tests/data/TSLA/intraday/2020-12-24.h5").dataframe,
+        stockdaq.data.data.Data(
+            load_path="tests/data/TSLA/intraday/2020-12-28.h5").dataframe,
+        ])
+    for symbol in ["TSLA", "AAPL"]:
+        prefix = root_dir + "intraday/{}/".format(symbol)
+        os.makedirs(prefix)
+        for date in ["2020-12-24", "2020-12-28"]:
+            data = stockdaq.data.data.Data(dataframe=dataframe.loc[date])
+            data.save(path=prefix+date+".parquet", format="parquet")
+    database = stockdaq.data.database.Database(
+        root_dir=root_dir, file_structure=["frequency", "symbol", "data"],
+        format="parquet")
+
+    paths = database.get_partitions(
+        "TSLA", "intraday", start="2020-12-25", end="2020-12-29")
+    assert paths == [root_dir+"intraday/TSLA/2020-12-28.parquet"]
+    data = database.load("TSLA", "intraday")
+    assert data.dataframe.equals(
+        stockdaq.data.data.Data(dataframe=dataframe).dataframe)
+    start, end = dataframe.index[300], dataframe.index[400]
+    data_dict = database.load(
+        ["TSLA", "AAPL", "NONE"], "intraday", start=start, end=end,
+        columns=["close"])
+    assert list(data_dict["AAPL"].dataframe.columns) == ["close"]
+    assert data_dict["AAPL"].datetime_column.equals(dataframe.index[300:400])
+    assert len(data_dict["NONE"].datetime_column) == 0
+    shutil.rmtree(root_dir)
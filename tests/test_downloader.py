@@ -0,0 +1,22 @@
+"""Tests for stockdaq.data.downloader
+"""
+import pandas as pd
+
+import stockdaq.data.alpha_vantage_downloader
+import stockdaq.data.mock_server as mock_server
+
+
+def test_normalize():
+    datadump = pd.read_hdf(mock_server.sample_data_path)
+    downloader = stockdaq.data.alpha_vantage_downloader.\
+        AlphaVantageDownloader(apikey="123")
+    dataframe = downloader.formatter(datadump=datadump)
+    downloader.set_timezone("UTC")
+    utc = downloader.formatter(datadump=datadump)
+    assert list(dataframe.columns) == [
+        "open", "high", "low", "close", "volume"]
+    assert dataframe.index.is_monotonic_increasing
+    assert dataframe.index.tz is None
+    assert dataframe["volume"].dtype == "int64"
+    assert dataframe["close"].iloc[-1] == datadump["4. close"].iloc[0]
+    assert (utc.index - dataframe.index == pd.Timedelta(hours=5)).all()
@@ -0,0 +1,159 @@
+"""Tests for stockdaq.acquisiter.health
+"""
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+import stockdaq.acquisiter.acquisiter as acq
+import stockdaq.acquisiter.health as health
+import stockdaq.data.downloader
+import stockdaq.data.downloader_dict
+
+
+class DownDownloader(stockdaq.data.downloader.Downloader):
+    calls = 0
+
+    def __init__(self, apikey=""):
+        super().__init__(api="down")
+
+    def download(self, symbol, frequency="intraday", **kwargs):
+        DownDownloader.calls += 1
+        raise ConnectionError("Connection timed out.")
+
+
+class BackupDownloader(stockdaq.data.downloader.Downloader):
+    def __init__(self, apikey=""):
+        super().__init__(api="backup")
+
+    def download(self, symbol, frequency="intraday", **kwargs):
+        self.dataframe = pd.read_hdf(
+            "tests/data/TSLA/intraday/2020-12-24.h5")
+
+
+def test_provider_health():
+    provider = health.ProviderHealth(
+        api="A", failure_threshold=3, cooldown=10)
+    provider.record(latency=1, failed=True, now=0)
+    provider.record(latency=1, now=0)
+    provider.record(latency=1, failed=True, now=0)
+    provider.record(latency=1, failed=True, now=0)
+    closed = provider.state
+    provider.record(latency=1, throttled=True, now=0)
+    assert closed == "closed"
+    assert provider.state == "open"
+    assert not provider.available(now=5)
+    assert provider.time_to_available(now=5) == 5
+    assert provider.available(now=10)
+    assert provider.state == "half-open"
+    provider.record(latency=1, failed=True, now=10)
+    assert provider.state == "open"
+    assert provider.available(now=20)
+    provider.record(latency=1, now=20)
+    assert provider.state == "closed"
+    assert provider.throttles == 1
+
+
+def test_single_probe():
+    monitor = health.HealthMonitor(
+        api_list=["A"], failure_threshold=1, cooldown=0)
+    monitor.record("A", latency=0.1, error=OSError("Timeout"))
+    with monitor.track("A"):
+        # Other calls are refused while the trial is in flight.
+        available = monitor.available("A")
+        wait = monitor.time_to_available()
+        with pytest.raises(health.TrippedError):
+            with monitor.track("A"):
+                pass
+    assert not available
+    assert wait == health.probe_wait
+    assert monitor.providers["A"].state == "closed"
+    assert monitor.providers["A"].calls == 2
+    with monitor.track("A"):
+        assert monitor.available("A")
+
+
+def test_health_monitor():
+    monitor = health.HealthMonitor(
+        api_list=["A", "B", "C"], failure_threshold=2)
+    monitor.record("A", latency=0.1, error=ValueError("Symbol not found."))
+    monitor.record("B", latency=5)
+    monitor.record("C", latency=0.1)
+    assert monitor.rank() == ["A", "C", "B"]
+    monitor.record("A", latency=0.1, error=ValueError("429 Client Error"))
+    monitor.record("A", latency=0.1, error=OSError("Timeout"))
+    assert monitor.rank() == ["C", "B"]
+    assert not monitor.should_retry("A", OSError("Timeout"), 0)
+    assert monitor.should_retry("B", OSError("Timeout"), 0)
+    assert not monitor.should_retry("B", OSError("Timeout"), 2)
+    assert not monitor.should_retry("B", ValueError("No data."), 0)
+    assert all(
+        0 <= health.backoff_delay(attempt=i, base=1, cap=8) <= min(8, 2**i)
+        for i in range(10))
+
+
+def test_failover():
+    root_dir = "tests/data/failover/"
+    if os.path.exists(root_dir):
+        shutil.rmtree(root_dir)
+    downloader_dict = stockdaq.data.downloader_dict.downloader_dict
+    downloader_dict["down"] = DownDownloader
+    downloader_dict["backup"] = BackupDownloader
+    stocklist = ["S{}".format(i) for i in range(10)]
+    a = acq.Acquisiter(
+        stocklist, "", {"down": "", "backup": ""},
+        api_list=["down", "backup"], root_dir=root_dir,
+        api_call_interval=0.001,
+        health_kwargs={
+            "failure_threshold": 3, "max_retries": 1, "backoff_base": 0.01}
+        )
+    a.update_database()
+    del downloader_dict["down"]
+    del downloader_dict["backup"]
+    done = a.journal.get_symbols("done")
+    shutil.rmtree(root_dir)
+    assert sorted(done) == sorted(stocklist)
+    assert DownDownloader.calls == 2  # First call and one retry
+
+
+class FullDiskDownloader(BackupDownloader):
+    calls = 0
+
+    def download(self, symbol, frequency="intraday", **kwargs):
+        FullDiskDownloader.calls += 1
+        super().download(symbol, frequency=frequency, **kwargs)
+
+    def export(self, **kwargs):
+        raise OSError(28, "No space left on device")
+
+
+def test_export_error():
+    root_dir = "tests/data/export_error/"
+    if os.path.exists(root_dir):
+        shutil.rmtree(root_dir)
+    downloader_dict = stockdaq.data.downloader_dict.downloader_dict
+    downloader_dict["full"] = FullDiskDownloader
+    downloader_dict["backup"] = BackupDownloader
+    a = acq.Acquisiter(
+        ["S1", "S2"], "", {"full": "", "backup": ""},
+        api_list=["full", "backup"], root_dir=root_dir,
+        api_call_interval=0.001
+        )
+    symbols = a.start_journal()
+    try:
+        a.update_stocklist(symbols=symbols)
+        raised = False
+    except health.ExportError:
+        raised = True
+    failed = a.journal.get_symbols("failed")
+    reason = a.journal.reasons.get("S1")
+    del downloader_dict["full"]
+    del downloader_dict["backup"]
+    shutil.rmtree(root_dir)
+    assert raised
+    assert FullDiskDownloader.calls == 1
+    assert failed == ["S1"]
+    assert reason.startswith("export:")
+    assert a.health.providers["full"].failures == 0
+    assert not os.path.exists(root_dir+"S1")
@@ -0,0 +1,126 @@
+"""Tests for stockdaq.acquisiter.journal
+"""
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+import stockdaq.acquisiter.acquisiter as acq
+import stockdaq.acquisiter.journal as journal
+import stockdaq.data.downloader
+import stockdaq.data.downloader_dict
+
+
+class FlakyDownloader(stockdaq.data.downloader.Downloader):
+    bad = ["BAD"]
+
+    def __init__(self, apikey=""):
+        super().__init__(api="flaky")
+
+    def download(self, symbol, frequency="intraday", **kwargs):
+        if symbol in self.bad:
+            raise ValueError("{} not available.".format(symbol))
+        self.dataframe = pd.read_hdf(
+            "tests/data/TSLA/intraday/2020-12-24.h5")
+
+
+def test_journal():
+    journal_dir = "tests/data/journal/"
+    if os.path.exists(journal_dir):
+        shutil.rmtree(journal_dir)
+    j = journal.Journal.new(
+        journal_dir=journal_dir, frequency="daily", symbols=["A", "B", "C"])
+    j.mark("A", "done")
+    j.mark("B", "failed", reason="timeout")
+    with open(j.path, "a") as f:
+        f.write('{"symbol": "C", "sta')  # Crash while writing
+    j = journal.Journal.latest(journal_dir=journal_dir, frequency="daily")
+    none = journal.Journal.latest(journal_dir=journal_dir, frequency="weekly")
+    shutil.rmtree(journal_dir)
+    assert j.get_symbols("pending") == ["C"]
+    assert j.get_symbols("failed") == ["B"]
+    assert j.reasons["B"] == "timeout"
+    assert none is None
+
+
+def test_resume_keeps_failed():
+    root_dir = "tests/data/resume_failed/"
+    if os.path.exists(root_dir):
+        shutil.rmtree(root_dir)
+    j = journal.Journal.new(
+        journal_dir=root_dir+".journal/", frequency="intraday",
+        symbols=["A", "B", "C"])
+    j.mark("A", "done")
+    j.mark("B", "failed", reason="timeout")
+    a = acq.Acquisiter(
+        ["A", "B", "C"], "", {"flaky": ""}, api_list=["flaky"],
+        root_dir=root_dir, resume=True
+        )
+    symbols = a.start_journal()
+    j = journal.Journal.latest(
+        journal_dir=root_dir+".journal/", frequency="intraday")
+    shutil.rmtree(root_dir)
+    assert symbols == ["C"]
+    assert j.get_symbols("failed") == ["B"]
+    assert j.reasons == {"B": "timeout"}
+
+
+class BrokenDownloader(stockdaq.data.downloader.Downloader):
+    def __init__(self, apikey=""):
+        super().__init__(api="broken")
+
+    def download(self, symbol, frequency="intraday", **kwargs):
+        raise RuntimeError("broken")
+
+
+def test_stopped_lanes():
+    root_dir = "tests/data/stopped_lanes/"
+    if os.path.exists(root_dir):
+        shutil.rmtree(root_dir)
+    stockdaq.data.downloader_dict.downloader_dict["broken"] = (
+        BrokenDownloader)
+    a = acq.Acquisiter(
+        ["S1", "S2", "S3"], "", {"broken": ""}, api_list=["broken"],
+        root_dir=root_dir, api_call_interval=0.001, parallel=True
+        )
+    with pytest.raises(RuntimeError):
+        a.update_database()
+    del stockdaq.data.downloader_dict.downloader_dict["broken"]
+    failed = a.journal.get_symbols("failed")
+    shutil.rmtree(root_dir)
+    # Symbols left in the queue are retried with retry_failed.
+    assert sorted(failed) == ["S1", "S2", "S3"]
+
+
+def test_resume():
+    root_dir = "tests/data/resume/"
+    if os.path.exists(root_dir):
+        shutil.rmtree(root_dir)
+    stockdaq.data.downloader_dict.downloader_dict["flaky"] = FlakyDownloader
+    stocklist = ["S1", "BAD", "S2"]
+    a = acq.Acquisiter(
+        stocklist, "", {"flaky": ""}, api_list=["flaky"], root_dir=root_dir,
+        api_call_interval=0.001
+        )
+    a.update_database()
+    failed = a.journal.get_symbols("failed")
+
+    FlakyDownloader.bad = []
+    a = acq.Acquisiter(
+        stocklist, "", {"flaky": ""}, api_list=["flaky"], root_dir=root_dir,
+        api_call_interval=0.001, resume=True, retry_failed=True
+        )
+    symbols = a.start_journal()
+    a.update_stocklist(symbols=symbols)
+    flag = os.path.exists(root_dir+"BAD/intraday/2020-12-24.h5")
+    journals = os.listdir(root_dir+".journal/")
+    done = a.journal.get_symbols("done")
+    FlakyDownloader.bad = ["BAD"]
+    del stockdaq.data.downloader_dict.downloader_dict["flaky"]
+    shutil.rmtree(root_dir)
+    assert failed == ["BAD"]
+    assert symbols == ["BAD"]
+    assert flag
+    assert len(journals) == 1
+    assert sorted(done) == ["BAD", "S1", "S2"]
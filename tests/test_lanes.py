@@ -0,0 +1,50 @@
+"""Tests for stockdaq.acquisiter.lanes
+"""
+import threading
+
+import stockdaq.acquisiter.health
+import stockdaq.acquisiter.lanes as lanes
+
+
+class FakeAcquisiter:
+    def __init__(self):
+        self.acquired = {}
+        self.status = {}
+        self.health = stockdaq.acquisiter.health.HealthMonitor(["A", "B"])
+        self.lock = threading.Lock()
+
+    def record(self, symbol, status, reason=None):
+        with self.lock:
+            self.status[symbol] = status
+
+    def update_symbol(self, symbol, api, download_kwargs={},
+                      export_kwargs={}):
+        if api == "A" and symbol.startswith("X"):
+            raise ValueError("{} not available".format(symbol))
+        if symbol == "BAD":
+            raise ValueError("{} not available".format(symbol))
+        with self.lock:
+            self.acquired[symbol] = api
+
+
+def test_lanes():
+    symbols = ["AAPL", "XOM", "BAD", "TSLA", "XYZ", "AMD"]
+    apis = ["A", "B"]
+    acquisiter = FakeAcquisiter()
+    symbol_queue = lanes.SymbolQueue(symbols=symbols, apis=apis)
+    lane_list = [
+        lanes.Lane(acquisiter=acquisiter, api=api, symbol_queue=symbol_queue)
+        for api in apis
+        ]
+    for lane in lane_list:
+        lane.start()
+    for lane in lane_list:
+        lane.join()
+    assert symbol_queue.failed == ["BAD"]
+    assert symbol_queue.remaining() == []
+    assert sorted(acquisiter.acquired) == sorted(
+        ["AAPL", "XOM", "TSLA", "XYZ", "AMD"])
+    assert acquisiter.acquired["XOM"] == "B"
+    assert acquisiter.status["BAD"] == "failed"
+    assert acquisiter.status["XOM"] == "done"
+    assert acquisiter.acquired["XYZ"] == "B"
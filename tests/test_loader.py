@@ -0,0 +1,57 @@
+"""Tests for stockdaq.data.loader
+"""
+import os
+import shutil
+
+import pandas as pd
+
+import stockdaq.data.data
+import stockdaq.data.database
+import stockdaq.data.loader
+
+
+def test_loader():
+    root_dir = "tests/data/loader/"
+    if os.path.exists(root_dir):
+        shutil.rmtree(root_dir)
+    dataframe = pd.concat([
+        stockdaq.data.data.Data(
+            load_path="tests/data/TSLA/intraday/2020-12-24.h5").dataframe,
+        stockdaq.data.data.Data(
+            load_path="tests/data/TSLA/intraday/2020-12-28.h5").dataframe,
+        ])
+    for symbol in ["TSLA", "AAPL"]:
+        prefix = root_dir + "{}/intraday/".format(symbol)
+        os.makedirs(prefix)
+        for date in ["2020-12-24", "2020-12-28"]:
+            data = stockdaq.data.data.Data(dataframe=dataframe.loc[date])
+            data.save(path=prefix+date+".parquet", format="parquet")
+            data.save(path=prefix+date+".h5", format="hdf5")
+    expected = stockdaq.data.data.Data(dataframe=dataframe).dataframe
+
+    with stockdaq.data.loader.BulkLoader(workers=2) as loader:
+        paths = [
+            root_dir+"TSLA/intraday/2020-12-24.parquet",
+            root_dir+"TSLA/intraday/2020-12-28.parquet",
+        ]
+        assert loader.get_kind(paths) == "thread"
+        data = loader.load(paths)
+        assert data.dataframe.equals(expected)
+        dataframes = loader.read_dataframes(
+            paths[::-1], columns=["close"], start=dataframe.index[300])
+        assert dataframes[0].index[0] == dataframe.loc["2020-12-28"].index[0]
+        assert list(dataframes[1].columns) == ["close"]
+
+        paths = [path.replace(".parquet", ".h5") for path in paths]
+        assert loader.get_kind(paths) == "process"
+        data = loader.load(paths)
+        assert data.dataframe.equals(expected)
+
+        database = stockdaq.data.database.Database(
+            root_dir=root_dir, format="parquet", loader=loader)
+        data_dict = database.load(["TSLA", "AAPL", "NONE"], "intraday")
+        assert data_dict["AAPL"].dataframe.equals(expected)
+        assert len(data_dict["NONE"].datetime_column) == 0
+        data = database.load("TSLA", "intraday", end=dataframe.index[400])
+        assert data.dataframe.equals(expected.iloc[:400])
+    shutil.rmtree(root_dir)
@@ -0,0 +1,62 @@
+"""Tests for stockdaq.data.manager
+"""
+import datetime
+
+import numpy as np
+import pandas as pd
+
+import stockdaq.data.manager
+
+
+def test_get_latest_timestamp():
+    timestamp = stockdaq.data.manager.get_latest_timestamp(
+        directory="tests/data/TSLA/intraday/")
+    assert timestamp == datetime.datetime(2020, 12, 28, 20, 0)
+    timestamp = stockdaq.data.manager.get_latest_timestamp(
+        directory="tests/data/NONE/intraday/")
+    assert timestamp is None
+
+
+def test_is_current():
+    monday = datetime.datetime(2020, 12, 28, 10, 0)
+    friday = datetime.datetime(2020, 12, 25, 19, 59)
+    thursday = datetime.datetime(2020, 12, 24, 19, 59)
+    assert stockdaq.data.manager.is_current(friday, "intraday", now=monday)
+    assert not stockdaq.data.manager.is_current(
+        thursday, "daily", now=monday)
+    assert stockdaq.data.manager.is_current(
+        thursday, "weekly", now=monday)
+    assert not stockdaq.data.manager.is_current(None, "daily", now=monday)
+
+
+def test_segmenter():
+    index = pd.date_range("2020-12-28 09:00", periods=24*9, freq="h")
+    dataframe = pd.DataFrame(
+        np.arange(len(index)*5, dtype=float).reshape(-1, 5),
+        index=index, columns=["open", "high", "low", "close", "volume"])
+    data_dict = stockdaq.data.manager.segmenter(dataframe, criterion="date")
+    assert list(data_dict)[:2] == ["2020-12-28", "2020-12-29"]
+    assert len(data_dict) == 10
+    assert len(data_dict["2020-12-28"].dataframe) == 15
+    data_dict = stockdaq.data.manager.segmenter(dataframe, criterion="year")
+    assert list(data_dict) == ["2020", "2021"]
+    data_dict = stockdaq.data.manager.segmenter(dataframe, criterion="month")
+    assert list(data_dict) == ["2020-12", "2021-01"]
+    data_dict = stockdaq.data.manager.segmenter(dataframe, criterion="week")
+    assert list(data_dict) == ["2020-W53", "2021-W01"]
+    assert len(data_dict["2020-W53"].dataframe) == 24*7 - 9
+    data_dict = stockdaq.data.manager.segmenter(dataframe, criterion="hour")
+    assert len(data_dict) == len(index)
+    assert "2020-12-28T09" in data_dict
+    data_dict = stockdaq.data.manager.segmenter(dataframe, criterion="none")
+    assert list(data_dict) == ["all"]
+    pd.testing.assert_frame_equal(
+        data_dict["all"].dataframe, dataframe, check_freq=False,
+        check_dtype=False)
+
+    shuffled = dataframe.sample(frac=1, random_state=0)
+    data_dict = stockdaq.data.manager.segmenter(shuffled, criterion="date")
+    assert len(data_dict) == 10
+    assert data_dict["2020-12-29"].dataframe.index.is_monotonic_increasing
+    assert stockdaq.data.manager.segmenter(
+        dataframe.iloc[:0], criterion="date") == {}
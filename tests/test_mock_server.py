@@ -0,0 +1,71 @@
+"""Tests for stockdaq.data.mock_server and stockdaq.data.mock_downloader
+"""
+import os
+import shutil
+
+import stockdaq.acquisiter.acquisiter as acq
+import stockdaq.data.mock_downloader as mock_downloader
+import stockdaq.data.mock_server as mock_server
+
+
+def test_mock_downloaders():
+    with mock_server.MockProviderServer(
+            port=0, missing_symbols=["NONE"]) as server:
+        mock_downloader.MockAlphaVantageDownloader.base_url = server.url
+        mock_downloader.MockyfinanceDownloader.base_url = server.url
+        av = mock_downloader.MockAlphaVantageDownloader()
+        av.download(symbol="AAPL", frequency="intraday")
+        av_intraday = av.dataframe
+        av.download(symbol="AAPL", frequency="daily", outputsize="compact")
+        av_daily = av.dataframe
+        yf = mock_downloader.MockyfinanceDownloader()
+        yf.download(symbol="AAPL", frequency="daily")
+        yf_daily = yf.dataframe
+        batch = yf.download_batch(symbols=["AAPL", "NONE"], frequency="daily")
+        try:
+            av.download(symbol="NONE", frequency="daily")
+            missing_error = False
+        except ValueError:
+            missing_error = True
+        requests = server.requests
+    mock_downloader.MockAlphaVantageDownloader.base_url = (
+        mock_downloader.default_url)
+    mock_downloader.MockyfinanceDownloader.base_url = (
+        mock_downloader.default_url)
+    assert len(av_intraday) == 6529
+    assert len(av_daily) == 100
+    assert av_intraday.index.is_monotonic_increasing
+    assert (yf_daily.values == batch["AAPL"].values).all()
+    assert list(batch) == ["AAPL"]
+    assert missing_error
+    assert requests == 6
+
+
+def test_mock_acquisition():
+    root_dir = "tests/data/mock/"
+    if os.path.exists(root_dir):
+        shutil.rmtree(root_dir)
+    stocklist = ["S{}".format(i) for i in range(8)] + ["NONE"]
+    with mock_server.MockProviderServer(
+            port=0, latency=0.01, error_rate=0.2, rate_limit=6000,
+            missing_symbols=["NONE"], seed=3) as server:
+        mock_downloader.MockAlphaVantageDownloader.base_url = server.url
+        mock_downloader.MockyfinanceDownloader.base_url = server.url
+        a = acq.Acquisiter(
+            stocklist, "", {"Mock Alpha Vantage": "", "Mock yfinance": ""},
+            api_list=["Mock Alpha Vantage", "Mock yfinance"],
+            frequency="daily", root_dir=root_dir, api_call_interval=0.001,
+            health_kwargs={"backoff_base": 0.01, "failure_threshold": 100}
+            )
+        a.update_database(export_kwargs={"criterion": "year"})
+        errors = server.errors
+    mock_downloader.MockAlphaVantageDownloader.base_url = (
+        mock_downloader.default_url)
+    mock_downloader.MockyfinanceDownloader.base_url = (
+        mock_downloader.default_url)
+    done = a.journal.get_symbols("done")
+    failed = a.journal.get_symbols("failed")
+    shutil.rmtree(root_dir)
+    assert errors > 0
+    assert sorted(done) == sorted(stocklist[:-1])
+    assert failed == ["NONE"]
@@ -0,0 +1,51 @@
+"""Tests for stockdaq.acquisiter.pipeline
+"""
+import os
+import shutil
+
+import pandas as pd
+
+import stockdaq.acquisiter.acquisiter as ac
+import stockdaq.data.downloader
+import stockdaq.data.downloader_dict
+
+
+class LocalDownloader(stockdaq.data.downloader.Downloader):
+    def __init__(self, apikey=""):
+        super().__init__(api="local")
+
+    def fetch(self, symbol, frequency="intraday", **kwargs):
+        if symbol == "BAD":
+            raise ValueError("{} not available.".format(symbol))
+        self.rawdata = pd.concat([
+            pd.read_hdf("tests/data/TSLA/intraday/2020-12-24.h5"),
+            pd.read_hdf("tests/data/TSLA/intraday/2020-12-28.h5"),
+            ])
+        return self.rawdata
+
+    def formatter(self, datadump):
+        return datadump
+
+
+def test_pipeline():
+    root_dir = "tests/data/pipeline/"
+    if os.path.exists(root_dir):
+        shutil.rmtree(root_dir)
+    stockdaq.data.downloader_dict.downloader_dict["local"] = LocalDownloader
+    stocklist = ["AAPL", "BAD", "TSLA", "AMD"]
+    a = ac.Acquisiter(
+        stocklist, "", {"local": ""}, api_list=["local"], root_dir=root_dir,
+        api_call_interval=0.001, pipeline=True,
+        pipeline_kwargs={"write_workers": 2, "queue_size": 2}
+        )
+    a.update_database()
+    del stockdaq.data.downloader_dict.downloader_dict["local"]
+    flag = all([
+        os.path.exists(root_dir+"{}/intraday/{}.h5".format(symbol, date))
+        for symbol in ["AAPL", "TSLA", "AMD"]
+        for date in ["2020-12-24", "2020-12-28"]
+        ])
+    bad = os.path.exists(root_dir+"BAD")
+    shutil.rmtree(root_dir)
+    assert flag
+    assert not bad
@@ -0,0 +1,72 @@
+"""Tests for stockdaq.acquisiter.rate_limiter
+"""
+import os
+
+import stockdaq.acquisiter.rate_limiter as rate_limiter
+
+
+def test_token_bucket():
+    bucket = rate_limiter.TokenBucket(capacity=1, period=12, timestamp=0)
+    assert bucket.reserve(now=0) == 0
+    assert bucket.reserve(now=6) == 6
+    assert bucket.reserve(now=12) == 12
+
+    bucket = rate_limiter.TokenBucket(
+        capacity=2, period=86400, aligned=True, timestamp=3600)
+    assert bucket.reserve(now=3600) == 0
+    assert bucket.reserve(now=7200) == 0
+    assert bucket.reserve(now=7200) == 86400-7200
+    bucket.refill(now=86400)
+    assert bucket.tokens == 1
+
+
+def test_get_rate_limiters():
+    state_path = "tests/.quota.json"
+    if os.path.exists(state_path):
+        os.remove(state_path)
+    rate_limiters = rate_limiter.get_rate_limiters(
+        api_config_path="tests/API_config.ini",
+        api_list=["Alpha Vantage", "yfinance", "other"],
+        state_path=state_path, api_call_interval=1)
+    assert rate_limiters["Alpha Vantage"].buckets["minute"].period == 12
+    assert rate_limiters["Alpha Vantage"].buckets["day"].capacity == 500
+    assert rate_limiters["yfinance"].buckets["minute"].period == 5
+    assert rate_limiters["other"].buckets["interval"].period == 1
+
+    assert rate_limiters["Alpha Vantage"].reserve() == 0
+    assert rate_limiters["Alpha Vantage"].reserve() > 0
+    rate_limiters["Alpha Vantage"].flush()
+    restored = rate_limiter.get_rate_limiters(
+        api_config_path="tests/API_config.ini", api_list=["Alpha Vantage"],
+        state_path=state_path)
+    os.remove(state_path)
+    os.remove(state_path+".lock")
+    assert restored["Alpha Vantage"].buckets["day"].tokens < 499
+
+
+def test_shared_state():
+    state_path = "tests/data/.quota.json"
+    if os.path.exists(state_path):
+        os.remove(state_path)
+    # Two processes sharing the quota file.
+    limiters = [
+        rate_limiter.RateLimiter(
+            api="API", state_path=state_path, save_interval=3600,
+            buckets={"day": rate_limiter.TokenBucket(
+                capacity=10, period=86400, aligned=True)})
+        for _ in range(2)
+    ]
+    for _ in range(3):
+        for limiter in limiters:
+            limiter.reserve()
+    for limiter in limiters:
+        limiter.flush()
+    # No token taken is lost.
+    assert limiters[1].buckets["day"].tokens == 4
+    restored = rate_limiter.RateLimiter(
+        api="API", state_path=state_path,
+        buckets={"day": rate_limiter.TokenBucket(
+            capacity=10, period=86400, aligned=True)})
+    assert restored.buckets["day"].tokens == 4
+    os.remove(state_path)
+    os.remove(state_path+".lock")
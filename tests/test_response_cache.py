@@ -0,0 +1,118 @@
+"""Tests for stockdaq.data.response_cache
+"""
+import os
+import shutil
+import time
+
+import pandas as pd
+import pytest
+
+import stockdaq.acquisiter.acquisiter as acq
+import stockdaq.data.downloader
+import stockdaq.data.response_cache as response_cache
+
+
+class CountingDownloader(stockdaq.data.downloader.Downloader):
+    def __init__(self):
+        super().__init__(api="counting")
+        self.calls = 0
+
+    def fetch_api(self, symbol, frequency="intraday", **kwargs):
+        self.calls += 1
+        self.rawdata = pd.read_hdf("tests/data/TSLA/intraday/2020-12-24.h5")
+        return self.rawdata
+
+
+def test_response_cache():
+    cache_dir = "tests/data/response_cache/"
+    if os.path.exists(cache_dir):
+        shutil.rmtree(cache_dir)
+    cache = response_cache.ResponseCache(cache_dir=cache_dir, ttl=0.2)
+    key = cache.make_key("api", "AAPL", "daily", {"outputsize": "full"})
+    same_key = cache.make_key("api", "AAPL", "daily", {"outputsize": "full"})
+    other_key = cache.make_key("api", "AAPL", "daily", {})
+    miss = cache.get(key)
+    cache.put(key, [1, 2, 3])
+    hit = cache.get(key)
+    time.sleep(0.3)
+    expired = cache.get(key)
+    cache.offline = True
+    replayed = cache.get(key)
+    shutil.rmtree(cache_dir)
+    assert key == same_key
+    assert key != other_key
+    assert miss is None
+    assert hit == [1, 2, 3]
+    assert expired is None
+    assert replayed == [1, 2, 3]
+    assert cache.hits == 2
+
+
+def test_eviction():
+    cache_dir = "tests/data/response_cache_eviction/"
+    if os.path.exists(cache_dir):
+        shutil.rmtree(cache_dir)
+    cache = response_cache.ResponseCache(cache_dir=cache_dir)
+    data = b"x" * 1000
+    for key in ["a", "b", "c"]:
+        cache.put(key, data)
+        time.sleep(0.01)
+    cache.get("a")  # "b" is now the least recently used.
+    cache.max_size = 2500
+    cache.evict()
+    keys = sorted(os.listdir(cache_dir))
+    file_size = sum(
+        os.path.getsize(os.path.join(cache_dir, key)) for key in keys)
+    # The use order is read back from the directory, "c" is now the least
+    # recently used.
+    reopened = response_cache.ResponseCache(
+        cache_dir=cache_dir, max_size=2500)
+    reopened_size = reopened.size
+    reopened.put("d", data)
+    reopened_keys = sorted(os.listdir(cache_dir))
+    shutil.rmtree(cache_dir)
+    assert keys == ["a.pkl", "c.pkl"]
+    assert cache.size == file_size
+    assert reopened_size == file_size
+    assert reopened_keys == ["a.pkl", "d.pkl"]
+
+
+def test_downloader_cache():
+    cache_dir = "tests/data/response_cache_downloader/"
+    if os.path.exists(cache_dir):
+        shutil.rmtree(cache_dir)
+    downloader = CountingDownloader()
+    downloader.set_cache(response_cache.ResponseCache(cache_dir=cache_dir))
+    downloader.fetch(symbol="TSLA", frequency="intraday")
+    cached = downloader.is_cached(symbol="TSLA", frequency="intraday")
+    downloader.fetch(symbol="TSLA", frequency="intraday")
+    downloader.cache.offline = True
+    with pytest.raises(ValueError):
+        downloader.fetch(symbol="AAPL", frequency="intraday")
+    shutil.rmtree(cache_dir)
+    assert cached
+    assert downloader.calls == 1
+    assert len(downloader.rawdata) > 0
+
+
+def test_rolling_ttl():
+    root_dir = "tests/data/rolling_cache/"
+    if os.path.exists(root_dir):
+        shutil.rmtree(root_dir)
+    a = acq.Acquisiter(
+        ["HOT"], "", {}, api_list=[], root_dir=root_dir, rolling=True,
+        database_update_interval=60, update_intervals={"HOT": 0.2},
+        response_cache_dir=root_dir+"cache/")
+    downloader = CountingDownloader()
+    downloader.set_cache(a.response_cache)
+    downloader.fetch(symbol="HOT", frequency="intraday")
+    # Inside one update interval, the response is reused.
+    downloader.fetch(symbol="HOT", frequency="intraday")
+    calls = downloader.calls
+    time.sleep(0.3)
+    # The next update gets new data.
+    downloader.fetch(symbol="HOT", frequency="intraday")
+    shutil.rmtree(root_dir)
+    assert a.response_cache.ttl == 0.2
+    assert calls == 1
+    assert downloader.calls == 2
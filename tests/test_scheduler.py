@@ -0,0 +1,58 @@
+"""Tests for stockdaq.acquisiter.scheduler
+"""
+import os
+import shutil
+
+import stockdaq.acquisiter.acquisiter as acq
+import stockdaq.acquisiter.scheduler as scheduler
+
+
+def test_scheduler():
+    state_path = "tests/data/.schedule.json"
+    if os.path.exists(state_path):
+        os.remove(state_path)
+    s = scheduler.Scheduler(
+        symbols=["A", "B", "HOT"], frequency="daily", interval=100,
+        update_intervals={"HOT": 10}, state_path=state_path)
+    first = s.pop_due()
+    s.reschedule(symbols=first, now=0)
+    none_due = s.pop_due(now=5)
+    hot_due = s.pop_due(now=10)
+    s.reschedule(symbols=hot_due, now=10)
+    for i in range(100):
+        s.reschedule(symbols=["HOT"], now=10)
+    heap_size = len(s._heap)
+
+    s = scheduler.Scheduler(
+        symbols=["A", "B", "HOT", "NEW"], frequency="daily", interval=100,
+        update_intervals={"HOT": 10}, state_path=state_path)
+    restored = s.due
+    os.remove(state_path)
+    assert sorted(first) == ["A", "B", "HOT"]
+    assert none_due == []
+    assert hot_due == ["HOT"]
+    assert heap_size <= 6
+    assert restored["A"] == 100
+    assert restored["HOT"] == 20
+    assert s.pop_due(now=50) == ["HOT"]
+    assert "NEW" in s.pop_due()
+
+
+def test_rolling_update():
+    class FakeAcquisiter(acq.Acquisiter):
+        def update_stocklist(self, download_kwargs={}, export_kwargs={},
+                             symbols=None):
+            self.updated.append(sorted(symbols))
+
+    root_dir = "tests/data/rolling/"
+    a = FakeAcquisiter(
+        ["A", "HOT"], "", {}, api_list=[], root_dir=root_dir, rolling=True,
+        database_update_interval=60, update_intervals={"HOT": 0.2},
+        journal_keep=2
+        )
+    a.updated = []
+    a.update_rolling(cycles=3)
+    journals = os.listdir(root_dir+".journal/")
+    shutil.rmtree(root_dir)
+    assert a.updated == [["A", "HOT"], ["HOT"], ["HOT"]]
+    assert len(journals) == 2
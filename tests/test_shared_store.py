@@ -0,0 +1,52 @@
+"""Tests for stockdaq.data.shared_store
+"""
+import multiprocessing
+
+import numpy as np
+import pytest
+
+import stockdaq.constants
+import stockdaq.data.data
+import stockdaq.data.shared_store
+
+
+def get_close_sum(namespace, key):
+    store = stockdaq.data.shared_store.SharedStore(namespace=namespace)
+    return float(store.get(key).close.sum())
+
+
+def test_shared_store():
+    namespace = "stockdaq-test"
+    source = stockdaq.data.data.Data(
+        load_path="tests/data/TSLA/intraday/2020-12-24.h5",
+        dtypes=stockdaq.constants.compact_dtypes)
+    with stockdaq.data.shared_store.SharedStore(namespace=namespace) as store:
+        store.put("TSLA", source)
+        assert store.keys() == ["TSLA"]
+
+        reader = stockdaq.data.shared_store.SharedStore(namespace=namespace)
+        data = reader.get("TSLA")
+        assert data.dataframe.equals(source.dataframe)
+        assert data.close.dtype == np.float32
+        assert not data.close.flags.writeable
+        with pytest.raises(ValueError):
+            data.close[0] = 0
+        assert list(reader.get("TSLA", columns=["close"]).columns) == [
+            "close"]
+        with pytest.raises(ValueError):
+            reader.get("AAPL")
+
+        context = multiprocessing.get_context("fork")
+        with context.Pool(2) as pool:
+            sums = pool.starmap(
+                get_close_sum, [(namespace, "TSLA"), (namespace, "TSLA")])
+        assert sums == [float(source.close.sum())]*2
+        # The segment survives the exit of the readers.
+        assert reader.get("TSLA").close.sum() == source.close.sum()
+
+        # Replacing a key keeps the old views valid.
+        store.put("TSLA", source.dataframe.iloc[:10])
+        assert len(reader.get("TSLA").datetime_column) == 10
+        assert data.dataframe.equals(source.dataframe)
+    with pytest.raises(ValueError):
+        reader.get("TSLA")
@@ -0,0 +1,41 @@
+"""Tests for stockdaq.data.yfinance_downloader
+"""
+import numpy as np
+import pandas as pd
+
+import stockdaq.data.yfinance_downloader
+
+
+def make_batch_datadump(symbols, n=5):
+    index = pd.date_range(
+        "2021-01-04 09:30", periods=n, freq="min", tz="America/New_York")
+    fields = ["Open", "High", "Low", "Close", "Volume"]
+    columns = pd.MultiIndex.from_product([symbols, fields])
+    data = np.arange(n*len(columns), dtype=float).reshape(n, len(columns))
+    return pd.DataFrame(data=data, index=index, columns=columns)
+
+
+def test_split_batch():
+    datadump = make_batch_datadump(["AAPL", "TSLA", "NONE"])
+    datadump["NONE"] = np.nan
+    downloader = stockdaq.data.yfinance_downloader.yfinanceDownloader()
+    dataframes = downloader.split_batch(
+        datadump=datadump, symbols=["AAPL", "TSLA", "NONE", "AMD"])
+    assert sorted(dataframes) == ["AAPL", "TSLA"]
+    tsla = dataframes["TSLA"]
+    assert list(tsla.columns) == ["open", "high", "low", "close", "volume"]
+    assert tsla.index.tz is None
+    assert tsla["close"].iloc[0] == datadump["TSLA"]["Close"].iloc[0]
+
+
+def test_formatter():
+    datadump = make_batch_datadump(["AAPL"]).swaplevel(axis=1)
+    downloader = stockdaq.data.yfinance_downloader.yfinanceDownloader()
+    dataframe = downloader.formatter(datadump=datadump)
+    downloader.set_timezone("UTC")
+    utc = downloader.formatter(datadump=datadump.iloc[::-1])
+    assert list(dataframe.columns) == [
+        "open", "high", "low", "close", "volume"]
+    assert str(dataframe.index[0]) == "2021-01-04 09:30:00"
+    assert str(utc.index[0]) == "2021-01-04 14:30:00"
+    assert (utc["open"].values == dataframe["open"].values).all()